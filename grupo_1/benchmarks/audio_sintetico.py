@@ -0,0 +1,52 @@
+"""
+Audio PCM sintético (16 bits, mono) para probar la grabación y la transcripción sin micrófono.
+Alterna tramos "hablados" (armónicos con envolvente) y silencios con ruido de fondo.
+"""
+import os
+import sys
+
+import numpy as np
+
+# Permite importar los módulos de grupo_1/src desde los benchmarks
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+
+def senal_voz(muestras, rate, inicio=0, semilla=0, tramo_voz=1.2, tramo_silencio=0.6):
+    """Retorna `muestras` int16 de la señal a partir de la muestra `inicio` (continua entre llamadas)"""
+    t = (inicio + np.arange(muestras)) / rate
+    periodo = tramo_voz + tramo_silencio
+    fase = t % periodo
+    habla = fase < tramo_voz
+    # Tono fundamental que varía por tramo, con dos armónicos y envolvente suave
+    tramo = (t // periodo).astype(np.int64)
+    f0 = 110 + (tramo * 37) % 90
+    envolvente = np.sin(np.pi * np.clip(fase / tramo_voz, 0, 1)) * habla
+    voz = (np.sin(2 * np.pi * f0 * t) + 0.5 * np.sin(4 * np.pi * f0 * t) + 0.25 * np.sin(6 * np.pi * f0 * t))
+    ruido = np.random.default_rng(semilla + inicio).normal(0, 0.01, muestras)
+    return (np.clip(0.4 * envolvente * voz + ruido, -1, 1) * 32767).astype(np.int16)
+
+
+def bloques_pcm(segundos, rate, chunk, semilla=0):
+    """Generador de bloques de bytes PCM de `chunk` muestras, como los entrega el callback de pyaudio"""
+    total = int(segundos * rate)
+    for inicio in range(0, total, chunk):
+        yield senal_voz(min(chunk, total - inicio), rate, inicio, semilla).tobytes()
+
+
+
+def escribir_wav(ruta, segundos, rate, silencio_inicial=0.0, silencio_final=0.0, semilla=0):
+    """Escribe una grabación de prueba con silencios (solo ruido de fondo) al inicio y al final"""
+    import wave
+    rng = np.random.default_rng(semilla)
+    partes = [
+        (rng.normal(0, 0.01, int(silencio_inicial * rate)) * 32767).astype(np.int16),
+        senal_voz(int(segundos * rate), rate, semilla=semilla),
+        (rng.normal(0, 0.01, int(silencio_final * rate)) * 32767).astype(np.int16),
+    ]
+    with wave.open(ruta, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        for parte in partes:
+            wf.writeframes(parte.tobytes())
+    return ruta
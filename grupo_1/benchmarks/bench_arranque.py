@@ -0,0 +1,94 @@
+"""
+Benchmark: tiempo de importación (python -X importtime) y memoria de los módulos
+de la aplicación. Cada módulo se importa en un proceso nuevo; se reporta el tiempo
+de pared, el RSS máximo del proceso y los paquetes que más tardan en importarse.
+Con --revision se mide también el código de otra revisión de git (p. ej. la anterior
+a las importaciones perezosas) para comparar.
+
+    python grupo_1/benchmarks/bench_arranque.py --modulos main analisisPenal --revision <commit-base>
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+from collections import defaultdict
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Se importa el módulo y se reporta el RSS máximo en KB (Linux) al terminar
+CODIGO = (
+    "import resource, time; t = time.perf_counter(); import {modulo}; "
+    "print(time.perf_counter() - t, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+)
+
+
+def medir(modulo, directorio):
+    """Retorna (segundos, rss_kb, {importación directa: microsegundos}) o lanza RuntimeError"""
+    entorno = {**os.environ, 'PYTHONPATH': directorio, 'PYTHONDONTWRITEBYTECODE': '1'}
+    resultado = subprocess.run([sys.executable, '-X', 'importtime', '-c', CODIGO.format(modulo=modulo)],
+                               cwd=directorio, env=entorno, capture_output=True, text=True)
+    if resultado.returncode != 0:
+        error = resultado.stderr.strip().splitlines()
+        raise RuntimeError(error[-1] if error else f'código de salida {resultado.returncode}')
+
+    # Líneas "import time: self [us] | cumulative | imported package"; la sangría del nombre
+    # indica la profundidad. Se suman las importaciones directas del módulo por paquete raíz.
+    paquetes = defaultdict(int)
+    for linea in resultado.stderr.splitlines():
+        if not linea.startswith('import time:') or 'cumulative' in linea:
+            continue
+        _, acumulado, nombre = linea[len('import time:'):].split('|')
+        profundidad = (len(nombre) - len(nombre.lstrip()) - 1) // 2
+        if profundidad == 1:
+            paquetes[nombre.strip().split('.')[0]] += int(acumulado)
+    segundos, rss = resultado.stdout.split()[-2:]
+    return float(segundos), int(rss), paquetes
+
+
+def extraer_revision(revision, destino):
+    """Copia grupo_1/src de la revisión indicada en destino y retorna la ruta"""
+    raiz = subprocess.run(['git', 'rev-parse', '--show-toplevel'], cwd=SRC,
+                          capture_output=True, text=True, check=True).stdout.strip()
+    archivo = os.path.join(destino, 'src.tar')
+    subprocess.run(['git', 'archive', '-o', archivo, revision, 'grupo_1/src'], cwd=raiz, check=True)
+    with tarfile.open(archivo) as tar:
+        tar.extractall(destino)
+    return os.path.join(destino, 'grupo_1', 'src')
+
+
+def reportar(etiqueta, modulo, directorio, repeticiones, top):
+    try:
+        medidas = [medir(modulo, directorio) for _ in range(repeticiones)]
+    except RuntimeError as e:
+        print(f"{etiqueta:>10} {modulo:<18} no importa en este entorno: {e}")
+        return
+    # Se toma la repetición más rápida (la primera paga la caché de disco)
+    segundos, rss, paquetes = min(medidas, key=lambda m: m[0])
+    print(f"{etiqueta:>10} {modulo:<18} {segundos * 1000:8.0f} ms   RSS máx {rss / 1024:6.1f} MB")
+    for nombre, micro in sorted(paquetes.items(), key=lambda p: -p[1])[:top]:
+        print(f"{'':>30} {nombre:<24} {micro / 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque de la aplicación")
+    parser.add_argument("--modulos", nargs="+", default=["analisisPenal", "corpus_compartido", "main"])
+    parser.add_argument("--revision",
+                        help="revisión de git con la que comparar (p. ej. la anterior a las importaciones perezosas)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8, help="paquetes más lentos a mostrar")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporal:
+        directorios = [('actual', os.path.abspath(SRC))]
+        if args.revision:
+            directorios.insert(0, (args.revision, extraer_revision(args.revision, temporal)))
+        for modulo in args.modulos:
+            for etiqueta, directorio in directorios:
+                reportar(etiqueta, modulo, directorio, args.repeticiones, args.top)
+            print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: tamaño del audio enviado a transcribir y latencia de punta a punta
+(preparación + subida + transcripción) sobre grabaciones de prueba a 44.1 kHz con
+silencio al inicio y al final. La subida y el servicio se simulan con un servidor local
+limitado a --subida-mbps cuya demora crece con los segundos de audio recibidos.
+
+    python grupo_1/benchmarks/bench_audio.py --duraciones 5 15 60 --subida-mbps 2
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import requests
+
+from audio_sintetico import escribir_wav
+from servidor_stub import iniciar_servidor_transcripcion
+from preparar_audio import preparar_audio, soundfile
+from record_audio import RATE
+
+# (nombre, formato, recortar silencio); None = el WAV original sin tocar
+CONFIGURACIONES = [
+    ("WAV 44.1 kHz (antes)", None, False),
+    ("WAV 16 kHz", "wav", False),
+    ("FLAC 16 kHz", "flac", False),
+    ("FLAC 16 kHz + VAD", "flac", True),
+    ("Opus 16 kHz + VAD", "opus", True),
+]
+
+
+def transcribir(url, ruta, formato, recortar):
+    """Retorna (bytes enviados, segundos de preparación, segundos totales)"""
+    inicio = time.perf_counter()
+    if formato is None:
+        with open(ruta, "rb") as f:
+            datos = f.read()
+        segundos = (len(datos) - 44) / (2 * RATE)
+    else:
+        datos, _, segundos = preparar_audio(ruta, formato, recortar)
+    t_preparar = time.perf_counter() - inicio
+    respuesta = requests.post(url, data=datos, headers={"X-Segundos-Audio": str(segundos)})
+    respuesta.raise_for_status()
+    return len(datos), t_preparar, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del audio enviado a transcribir")
+    parser.add_argument("--duraciones", type=float, nargs="+", default=[5, 15, 60],
+                        help="segundos de voz de cada grabación")
+    parser.add_argument("--silencio", type=float, nargs=2, default=[1.5, 1.0],
+                        help="segundos de silencio al inicio y al final")
+    parser.add_argument("--subida-mbps", type=float, default=2.0)
+    args = parser.parse_args()
+
+    if soundfile is None:
+        print("soundfile no está instalado: FLAC y Opus se envían como WAV 16 kHz")
+    servidor, url = iniciar_servidor_transcripcion(args.subida_mbps)
+    with tempfile.TemporaryDirectory() as directorio:
+        for duracion in args.duraciones:
+            ruta = escribir_wav(os.path.join(directorio, f"voz-{duracion:g}.wav"), duracion, RATE,
+                                *args.silencio)
+            print(f"{duracion:g} s de voz + {sum(args.silencio):g} s de silencio")
+            base = None
+            for nombre, formato, recortar in CONFIGURACIONES:
+                tamano, t_preparar, total = transcribir(url, ruta, formato, recortar)
+                base = base or (tamano, total)
+                print(f"  {nombre:<22} {tamano / 1024:9.1f} KB ({tamano / base[0]:6.1%})  "
+                      f"preparar {t_preparar * 1000:6.1f} ms  total {total:6.2f} s ({base[1] / total:4.1f}x)")
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: descarga secuencial (requests.get) vs MotorDescargas sobre un servidor local.
+
+    python grupo_1/benchmarks/bench_descargas.py --paginas 100 --latencia 0.05
+"""
+import argparse
+import time
+
+import requests
+from bs4 import BeautifulSoup
+
+from servidor_stub import iniciar_servidor
+from motor_descargas import MotorDescargas
+
+
+def extraer(html):
+    s_nota = BeautifulSoup(html, 'html.parser')
+    div = s_nota.find('div', attrs={'class': 'WordSection1'}) or s_nota.find('div', attrs={'class': 'Section1'})
+    return div.text.strip()
+
+
+def secuencial(enlaces):
+    """Implementación original: una petición a la vez, sin sesión compartida"""
+    paginas = {}
+    for enlace in enlaces:
+        nota = requests.get(enlace)
+        nota.raise_for_status()
+        paginas[enlace] = nota.text
+    return paginas
+
+
+def concurrente(enlaces, trabajadores):
+    paginas = {}
+    with MotorDescargas(max_trabajadores=trabajadores, max_por_host=trabajadores) as motor:
+        for enlace, nota, error in motor.descargar_todos(enlaces):
+            if error is not None:
+                raise error
+            paginas[enlace] = nota.text
+    return paginas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del motor de descargas")
+    parser.add_argument("--paginas", type=int, default=100)
+    parser.add_argument("--latencia", type=float, default=0.05, help="Latencia simulada por petición (s)")
+    parser.add_argument("--trabajadores", type=int, default=16)
+    args = parser.parse_args()
+
+    servidor, enlaces = iniciar_servidor(args.paginas, args.latencia)
+    try:
+        inicio = time.perf_counter()
+        base = secuencial(enlaces)
+        t_secuencial = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        nuevo = concurrente(enlaces, args.trabajadores)
+        t_concurrente = time.perf_counter() - inicio
+    finally:
+        servidor.shutdown()
+
+    # El diccionario_relatorias resultante debe ser idéntico (mismo contenido y orden)
+    base = {enlace: extraer(html) for enlace, html in base.items()}
+    nuevo = {enlace: extraer(html) for enlace, html in nuevo.items()}
+    assert list(base.items()) == list(nuevo.items()), "Los diccionarios no coinciden"
+    print(f"Páginas: {len(enlaces)}  latencia simulada: {args.latencia * 1000:.0f} ms")
+    print(f"Descarga secuencial:  {t_secuencial:.2f} s")
+    print(f"Descarga concurrente: {t_concurrente:.2f} s  ({args.trabajadores} hilos)")
+    print(f"Aceleración: {t_secuencial / t_concurrente:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark: custom_split (cortes fijos cada 1000 caracteres) vs divisor_sentencias.dividir_texto
+sobre sentencias largas sintéticas.
+
+    python grupo_1/benchmarks/bench_divisor.py --caracteres 2000000
+"""
+import argparse
+import time
+
+from servidor_stub import PARRAFO
+from divisor_sentencias import dividir_texto, _cortes
+
+
+def custom_split(text, max_size=1000):
+    """Implementación original de scraping_sentencias"""
+    chunks = []
+    while len(text) > max_size:
+        chunk = text[:max_size]
+        chunks.append(chunk)
+        text = text[max_size:]
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+def sentencia_larga(caracteres):
+    secciones = ["I. ANTECEDENTES", "II. CONSIDERACIONES Y FUNDAMENTOS", "III. DECISIÓN", "RESUELVE:"]
+    por_seccion = caracteres // len(secciones)
+    partes = ["Sentencia T-406/24\n"]
+    for seccion in secciones:
+        partes.append(f"\n{seccion}\n")
+        partes.append((PARRAFO + "\n") * (por_seccion // (len(PARRAFO) + 1)))
+    return "".join(partes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del divisor de sentencias")
+    parser.add_argument("--caracteres", type=int, nargs="+", default=[100000, 500000, 2000000])
+    args = parser.parse_args()
+
+    for caracteres in args.caracteres:
+        texto = sentencia_larga(caracteres)
+        inicio = time.perf_counter()
+        base = custom_split(texto)
+        t_base = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        tramos = list(dividir_texto(texto))
+        t_nuevo = time.perf_counter() - inicio
+
+        # Porcentaje de chunks que terminan en un fin de oración o de sección
+        cortes = set(_cortes(texto)) | {len(texto)}
+        limpios_base = sum(1 for i in range(len(base)) if (i + 1) * 1000 in cortes or i == len(base) - 1)
+        limpios_nuevo = sum(1 for _, fin, _ in tramos if fin in cortes)
+        secciones = len({seccion for _, _, seccion in tramos})
+        print(f"{len(texto):>9} caracteres")
+        print(f"  custom_split:  {t_base * 1000:8.1f} ms  {len(base):5d} chunks  "
+              f"{limpios_base / len(base):6.1%} terminan en fin de oración")
+        print(f"  dividir_texto: {t_nuevo * 1000:8.1f} ms  {len(tramos):5d} chunks  "
+              f"{limpios_nuevo / len(tramos):6.1%} terminan en fin de oración  ({secciones} secciones)")
+
+
+if __name__ == "__main__":
+    main()
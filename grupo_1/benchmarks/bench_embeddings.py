@@ -0,0 +1,79 @@
+"""
+Benchmark: modelo de embeddings directo vs EmbeddingsConCache sobre un backend falso local.
+Simula dos búsquedas que se solapan, con pasajes repetidos entre sentencias.
+
+    python grupo_1/benchmarks/bench_embeddings.py --chunks 2000 --repetidos 0.3
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from servidor_stub import PARRAFO
+from embeddings_falsos import EmbeddingsFalsos
+from cache_embeddings import EmbeddingsConCache
+
+PLANTILLAS = [
+    "En mérito de lo expuesto, la Sala Plena de la Corte Constitucional, administrando justicia "
+    "en nombre del pueblo y por mandato de la Constitución, RESUELVE:",
+    "Notifíquese, comuníquese, publíquese en la Gaceta de la Corte Constitucional y cúmplase.",
+    "La Corte Constitucional es competente para conocer de la presente acción de tutela, "
+    "de conformidad con lo dispuesto en los artículos 86 y 241 de la Constitución.",
+]
+
+
+def corpus(n, repetidos, semilla):
+    generador = random.Random(semilla)
+    chunks = []
+    for i in range(n):
+        if generador.random() < repetidos:
+            chunks.append(generador.choice(PLANTILLAS))
+        else:
+            chunks.append(f"Chunk {semilla}-{i}: {PARRAFO}")
+    return chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la caché de embeddings")
+    parser.add_argument("--chunks", type=int, default=2000, help="Chunks por búsqueda")
+    parser.add_argument("--repetidos", type=float, default=0.3, help="Fracción de pasajes repetidos")
+    parser.add_argument("--solapamiento", type=float, default=0.5, help="Fracción de la segunda búsqueda ya vista")
+    parser.add_argument("--lote", type=int, default=256)
+    parser.add_argument("--concurrencia", type=int, default=4)
+    args = parser.parse_args()
+
+    busqueda_1 = corpus(args.chunks, args.repetidos, semilla=1)
+    vistos = int(args.chunks * args.solapamiento)
+    busqueda_2 = busqueda_1[:vistos] + corpus(args.chunks - vistos, args.repetidos, semilla=2)
+
+    # Línea base: una llamada por búsqueda con todos los textos (como OpenAIEmbeddings por defecto)
+    directo = EmbeddingsFalsos()
+    inicio = time.perf_counter()
+    for busqueda in (busqueda_1, busqueda_2):
+        for i in range(0, len(busqueda), 1000):
+            directo.embed_documents(busqueda[i:i + 1000])
+    t_directo = time.perf_counter() - inicio
+
+    with tempfile.TemporaryDirectory() as directorio:
+        falso = EmbeddingsFalsos()
+        cache = EmbeddingsConCache(falso, espacio="falso", ruta=os.path.join(directorio, "cache.sqlite"),
+                                   tamano_lote=args.lote, max_concurrencia=args.concurrencia)
+        inicio = time.perf_counter()
+        for busqueda in (busqueda_1, busqueda_2):
+            vectores = cache.embed_documents(busqueda)
+            assert len(vectores) == len(busqueda)
+        t_cache = time.perf_counter() - inicio
+        cache.cerrar()
+
+    total = len(busqueda_1) + len(busqueda_2)
+    print(f"Chunks totales: {total}")
+    print(f"Directo:   {t_directo:.2f} s  {directo.textos_enviados} textos enviados en {directo.llamadas} llamadas"
+          f"  ({total / t_directo:.0f} chunks/s)")
+    print(f"Con caché: {t_cache:.2f} s  {falso.textos_enviados} textos enviados en {falso.llamadas} llamadas"
+          f"  ({total / t_cache:.0f} chunks/s)")
+    print(f"Tasa de aciertos de la caché: {cache.tasa_aciertos():.1%}")
+
+
+if __name__ == "__main__":
+    main()
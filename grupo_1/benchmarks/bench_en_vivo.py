@@ -0,0 +1,80 @@
+"""
+Benchmark: latencia después de detener la grabación con transcripción al final (todo el
+audio de una vez) frente a la transcripción en vivo por segmentos (TranscriptorEnVivo).
+El audio sintético entra por el callback de AudioRecorder al ritmo de la grabación
+(acelerado) y la transcripción se simula con una demora `base + por_segundo * segundos`
+dividida por la misma aceleración. Las latencias se reportan en segundos reales.
+
+    python grupo_1/benchmarks/bench_en_vivo.py --duraciones 10 30 60 120 --aceleracion 20
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from audio_sintetico import bloques_pcm
+from preparar_audio import RATE_TRANSCRIPCION
+from record_audio import AudioRecorder, CHUNK, RATE
+from transcripcion_en_vivo import TranscriptorEnVivo
+
+
+def transcriptor_simulado(base, por_segundo, aceleracion):
+    """Función de transcripción que tarda como el servicio y retorna la duración del audio recibido"""
+    def transcribir(muestras):
+        segundos = len(muestras) / RATE_TRANSCRIPCION
+        time.sleep((base + por_segundo * segundos) / aceleracion)
+        return f"[{segundos:.1f}s]"
+    return transcribir
+
+
+def grabar(ruta, segundos, aceleracion, transcriptor=None):
+    """Alimenta la grabadora y retorna el instante en que se detuvo"""
+    grabadora = AudioRecorder(consumidor=transcriptor.agregar if transcriptor else None)
+    grabadora.output_file = ruta
+    grabadora.preparar_escritura()
+    grabadora.is_recording = True
+    pausa = CHUNK / RATE / aceleracion
+    siguiente = time.perf_counter()
+    for bloque in bloques_pcm(segundos, RATE, CHUNK):
+        grabadora._audio_callback(bloque, CHUNK, None, 0)
+        siguiente += pausa
+        espera = siguiente - time.perf_counter()
+        if espera > 0:
+            time.sleep(espera)
+    detenido = time.perf_counter()
+    grabadora.stop_recording()
+    return detenido
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la transcripción en vivo")
+    parser.add_argument("--duraciones", type=float, nargs="+", default=[10, 30, 60, 120])
+    parser.add_argument("--aceleracion", type=float, default=20)
+    parser.add_argument("--base", type=float, default=0.4, help="segundos fijos por transcripción")
+    parser.add_argument("--por-segundo", type=float, default=0.05, help="segundos por segundo de audio")
+    args = parser.parse_args()
+
+    transcribir = transcriptor_simulado(args.base, args.por_segundo, args.aceleracion)
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "grabacion.wav")
+        for duracion in args.duraciones:
+            # Al final: se transcribe el archivo completo después de detener
+            detenido = grabar(ruta, duracion, args.aceleracion)
+            transcribir(np.zeros(int(duracion * RATE_TRANSCRIPCION), dtype=np.float32))
+            t_final = (time.perf_counter() - detenido) * args.aceleracion
+
+            # En vivo: al detener solo falta el último segmento
+            transcriptor = TranscriptorEnVivo(transcribir, RATE)
+            detenido = grabar(ruta, duracion, args.aceleracion, transcriptor)
+            texto = transcriptor.finalizar()
+            t_vivo = (time.perf_counter() - detenido) * args.aceleracion
+            cubierto = sum(float(parte.strip("[]s")) for parte in texto.split())
+
+            print(f"{duracion:6g} s de voz   al final {t_final:6.2f} s   en vivo {t_vivo:6.2f} s   "
+                  f"({transcriptor.segmentos} segmentos, {cubierto:.1f} s transcritos)")
+
+
+if __name__ == "__main__":
+    main()
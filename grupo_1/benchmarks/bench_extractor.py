@@ -0,0 +1,93 @@
+"""
+Paridad y microbenchmark: extractor_html.extraer_cuerpo vs BeautifulSoup(html.parser).
+
+    python grupo_1/benchmarks/bench_extractor.py --repeticiones 20
+"""
+import argparse
+import glob
+import os
+import time
+
+from bs4 import BeautifulSoup
+
+from servidor_stub import pagina_relatoria
+import extractor_html
+from extractor_html import extraer_cuerpo
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "relatorias")
+
+
+def extraer_bs4(html):
+    """Implementación original de scraping_sentencias"""
+    s_nota = BeautifulSoup(html, 'html.parser')
+    try:
+        return (s_nota.find('div', attrs={'class': 'WordSection1'}).text).strip()
+    except AttributeError:
+        try:
+            return (s_nota.find('div', attrs={'class': 'Section1'}).text).strip()
+        except AttributeError:
+            return None
+
+
+def corpus_paridad():
+    corpus = {}
+    for ruta in sorted(glob.glob(os.path.join(FIXTURES, "*.htm"))):
+        with open(ruta, encoding="utf-8") as f:
+            corpus[os.path.basename(ruta)] = f.read()
+    corpus["generada-WordSection1"] = pagina_relatoria("T-201-24", parrafos=50)
+    corpus["generada-Section1"] = pagina_relatoria("T-200-24", parrafos=50)
+    return corpus
+
+
+def verificar_paridad(corpus, usar_lxml):
+    errores = 0
+    for nombre, html in corpus.items():
+        esperado = extraer_bs4(html)
+        obtenido = extraer_cuerpo(html, usar_lxml=usar_lxml)
+        if obtenido != esperado:
+            errores += 1
+            print(f"  DIFERENCIA en {nombre}:\n    bs4:  {esperado!r}\n    nuevo: {obtenido!r}")
+    return errores
+
+
+def medir(funcion, paginas, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for html in paginas:
+            funcion(html)
+    return (time.perf_counter() - inicio) / (repeticiones * len(paginas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del extractor de cuerpos de sentencia")
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--parrafos", type=int, default=2000, help="Párrafos por página generada")
+    args = parser.parse_args()
+
+    rutas = [("python", False)]
+    if extractor_html.etree is not None:
+        rutas.append(("lxml", True))
+
+    corpus = corpus_paridad()
+    fallos = 0
+    for nombre, usar_lxml in rutas:
+        errores = verificar_paridad(corpus, usar_lxml)
+        print(f"Paridad ({nombre}): {len(corpus) - errores}/{len(corpus)} páginas idénticas")
+        fallos += errores
+
+    # Páginas grandes: cuerpo al inicio (WordSection1) y al final del documento (Section1)
+    paginas = [pagina_relatoria("T-301-24", args.parrafos), pagina_relatoria("T-300-24", args.parrafos)]
+    tamano = sum(len(p) for p in paginas) / len(paginas) / 1024
+    base = medir(extraer_bs4, paginas, args.repeticiones)
+    print(f"\nPágina promedio: {tamano:.0f} KB")
+    print(f"BeautifulSoup html.parser: {base * 1000:.1f} ms/página")
+    for nombre, usar_lxml in rutas:
+        t = medir(lambda html: extraer_cuerpo(html, usar_lxml=usar_lxml), paginas, args.repeticiones)
+        print(f"extraer_cuerpo ({nombre}): {t * 1000:.1f} ms/página  ({base / t:.1f}x)")
+
+    if fallos:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark de la búsqueda híbrida (indice_bm25.py): inserción incremental en el índice BM25
+a medida que crece el corpus, latencia p50/p95 de la búsqueda léxica, la vectorial y la
+híbrida, y precisión@k en preguntas que dependen de tokens exactos (números de sentencia,
+nombres de las partes). Los embeddings se simulan con una bolsa de palabras proyectada que,
+como los modelos densos, no distingue números ni nombres propios.
+
+    python grupo_1/benchmarks/bench_hibrido.py --chunks 20000 --sentencias 500 --k 6
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from indice_bm25 import IndiceBM25, RetrieverHibrido, tokenizar
+from indice_local import IndiceVectorialLocal, RetrieverLocal
+
+TEMAS = ["salud", "pensión", "debido proceso", "mínimo vital", "vivienda", "educación", "trabajo",
+         "igualdad", "intimidad", "libre desarrollo", "habeas data", "seguridad social"]
+VOCABULARIO = ("accionante accionada tutela derecho fundamental vulneración amparo juez instancia "
+               "corte constitucional procedencia subsidiariedad perjuicio irremediable protección "
+               "entidad prestadora servicio medicamento tratamiento orden fallo revisión hechos "
+               "pretensiones consideraciones decisión resuelve confirmar revocar negar conceder").split()
+NOMBRES = ["Martínez", "Rodríguez", "Gómez", "Londoño", "Castaño", "Quintero", "Arboleda", "Zuluaga",
+           "Restrepo", "Valencia", "Ospina", "Cárdenas", "Betancur", "Echeverri", "Montoya", "Salazar"]
+
+
+def generar_corpus(n_chunks, n_sentencias, generador):
+    """Chunks de sentencias sintéticas: cada uno nombra su providencia, un artículo y una de las partes"""
+    sentencias = [f"T-{100 + i}-{generador.integers(15, 25)}" for i in range(n_sentencias)]
+    partes = [f"{generador.choice(NOMBRES)} {generador.choice(NOMBRES)}" for _ in range(n_sentencias)]
+    temas = [TEMAS[i % len(TEMAS)] for i in range(n_sentencias)]
+    chunks = []
+    for i in range(n_chunks):
+        s = int(generador.integers(n_sentencias))
+        palabras = " ".join(generador.choice(VOCABULARIO, 40))
+        texto = (f"Sentencia {sentencias[s]}. {palabras} derecho a la {temas[s]} del señor {partes[s]}, "
+                 f"artículo {int(generador.integers(1, 400))} de la Constitución.")
+        chunks.append({'page_content': texto, 'metadata': {'sentencia': f'relatoria/2024/{sentencias[s]}.htm'},
+                       'hash': str(i)})
+    return chunks, sentencias, partes, temas
+
+
+class EmbeddingsBolsa:
+    """Bolsa de palabras proyectada al azar, sin números, identificadores ni nombres propios"""
+
+    def __init__(self, dimension=128):
+        self.dimension = dimension
+        self._excluidos = {token for nombre in NOMBRES for token in tokenizar(nombre)}
+
+    def _vector(self, texto):
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for token in tokenizar(texto):
+            if any(c.isdigit() for c in token) or token in self._excluidos:
+                continue
+            semilla = zlib.crc32(token.encode())
+            vector += np.random.default_rng(semilla).standard_normal(self.dimension).astype(np.float32)
+        return vector
+
+    def embed_query(self, texto):
+        return self._vector(texto)
+
+    def embed_documents(self, textos):
+        return np.array([self._vector(texto) for texto in textos])
+
+
+def percentiles(tiempos):
+    return np.percentile(tiempos, 50) * 1000, np.percentile(tiempos, 95) * 1000
+
+
+def medir_insercion(chunks, tamano_lote):
+    """Throughput de agregar por lotes, reportado por tramos del corpus"""
+    indice = IndiceBM25()
+    tramo = max(len(chunks) // 4, tamano_lote)
+    inicio_tramo = time.perf_counter()
+    for i in range(0, len(chunks), tamano_lote):
+        indice.agregar(chunks[i:i + tamano_lote])
+        if len(indice) % tramo < tamano_lote or len(indice) == len(chunks):
+            segundos = time.perf_counter() - inicio_tramo
+            print(f"  {len(indice):7d} chunks indexados   {tramo / segundos:9.0f} chunks/s en el último tramo")
+            inicio_tramo = time.perf_counter()
+    return indice
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la búsqueda híbrida BM25 + vectorial")
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--sentencias", type=int, default=500)
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--candidatos", type=int, default=20)
+    parser.add_argument("--lote", type=int, default=256, help="chunks por lote de inserción")
+    args = parser.parse_args()
+
+    generador = np.random.default_rng(0)
+    chunks, sentencias, partes, temas = generar_corpus(args.chunks, args.sentencias, generador)
+
+    print("Inserción incremental en el índice BM25:")
+    lexico = medir_insercion(chunks, args.lote)
+
+    embeddings = EmbeddingsBolsa()
+    with tempfile.TemporaryDirectory() as directorio:
+        vectorial = IndiceVectorialLocal(directorio)
+        vectorial.agregar(embeddings.embed_documents([c['page_content'] for c in chunks]), chunks)
+
+        # Preguntas que solo se pueden resolver por un token exacto: la sentencia o el nombre de la parte
+        consultas = []
+        for _ in range(args.consultas):
+            s = int(generador.integers(args.sentencias))
+            if generador.random() < 0.5:
+                consultas.append((f"¿Qué resolvió la Corte en la sentencia {sentencias[s]} sobre la {temas[s]}?", s))
+            else:
+                consultas.append((f"Tutela de {partes[s]} por el derecho a la {temas[s]}", s))
+
+        retrievers = {
+            "vectorial": RetrieverLocal(indice=vectorial, embeddings=embeddings, k=args.k),
+            "híbrido": RetrieverHibrido(
+                vectorial=RetrieverLocal(indice=vectorial, embeddings=embeddings, k=args.candidatos),
+                lexico=lexico, k=args.k, candidatos=args.candidatos),
+        }
+
+        def medir(nombre, buscar):
+            """buscar(consulta) -> textos; un resultado es relevante si nombra la sentencia o la parte buscada"""
+            tiempos, precision, aciertos = [], [], []
+            for consulta, s in consultas:
+                inicio = time.perf_counter()
+                textos = buscar(consulta)
+                tiempos.append(time.perf_counter() - inicio)
+                relevantes = sum(sentencias[s] in texto or partes[s] in texto for texto in textos)
+                precision.append(relevantes / args.k)
+                aciertos.append(relevantes > 0)
+            p50, p95 = percentiles(tiempos)
+            print(f"  {nombre:10s} p50 {p50:7.2f} ms   p95 {p95:7.2f} ms   "
+                  f"precisión@{args.k} {np.mean(precision):6.1%}   acierto@{args.k} {np.mean(aciertos):6.1%}")
+
+        print(f"\n{args.consultas} consultas con tokens exactos, {len(chunks)} chunks, k={args.k}:")
+        medir("BM25", lambda consulta: [lexico.documentos[i]['page_content'] for i, _ in lexico.buscar(consulta, args.k)])
+        for nombre, retriever in retrievers.items():
+            medir(nombre, lambda consulta: [d.page_content for d in retriever.invoke(consulta)])
+
+        # Filtro por sentencia: todos los resultados deben pertenecer a la providencia mencionada
+        fuera = 0
+        for consulta, s in consultas:
+            if sentencias[s] not in consulta:
+                continue
+            documentos = retrievers["híbrido"].invoke(consulta)
+            fuera += sum(sentencias[s] not in d.metadata.get('sentencia', '') for d in documentos)
+        print(f"  Filtro por sentencia mencionada: {fuera} resultados de otras providencias")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark de latencia y recall del IndiceVectorialLocal: búsqueda exacta vs IVF.
+
+    python grupo_1/benchmarks/bench_indice_local.py --vectores 50000 --dimension 256
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from indice_local import IndiceVectorialLocal
+
+
+def datos_agrupados(n, dimension, grupos, generador):
+    """Vectores alrededor de centros aleatorios (parecido a chunks de sentencias sobre pocos temas)"""
+    centros = generador.standard_normal((grupos, dimension)).astype(np.float32)
+    etiquetas = generador.integers(0, grupos, n)
+    return centros[etiquetas] + 0.5 * generador.standard_normal((n, dimension)).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del índice vectorial local")
+    parser.add_argument("--vectores", type=int, default=50000)
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    generador = np.random.default_rng(0)
+    vectores = datos_agrupados(args.vectores, args.dimension, 100, generador)
+    consultas = vectores[generador.choice(args.vectores, args.consultas)] \
+        + 0.3 * generador.standard_normal((args.consultas, args.dimension)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        indice = IndiceVectorialLocal(directorio)
+        documentos = [{'page_content': f'chunk {i}', 'metadata': {'sentencia': f'T-{i % 100}'}, 'hash': str(i)}
+                      for i in range(args.vectores)]
+        inicio = time.perf_counter()
+        indice.agregar(vectores, documentos)
+        print(f"Carga: {args.vectores} vectores de dimensión {args.dimension} en {time.perf_counter() - inicio:.2f} s")
+
+        inicio = time.perf_counter()
+        exactos = [{i for i, _ in indice.buscar(c, args.k, usar_ivf=False)} for c in consultas]
+        t_exacto = (time.perf_counter() - inicio) / args.consultas
+        print(f"Exacta (fuerza bruta): {t_exacto * 1000:.2f} ms/consulta  recall@{args.k} 100.0%")
+
+        inicio = time.perf_counter()
+        indice.construir_ivf()
+        print(f"Construcción IVF: {time.perf_counter() - inicio:.2f} s")
+        for nprobe in args.nprobe:
+            indice.nprobe = nprobe
+            inicio = time.perf_counter()
+            aproximados = [{i for i, _ in indice.buscar(c, args.k, usar_ivf=True)} for c in consultas]
+            t_ivf = (time.perf_counter() - inicio) / args.consultas
+            recall = np.mean([len(a & e) / len(e) for a, e in zip(aproximados, exactos)])
+            print(f"IVF nprobe={nprobe:<3}: {t_ivf * 1000:.2f} ms/consulta  recall@{args.k} {recall:.1%}"
+                  f"  ({t_exacto / t_ivf:.1f}x)")
+        indice.matriz = None
+
+
+if __name__ == "__main__":
+    main()
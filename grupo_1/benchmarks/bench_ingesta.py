@@ -0,0 +1,66 @@
+"""
+Benchmark del pipeline de ingesta en flujo contra el servidor local y una colección en memoria:
+memoria pico y tiempo hasta el primer lote insertado, para distintos números de resultados.
+
+    python grupo_1/benchmarks/bench_ingesta.py --paginas 25 100
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from servidor_stub import iniciar_servidor
+from cache_sentencias import CacheSentencias
+from motor_descargas import MotorDescargas
+from pipeline_ingesta import ingerir
+
+
+class _Resultado:
+    def __init__(self, n):
+        self.upserted_count = n
+
+
+class ColeccionEnMemoria:
+    """Sustituto mínimo de una colección de pymongo: cuenta los chunks y guarda el tiempo del primer lote"""
+
+    def __init__(self):
+        self.chunks = 0
+        self.primer_lote = None
+
+    def create_index(self, *args, **kwargs):
+        pass
+
+    def bulk_write(self, operaciones, ordered=True):
+        if self.primer_lote is None:
+            self.primer_lote = time.perf_counter()
+        self.chunks += len(operaciones)
+        return _Resultado(len(operaciones))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline de ingesta")
+    parser.add_argument("--paginas", type=int, nargs="+", default=[25, 100])
+    parser.add_argument("--latencia", type=float, default=0.05)
+    args = parser.parse_args()
+
+    for paginas in args.paginas:
+        servidor, enlaces = iniciar_servidor(paginas, args.latencia)
+        with tempfile.TemporaryDirectory() as directorio:
+            cache = CacheSentencias(os.path.join(directorio, "cache.sqlite"))
+            coleccion = ColeccionEnMemoria()
+            with MotorDescargas() as motor:
+                tracemalloc.start()
+                inicio = time.perf_counter()
+                procesadas = ingerir(enlaces, coleccion, 'benchmark', motor=motor, cache=cache)
+                total = time.perf_counter() - inicio
+                _, pico = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            cache.cerrar()
+        servidor.shutdown()
+        print(f"{paginas:4d} páginas: {len(procesadas)} sentencias, {coleccion.chunks} chunks en {total:.2f} s  "
+              f"primer lote a los {coleccion.primer_lote - inicio:.2f} s  memoria pico {pico / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: latencia de la transcripción local (faster-whisper residente en CPU) frente
+a la transcripción en el servicio (FLAC 16 kHz + VAD, subida y servicio simulados con un
+servidor local) sobre grabaciones de prueba. La carga del modelo se mide aparte: solo
+ocurre en la primera transcripción del proceso.
+
+    python grupo_1/benchmarks/bench_transcripcion.py --modelo small --hilos 4 --beam 1
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import requests
+
+from audio_sintetico import escribir_wav
+import transcripcion_local
+from preparar_audio import muestras_para_transcripcion, preparar_audio
+from record_audio import RATE
+from servidor_stub import iniciar_servidor_transcripcion
+
+
+def transcribir_servicio(url, ruta):
+    inicio = time.perf_counter()
+    datos, _, segundos = preparar_audio(ruta, 'flac', True)
+    requests.post(url, data=datos, headers={"X-Segundos-Audio": str(segundos)}).raise_for_status()
+    return time.perf_counter() - inicio
+
+
+def transcribir_local(ruta, beam):
+    inicio = time.perf_counter()
+    _, segundos, _ = transcripcion_local.transcribir_local(muestras_para_transcripcion(ruta, True), tamano_beam=beam)
+    return time.perf_counter() - inicio, segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de transcripción local vs servicio")
+    parser.add_argument("--duraciones", type=float, nargs="+", default=[5, 15, 30])
+    parser.add_argument("--modelo", default=transcripcion_local.MODELO_LOCAL)
+    parser.add_argument("--hilos", type=int, default=transcripcion_local.HILOS)
+    parser.add_argument("--beam", type=int, default=transcripcion_local.TAMANO_BEAM)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--subida-mbps", type=float, default=2.0)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    try:
+        transcripcion_local.obtener_modelo_local(args.modelo, args.hilos)
+        print(f"Modelo local '{args.modelo}' cargado en {time.perf_counter() - inicio:.2f} s "
+              f"(hilos={args.hilos or os.cpu_count()}, beam={args.beam})")
+        local = True
+    except Exception as e:
+        print(f"Modelo local '{args.modelo}' no disponible en este entorno: {str(e).splitlines()[0]}")
+        local = False
+
+    servidor, url = iniciar_servidor_transcripcion(args.subida_mbps)
+    with tempfile.TemporaryDirectory() as directorio:
+        for duracion in args.duraciones:
+            ruta = escribir_wav(os.path.join(directorio, f"voz-{duracion:g}.wav"), duracion, RATE, 1.0, 1.0)
+            t_servicio = min(transcribir_servicio(url, ruta) for _ in range(args.repeticiones))
+            linea = f"{duracion:5g} s de voz   servicio {t_servicio:6.2f} s"
+            if local:
+                t_local, segundos = min(transcribir_local(ruta, args.beam) for _ in range(args.repeticiones))
+                linea += f"   local {t_local:6.2f} s (RTF {t_local / segundos:.2f})"
+            print(linea)
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
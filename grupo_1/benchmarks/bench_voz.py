@@ -0,0 +1,134 @@
+"""
+Benchmark: de la transcripción a las búsquedas terminadas. Compara el flujo anterior
+(esperar la respuesta completa del LLM, json.loads y una búsqueda tras otra) con el
+pipeline en flujo (cada tema lanza su búsqueda apenas se cierra su cadena y las búsquedas
+corren en paralelo). El LLM y las búsquedas se simulan con demoras. También verifica
+el parser incremental con respuestas mal formadas y la caché de temas.
+
+    python grupo_1/benchmarks/bench_voz.py --temas 3 --busqueda 2.0
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from deteccion_temas import CacheTemas, ParserTemas, temas_en_flujo
+from pipeline_voz import buscar_temas, esperar_corpus
+
+# Respuestas del LLM que el parser debe aceptar y los temas esperados
+CASOS_PARSER = [
+    ('{"topics": ["tutela", "salud"]}', ["tutela", "salud"]),
+    ('Claro, aquí tienes:\n```json\n{"topics": ["tutela", "salud"]}\n```\nEspero que sirva.', ["tutela", "salud"]),
+    ('{"reasoning": "x", "topics": ["derecho \\"a la\\" vida", 3, null, "Vida"]}', ['derecho "a la" vida', "Vida"]),
+    ('["pensión", "mínimo vital",]', ["pensión", "mínimo vital"]),
+    ('{"topics": ["debido proceso", "  ", "Debido proceso"', ["debido proceso"]),
+]
+
+
+def respuesta_llm(temas):
+    return "Aquí están los temas:\n" + json.dumps({"topics": temas}, ensure_ascii=False)
+
+
+def completar_simulado(temas, primer_token, tokens_por_segundo):
+    """Imita litellm.acompletion(stream=True): entrega la respuesta de a 4 caracteres"""
+    texto = respuesta_llm(temas)
+
+    async def completar(**llamada):
+        async def flujo():
+            await asyncio.sleep(primer_token)
+            for i in range(0, len(texto), 4):
+                await asyncio.sleep(1 / tokens_por_segundo)
+                delta = types.SimpleNamespace(content=texto[i:i + 4])
+                yield types.SimpleNamespace(choices=[types.SimpleNamespace(delta=delta)])
+        return flujo()
+    return completar
+
+
+class RegistroSimulado:
+    """Imita RegistroCorpus.buscar: cada búsqueda tarda `demora` segundos en un pool de hilos"""
+
+    def __init__(self, demora, max_busquedas=4):
+        self.demora = demora
+        self._executor = ThreadPoolExecutor(max_workers=max_busquedas)
+
+    def buscar(self, tema):
+        corpus = types.SimpleNamespace(termino=tema, chain=None, futuro=None)
+
+        def construir():
+            time.sleep(self.demora)
+            corpus.chain = object()
+        corpus.futuro = self._executor.submit(construir)
+        return corpus
+
+
+async def flujo_anterior(transcripcion, completar, demora):
+    """detect_topic original: concatena el stream, json.loads y luego busca tema por tema"""
+    respuesta = await completar(model="simulado", messages=[], stream=True)
+    mensaje = ""
+    async for chunk in respuesta:
+        mensaje += chunk.choices[0].delta.content
+    temas = json.loads(mensaje[mensaje.index("{"):])["topics"]
+    for _ in temas:
+        await asyncio.to_thread(time.sleep, demora)
+    return temas
+
+
+async def flujo_nuevo(transcripcion, completar, registro):
+    corpus = await buscar_temas(transcripcion, registro, completar=completar, max_temas=10)
+    return [c.termino for c in await esperar_corpus(corpus)]
+
+
+def verificar_parser():
+    for respuesta, esperado in CASOS_PARSER:
+        # Fragmentos de un carácter: el caso más exigente para el parser incremental
+        parser = ParserTemas()
+        temas = [tema for caracter in respuesta for tema in parser.agregar(caracter)]
+        assert temas == esperado, f"{respuesta!r}: {temas} != {esperado}"
+    print(f"Parser incremental: {len(CASOS_PARSER)} respuestas mal formadas interpretadas correctamente")
+
+
+async def medir_cache(completar):
+    cache = CacheTemas()
+    tiempos = []
+    for texto in ("¿Qué dice la Corte sobre la tutela en salud?", "que dice la corte sobre la tutela en salud"):
+        inicio = time.perf_counter()
+        temas = [tema async for tema in temas_en_flujo(texto, cache=cache, completar=completar)]
+        tiempos.append(time.perf_counter() - inicio)
+    print(f"Caché de temas: primera extracción {tiempos[0]:.2f} s, misma pregunta normalizada "
+          f"{tiempos[1] * 1000:.2f} ms ({len(temas)} temas)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline de voz a búsqueda")
+    parser.add_argument("--temas", type=int, default=3)
+    parser.add_argument("--busqueda", type=float, default=2.0, help="segundos por búsqueda")
+    parser.add_argument("--primer-token", type=float, default=0.3)
+    parser.add_argument("--tokens-por-segundo", type=float, default=60)
+    args = parser.parse_args()
+
+    verificar_parser()
+    temas = [f"tema jurídico {i}" for i in range(args.temas)]
+    completar = completar_simulado(temas, args.primer_token, args.tokens_por_segundo)
+    asyncio.run(medir_cache(completar))
+
+    transcripcion = "pregunta dictada"
+    inicio = time.perf_counter()
+    asyncio.run(flujo_anterior(transcripcion, completar, args.busqueda))
+    t_anterior = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    listos = asyncio.run(flujo_nuevo(transcripcion, completar, RegistroSimulado(args.busqueda)))
+    t_nuevo = time.perf_counter() - inicio
+    assert listos == temas
+    print(f"{args.temas} temas, {args.busqueda:g} s por búsqueda: anterior {t_anterior:.2f} s, "
+          f"en flujo y en paralelo {t_nuevo:.2f} s ({t_anterior / t_nuevo:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Prueba de divisor_sentencias.dividir_texto con textos y parámetros aleatorios (incluido
+min_tamano=0 y solapamientos mayores que max_tamano): cada llamada debe terminar, los tramos
+no pueden estar vacíos ni superar max_tamano, avanzan siempre, no mezclan secciones y cubren
+todo el texto que no es espacio en blanco. Incluye el caso que antes no terminaba
+(max_tamano=15, solapamiento=33, min_tamano=0).
+
+    python grupo_1/benchmarks/prueba_divisor.py --casos 2000
+"""
+import argparse
+import random
+import threading
+
+from servidor_stub import PARRAFO
+from divisor_sentencias import _secciones, dividir_texto
+
+ORACIONES = ["La Corte revisa el fallo.", "Se confirma la decisión;", "Hechos: el actor pidió amparo.",
+             "Sin más.", "¿Procede la acción?", PARRAFO]
+ENCABEZADOS = ["I. ANTECEDENTES", "II.- CONSIDERACIONES", "3. Caso concreto", "RESUELVE"]
+
+
+def texto_aleatorio(generador):
+    partes = []
+    for _ in range(generador.randint(0, 60)):
+        if generador.random() < 0.08:
+            partes.append(f"\n{generador.choice(ENCABEZADOS)}\n")
+        else:
+            partes.append(generador.choice(ORACIONES) + generador.choice([" ", "  ", "\n", "\n\n", ""]))
+    return "".join(partes)
+
+
+def tramos_con_limite(texto, parametros, segundos=5):
+    """Lista de tramos de dividir_texto, o None si no termina en `segundos`"""
+    resultado = []
+    hilo = threading.Thread(target=lambda: resultado.extend(dividir_texto(texto, **parametros)), daemon=True)
+    hilo.start()
+    hilo.join(segundos)
+    return None if hilo.is_alive() else resultado
+
+
+def verificar(texto, parametros):
+    tramos = tramos_con_limite(texto, parametros)
+    assert tramos is not None, f"no terminó: {parametros} con {texto!r}"
+    inicios_seccion, _ = _secciones(texto)
+    cubierto = bytearray(len(texto))
+    anterior = -1
+    for inicio, fin, _ in tramos:
+        assert 0 < fin - inicio <= parametros['max_tamano'], f"tramo ({inicio}, {fin}) con {parametros}"
+        assert inicio > anterior, f"el tramo ({inicio}, {fin}) no avanza con {parametros}"
+        assert not any(inicio < s < fin for s in inicios_seccion), f"tramo ({inicio}, {fin}) mezcla secciones"
+        cubierto[inicio:fin] = b"\x01" * (fin - inicio)
+        anterior = inicio
+    faltantes = [i for i, c in enumerate(texto) if not c.isspace() and not cubierto[i]]
+    assert not faltantes, f"caracteres sin cubrir en {faltantes[:5]} con {parametros}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba aleatoria de dividir_texto")
+    parser.add_argument("--casos", type=int, default=2000)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    generador = random.Random(args.semilla)
+    # Regresión: un corte de oración justo en `inicio` con min_tamano=0 dejaba el tramo vacío
+    verificar("Sin más. Hechos: el actor pidió amparo. " * 3, {'max_tamano': 15, 'solapamiento': 33, 'min_tamano': 0})
+    for _ in range(args.casos):
+        parametros = {'max_tamano': generador.randint(1, 120), 'solapamiento': generador.randint(0, 60),
+                      'min_tamano': generador.choice([0, 0, 1, generador.randint(0, 80)])}
+        verificar(texto_aleatorio(generador), parametros)
+    print(f"dividir_texto: {args.casos + 1} casos aleatorios terminan y cumplen los invariantes")
+
+
+if __name__ == "__main__":
+    main()
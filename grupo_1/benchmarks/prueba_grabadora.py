@@ -0,0 +1,84 @@
+"""
+Prueba de AudioRecorder sin micrófono: alimenta el callback con PCM sintético al ritmo
+de la grabación (acelerado) y compara el modo en flujo con el modo en memoria.
+Verifica que el WAV contiene exactamente los bytes entregados y reporta el pico de
+memoria (tracemalloc) y el tiempo que tarda stop_recording.
+
+    python grupo_1/benchmarks/prueba_grabadora.py --segundos 600 --aceleracion 50
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+import tracemalloc
+import wave
+
+from audio_sintetico import bloques_pcm
+from record_audio import AudioRecorder, CHUNK, RATE
+
+
+def grabar(streaming, ruta, segundos, aceleracion):
+    """Graba `segundos` de audio sintético; retorna (sha256 entregado, pico de memoria, segundos de stop)"""
+    grabadora = AudioRecorder(streaming=streaming)
+    grabadora.output_file = ruta
+    entregado = hashlib.sha256()
+    pausa = CHUNK / RATE / aceleracion
+
+    tracemalloc.start()
+    grabadora.preparar_escritura()
+    grabadora.is_recording = True
+    siguiente = time.perf_counter()
+    for bloque in bloques_pcm(segundos, RATE, CHUNK):
+        entregado.update(bloque)
+        grabadora._audio_callback(bloque, CHUNK, None, 0)
+        del bloque
+        # Ritmo del dispositivo: un bloque cada CHUNK / RATE segundos (dividido por la aceleración)
+        siguiente += pausa
+        espera = siguiente - time.perf_counter()
+        if espera > 0:
+            time.sleep(espera)
+    inicio = time.perf_counter()
+    grabadora.stop_recording()
+    t_stop = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    grabadora.cleanup()
+    if grabadora.bloques_perdidos:
+        raise AssertionError(f"se perdieron {grabadora.bloques_perdidos} bloques")
+    return entregado.hexdigest(), pico, t_stop
+
+
+def sha_wav(ruta):
+    """sha256 de las muestras del WAV (leídas por bloques) y su número de frames"""
+    digest = hashlib.sha256()
+    with wave.open(ruta, "rb") as wf:
+        assert (wf.getnchannels(), wf.getsampwidth(), wf.getframerate()) == (1, 2, RATE)
+        while True:
+            datos = wf.readframes(65536)
+            if not datos:
+                break
+            digest.update(datos)
+        return digest.hexdigest(), wf.getnframes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de la grabadora con PCM sintético")
+    parser.add_argument("--segundos", type=float, default=120)
+    parser.add_argument("--aceleracion", type=float, default=20,
+                        help="veces más rápido que el tiempo real al alimentar el callback")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        for streaming, nombre in ((False, "en memoria"), (True, "en flujo")):
+            ruta = os.path.join(directorio, f"grabacion-{int(streaming)}.wav")
+            esperado, pico, t_stop = grabar(streaming, ruta, args.segundos, args.aceleracion)
+            obtenido, frames = sha_wav(ruta)
+            assert obtenido == esperado, f"{nombre}: el WAV no coincide con el audio entregado"
+            assert frames == int(args.segundos * RATE)
+            print(f"{nombre:>10}: {args.segundos:6.0f} s de audio ({os.path.getsize(ruta) / 1e6:6.1f} MB)  "
+                  f"pico de memoria {pico / 1e6:7.2f} MB  stop {t_stop * 1000:7.1f} ms  WAV idéntico")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Servidor HTTP local que imita las páginas de relatoría de la Corte Constitucional.
+Permite medir el scraping sin conexión a internet.
+"""
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Permite importar los módulos de grupo_1/src desde los benchmarks
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+PARRAFO = (
+    "La Sala Plena de la Corte Constitucional, en ejercicio de sus competencias "
+    "constitucionales y legales, profiere la siguiente sentencia. "
+)
+
+
+def pagina_relatoria(sentencia, parrafos=200):
+    """Genera una página estilo Word con el cuerpo en WordSection1 (o Section1)"""
+    clase = "Section1" if sentencia.endswith("0") else "WordSection1"
+    cuerpo = "".join(f"<p class=MsoNormal><span>{sentencia} {i}. {PARRAFO}</span></p>\n"
+                     for i in range(parrafos))
+    return (
+        "<html><head><style>p.MsoNormal {margin:0}</style></head><body lang=ES>"
+        f"<div class={clase}><p><b>Sentencia {sentencia}</b></p>{cuerpo}</div>"
+        "</body></html>"
+    )
+
+
+def sentencias_stub(n):
+    return [f"T-{100 + i}-24" for i in range(n)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    latencia = 0.05
+    paginas = {}
+
+    def do_GET(self):
+        time.sleep(self.latencia)
+        nombre = self.path.rsplit("/", 1)[-1]
+        pagina = self.paginas.get(nombre)
+        if pagina is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        cuerpo = pagina.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def iniciar_servidor(n_paginas=100, latencia=0.05):
+    """Inicia el servidor en un hilo y retorna (servidor, lista de enlaces)"""
+    paginas = {f"{s}.htm": pagina_relatoria(s) for s in sentencias_stub(n_paginas)}
+    handler = type("Handler", (_Handler,), {"latencia": latencia, "paginas": paginas})
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{servidor.server_address[1]}/relatoria/2024"
+    return servidor, [f"{base}/{nombre}" for nombre in paginas]
+
+
+class _HandlerTranscripcion(BaseHTTPRequestHandler):
+    """Imita un servicio de transcripción: recibe el audio a la velocidad de subida indicada
+    y tarda `base + por_segundo * segundos de audio` en responder"""
+    bytes_por_segundo = 250_000
+    base = 0.15
+    por_segundo = 0.01
+
+    def do_POST(self):
+        pendiente = int(self.headers["Content-Length"])
+        while pendiente:
+            bloque = self.rfile.read(min(pendiente, 16384))
+            pendiente -= len(bloque)
+            time.sleep(len(bloque) / self.bytes_por_segundo)
+        time.sleep(self.base + self.por_segundo * float(self.headers.get("X-Segundos-Audio", 0)))
+        cuerpo = b'{"text": "transcripcion"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def iniciar_servidor_transcripcion(subida_mbps=2.0, base=0.15, por_segundo=0.01):
+    """Inicia el servicio de transcripción simulado y retorna (servidor, url)"""
+    handler = type("HandlerTranscripcion", (_HandlerTranscripcion,),
+                   {"bytes_por_segundo": subida_mbps * 1e6 / 8, "base": base, "por_segundo": por_segundo})
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}/transcripcion"
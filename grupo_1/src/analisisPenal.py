@@ -1,171 +1,214 @@
-import pandas as pd
-from langchain_mongodb import MongoDBAtlasVectorSearch
-from langchain_community.document_loaders.mongodb import MongodbLoader
-import nest_asyncio
-from pymongo.mongo_client import MongoClient
 import os
-from dotenv import load_dotenv
-from langchain_nomic import NomicEmbeddings
-import pymongo
-import json
-from bs4 import BeautifulSoup
+import threading
+import time
+from collections import defaultdict
 import requests
-from langchain_openai import OpenAIEmbeddings
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
-from langchain_ollama import ChatOllama
-from langchain_groq import ChatGroq
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+from motor_descargas import obtener_motor
+from cache_embeddings import EmbeddingsConCache
+from pipeline_ingesta import ingerir
+from cache_respuestas import CacheRespuestas, ChainConCache
+from proveedores import crear_embeddings, crear_llm
 
+# Las integraciones pesadas (proveedores de LLM y embeddings, Atlas Vector Search, prompts y
+# runnables de LangChain, BeautifulSoup, el índice local) y el cliente de MongoDB se importan
+# y crean la primera vez que se usan.
 
 load_dotenv()
 os.environ["USER_AGENT"] = "MyApp/1.0"
-os.environ["OPENAI_API_KEY"] = os.getenv('OPENAI_API_KEY')
-os.environ["LANGCHAIN_API_KEY"] = os.getenv('LANGCHAIN_API_KEY')
-os.environ["GROQ_API_KEY"] = os.getenv('GROQ_API_KEY')
-client = pymongo.MongoClient(os.environ['MONGODB_URI'])
-collections = client.get_database(os.environ['MONGODB_DB']).get_collection(os.environ['MONGODB_COLLECTION'])
 
-# Función para realizar scraping y guardar resultados
-def scraping_sentencias(termino_de_busqueda):
-    # Construir la URL para la búsqueda
-    termino_de_busqueda = termino_de_busqueda.replace(' ', '+')
-    URL = 'https://www.corteconstitucional.gov.co/relatoria/buscador_new/?searchOption=texto&fini=1992-01-01&ffin=2024-10-29&buscar_por='+ termino_de_busqueda +'&accion=search&verform=si&slop=1&volver_a=relatoria&qu=625&maxprov=100&OrderbyOption=des__score'
+# Número de chunks que se envían juntos al modelo de embeddings
+TAMANO_LOTE_EMBEDDINGS = 256
 
-    # Realizar la solicitud GET a la página
-    response = requests.get(URL)
+# Backend del retriever: 'atlas' (MongoDB Atlas Vector Search) o 'local' (índice en proceso)
+RETRIEVER_BACKEND = os.getenv('RETRIEVER_BACKEND', 'atlas')
 
-    # Verificar si la solicitud fue exitosa
-    if response.status_code == 200:
-        # Parsear el contenido HTML con BeautifulSoup
-        soup = BeautifulSoup(response.content, 'html.parser')
+# Fusionar la búsqueda vectorial con el índice léxico BM25 (indice_bm25.py)
+RETRIEVER_HIBRIDO = os.getenv('RETRIEVER_HIBRIDO', '1') == '1'
 
-        # Encontrar todas las etiquetas 'a' con atributo 'href'
-        enlaces = [a['href'] for a in soup.find_all('a', href=True)]
-    else:
-        print(f"Error al acceder a la página: {response.status_code}")
+# Exportar también los textos descargados a sentencias_<termino>.jsonl
+EXPORTAR_JSONL = os.getenv('EXPORTAR_JSONL', '0') == '1'
 
-    # crear una lista con los enlaces obtenidos anteriormente
+# Versión del corpus de cada término: cambia cada vez que una búsqueda o clear_collection lo modifican
+_versiones_corpus = defaultdict(int)
+_coleccion = None
+_embeddings = None
+_recursos_lock = threading.Lock()
 
-    lista_enlaces = []
 
-    # Encontrar todas las etiquetas 'a' con atributo 'href'
-    for a in soup.find_all('a', href=True):
-        lista_enlaces.append(a['href'])
+def clave_termino(termino_de_busqueda):
+    """Clave con la que se identifica el corpus de un término de búsqueda"""
+    return ' '.join(termino_de_busqueda.lower().split())
 
 
-    # filtrar lista_enlaces y coger solo los enlaces contengan la palabra relatoria
+def version_corpus(termino):
+    return _versiones_corpus[termino]
 
-    enlaces_relatoria = [enlace for enlace in lista_enlaces if 'relatoria' in enlace]
-    enlaces_relatoria = [enlace for enlace in enlaces_relatoria if len(enlace) > 49]
-
-    # Imprimir la lista de enlaces filtrados
-    enlaces_relatoria
-
-    # diccionario_relatorias
-    diccionario_relatorias = {}
 
-    for enlace in enlaces_relatoria:
-        try:
-            nota = requests.get(enlace)
-            nota.raise_for_status()  # Verifica si hubo algún problema con la respuesta HTTP
-            s_nota = BeautifulSoup(nota.text, 'html.parser')
-            texto = (s_nota.find('div', attrs={'class': 'WordSection1'}).text).strip()
-            diccionario_relatorias[enlace] = texto
-        except requests.exceptions.RequestException as e:
-            print(f"Error al solicitar el enlace {enlace}: {e}")
-        except AttributeError:
-            try:
-                # Si no encuentra 'WordSection1', intenta con 'Section1'
-                texto = (s_nota.find('div', attrs={'class': 'Section1'}).text).strip()
-                diccionario_relatorias[enlace] = texto
-            except AttributeError as e:
-                print(f"Error procesando el contenido del enlace {enlace}: {e}")
+def _nueva_version_corpus(termino=None):
+    if termino is None:
+        for clave in list(_versiones_corpus):
+            _versiones_corpus[clave] += 1
+    else:
+        _versiones_corpus[termino] += 1
 
-    diccionario_relatorias
 
-    # convertir el diccionario en un df de pandas
+def obtener_coleccion():
+    """Colección de MongoDB con los chunks; el cliente se conecta en el primer uso"""
+    global _coleccion
+    with _recursos_lock:
+        if _coleccion is None:
+            import pymongo
+            client = pymongo.MongoClient(os.environ['MONGODB_URI'])
+            _coleccion = client.get_database(os.environ['MONGODB_DB']).get_collection(os.environ['MONGODB_COLLECTION'])
+        return _coleccion
 
-    df = pd.DataFrame(list(diccionario_relatorias.items()), columns=['Enlace', 'Texto'])
 
-    df['Sentencia'] = df['Enlace'].str.split('/relatoria/').str[-1].str.split('.htm').str[0]
+def obtener_coleccion_corpus():
+    """Colección con una marca por término cuyo corpus terminó de ingerirse (junto a la de los chunks)"""
+    return obtener_coleccion().database.get_collection(os.environ['MONGODB_COLLECTION'] + '_corpus')
 
-    # Reorganizar el DataFrame
-    df = df[['Sentencia', 'Texto']]  # Selecciona las columnas en el orden deseado
 
-    # exportar el df en formato JSON Lines
+def obtener_embeddings():
+    """Modelo de embeddings compartido, con caché persistente: los pasajes repetidos se calculan una sola vez"""
+    global _embeddings
+    with _recursos_lock:
+        if _embeddings is None:
+            modelo, espacio = crear_embeddings()
+            _embeddings = EmbeddingsConCache(modelo, espacio=espacio)
+        return _embeddings
 
-    nombre_json = ('sentencias_' + termino_de_busqueda).replace('+', '_') + '.jsonl'
-    # Assuming df is your DataFrame
-    df.to_json(nombre_json, orient='records', lines=True)
+# Función para realizar scraping y guardar resultados
+def scraping_sentencias(termino_de_busqueda, progreso=None):
+    # Los chunks quedan marcados con la clave del término para separar los corpus de cada búsqueda
+    termino = clave_termino(termino_de_busqueda)
 
-    # Leer el archivo JSON Lines y cargar los documentos
-    with open(nombre_json, 'r') as f:
-        docs_to_insert = [json.loads(line) for line in f]
+    # Construir la URL para la búsqueda
+    termino_de_busqueda = termino_de_busqueda.replace(' ', '+')
+    URL = 'https://www.corteconstitucional.gov.co/relatoria/buscador_new/?searchOption=texto&fini=1992-01-01&ffin=2024-10-29&buscar_por='+ termino_de_busqueda +'&accion=search&verform=si&slop=1&volver_a=relatoria&qu=625&maxprov=100&OrderbyOption=des__score'
 
-    # Splitting 
+    # Motor de descargas compartido (pool de hilos sobre una sesión keep-alive)
+    motor = obtener_motor()
 
-    from langchain.text_splitter import CharacterTextSplitter
-    from langchain.docstore.document import Document
+    # Descargar la página de resultados con los reintentos y el backoff del motor (429, 5xx, timeouts)
+    try:
+        response = motor.descargar(URL)
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"Error al acceder a la página de búsqueda: {e}") from e
 
-    docs_to_insert = [
-        Document(page_content=doc['Texto'], metadata={'sentencia': doc['Sentencia']})
-        for doc in docs_to_insert
-    ]
+    # Parsear el contenido HTML con BeautifulSoup y tomar los enlaces de todas las etiquetas 'a'
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(response.content, 'html.parser')
+    lista_enlaces = [a['href'] for a in soup.find_all('a', href=True)]
 
-    def custom_split(text, max_size=1000):
-        chunks = []
-        while len(text) > max_size:
-            chunk = text[:max_size]
-            chunks.append(chunk)
-            text = text[max_size:]
-        if text:
-            chunks.append(text)
-        return chunks
+    # filtrar lista_enlaces y coger solo los enlaces contengan la palabra relatoria
 
-    docs_splits = []
-    for doc in docs_to_insert:
-        chunks = custom_split(doc.page_content)
-        for chunk in chunks:
-            docs_splits.append(Document(page_content=chunk, metadata=doc.metadata))
-    docs_splits_dict = [doc.dict() for doc in docs_splits]
+    enlaces_relatoria = [enlace for enlace in lista_enlaces if 'relatoria' in enlace]
+    enlaces_relatoria = [enlace for enlace in enlaces_relatoria if len(enlace) > 49]
 
-    collections.insert_many(docs_splits_dict)
+    # Pipeline en flujo hacia MongoDB; el archivo JSON Lines es opcional (EXPORTAR_JSONL=1)
+    nombre_json = None
+    if EXPORTAR_JSONL:
+        nombre_json = ('sentencias_' + termino_de_busqueda).replace('+', '_') + '.jsonl'
+
+    # El índice BM25 del término se actualiza con cada lote insertado
+    al_insertar = None
+    if RETRIEVER_HIBRIDO:
+        from indice_bm25 import obtener_indice_bm25
+        al_insertar = obtener_indice_bm25(termino).agregar
+
+    procesadas = ingerir(enlaces_relatoria, obtener_coleccion(), termino, nombre_json=nombre_json, motor=motor,
+                         progreso=progreso, al_insertar=al_insertar)
+    # Solo una ingesta que termina marca el corpus: una cancelada o fallida deja chunks parciales
+    obtener_coleccion_corpus().update_one({'_id': termino}, {'$set': {'completo': time.time()}}, upsert=True)
+    _nueva_version_corpus(termino)
+    return procesadas
+
+def corpus_existente(termino):
+    """Indica si el corpus del término ya se ingirió completo (por este u otro proceso)"""
+    return obtener_coleccion_corpus().count_documents({'_id': termino}, limit=1) > 0
+
+def indexar_pendientes(embeddings, termino, tamano_lote=TAMANO_LOTE_EMBEDDINGS, max_lotes=None, progreso=None):
+    """
+    Calcula el embedding solo de los chunks del término que aún no lo tienen, por lotes
+    (a lo sumo max_lotes si se indica). Retorna el número de chunks indexados.
+    """
+    collections = obtener_coleccion()
+    indexados = 0
+    lotes = 0
+    filtro = {'terminos': termino, 'embedding': {'$exists': False}}
+    while max_lotes is None or lotes < max_lotes:
+        if progreso is not None:
+            progreso.verificar()
+        lote = list(collections.find(filtro, {'page_content': 1}).limit(tamano_lote))
+        if not lote:
+            break
+        vectores = embeddings.embed_documents([doc['page_content'] for doc in lote])
+        collections.bulk_write(
+            [UpdateOne({'_id': doc['_id']}, {'$set': {'embedding': vector}}) for doc, vector in zip(lote, vectores)],
+            ordered=False
+        )
+        indexados += len(lote)
+        lotes += 1
+        # El corpus consultable cambió: las respuestas en caché dejan de ser válidas
+        _nueva_version_corpus(termino)
+        if progreso is not None:
+            progreso.chunks_indexados += len(lote)
+    return indexados
 
 # Conficuración de la conexión con MongoDB Atlas
-def configurar_modelo():
+def configurar_modelo(termino, indexar=True):
+
+    import nest_asyncio
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.runnables import RunnablePassthrough
 
     nest_asyncio.apply()
     load_dotenv()
 
-    if collections.count_documents({}) == 0:
+    collections = obtener_coleccion()
+    if collections.count_documents({'terminos': termino}, limit=1) == 0:
         raise ValueError("No hay documentos en la base de datos. Por favor, realice una búsqueda primero.")
 
-    loader = MongodbLoader(
-        connection_string=os.environ['MONGODB_URI'],
-        db_name=os.environ['MONGODB_DB'],
-        collection_name=os.environ['MONGODB_COLLECTION'],
-        filter_criteria={},
-        field_names=["metadata", "page_content"],
-    )
-    docs = loader.load()
+    embeddings = obtener_embeddings()
 
-    if not docs:
-        raise ValueError("No se encontraron documentos en la base de datos.")
+    # Indexar únicamente los chunks nuevos y abrir el índice existente sin recargar la colección
+    if indexar:
+        indexar_pendientes(embeddings, termino)
 
-    # Insertar documentos en la base de datos
-    
-    embeddings = OpenAIEmbeddings(model="text-embedding-ada-002")
+    # Con el retriever híbrido cada búsqueda aporta CANDIDATOS resultados a la fusión;
+    # sin él, el retriever vectorial entrega directamente los K_RETRIEVER chunks del contexto
+    from indice_bm25 import CANDIDATOS, K_RETRIEVER
+    k_vectorial = CANDIDATOS if RETRIEVER_HIBRIDO else K_RETRIEVER
 
-    vectorStore = MongoDBAtlasVectorSearch.from_documents( 
-        documents= docs,
-        embedding= embeddings, 
-        collection= collections,
-        index_name=os.environ['MONGODB_VECTOR_INDEX']
-    )
-
-    retriever = vectorStore.as_retriever(search_kwargs={"similarity_threshold": 0.1})
+    # Backend del retriever según la configuración: 'atlas' (por defecto) o 'local'
+    if RETRIEVER_BACKEND == 'local':
+        from indice_local import obtener_indice_local, RetrieverLocal
+        indice = obtener_indice_local(termino)
+        indice.sincronizar(collections, {'terminos': termino})
+        retriever = RetrieverLocal(indice=indice, embeddings=embeddings, k=k_vectorial)
+    else:
+        from langchain_mongodb import MongoDBAtlasVectorSearch
+        vectorStore = MongoDBAtlasVectorSearch(
+            collection=collections,
+            embedding=embeddings,
+            index_name=os.environ['MONGODB_VECTOR_INDEX'],
+            text_key='page_content',
+            embedding_key='embedding'
+        )
+
+        # El índice de Atlas debe declarar 'terminos' como campo de filtro
+        retriever = vectorStore.as_retriever(
+            search_kwargs={"k": k_vectorial, "similarity_threshold": 0.1, "pre_filter": {"terminos": {"$eq": termino}}}
+        )
+
+    if RETRIEVER_HIBRIDO:
+        from indice_bm25 import obtener_indice_bm25, RetrieverHibrido
+        indice_lexico = obtener_indice_bm25(termino)
+        indice_lexico.sincronizar(collections, {'terminos': termino})
+        retriever = RetrieverHibrido(vectorial=retriever, lexico=indice_lexico)
 
 
     template = """Quiero un análisis jurídico profesional sobre los derechos fundamentales amenazados o dañados que se debaten en la Corte Constitucional de Colombia. Es importante conocer los hechos de acuerdo a las circunstancias de modo, el tiempo con las fechas y hora, el lugar
@@ -176,11 +219,8 @@ def configurar_modelo():
     """
     prompt = ChatPromptTemplate.from_template(template)
 
-    #model = ChatOpenAI(temperature=0, model="gpt-4o")
-    model = ChatGroq(temperature=0, model="llama-3.1-70b-versatile")
-    # Local LLM
-    ollama_llm = "phi3.5"
-    model_local = ChatOllama(model=ollama_llm)
+    # LLM según LLM_PROVEEDOR / LLM_MODELO ('groq' por defecto; 'openai' u 'ollama' para el modelo local)
+    model = crear_llm()
 
     chain = (
         {"context": retriever, "question": RunnablePassthrough()}
@@ -192,13 +232,37 @@ def configurar_modelo():
     return chain
 chain = None
 
-def initialize_chain():
+def initialize_chain(termino, indexar=True):
     try:
-        chain = configurar_modelo()
-        return chain
+        chain = configurar_modelo(termino, indexar)
+        # Las respuestas se reutilizan mientras no cambie el corpus del término
+        return ChainConCache(chain, CacheRespuestas(), lambda: version_corpus(termino), obtener_embeddings())
     except Exception as e:
         raise Exception(f"Error al iniciar el chain: {e}")
 
 
-def clear_collection():
-    collections.delete_many({})
\ No newline at end of file
+def clear_collection(termino=None):
+    """Elimina el corpus de un término (los chunks compartidos con otros términos se conservan) o toda la colección"""
+    collections = obtener_coleccion()
+    if termino is None:
+        collections.delete_many({})
+        obtener_coleccion_corpus().delete_many({})
+    else:
+        collections.update_many({'terminos': termino}, {'$pull': {'terminos': termino}})
+        collections.delete_many({'terminos': {'$size': 0}})
+        obtener_coleccion_corpus().delete_one({'_id': termino})
+    _nueva_version_corpus(termino)
+    if termino is None:
+        # Toda la colección: también los índices de términos que este proceso no ha visto
+        # (p. ej. de antes de reiniciar), que sincronizar no quitaría
+        from indice_local import limpiar_indices as limpiar_indices_locales
+        from indice_bm25 import limpiar_indices as limpiar_indices_bm25
+        limpiar_indices_locales()
+        limpiar_indices_bm25()
+        return
+    if RETRIEVER_BACKEND == 'local':
+        from indice_local import obtener_indice_local
+        obtener_indice_local(termino).limpiar()
+    if RETRIEVER_HIBRIDO:
+        from indice_bm25 import obtener_indice_bm25
+        obtener_indice_bm25(termino).limpiar()
\ No newline at end of file
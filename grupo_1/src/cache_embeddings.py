@@ -0,0 +1,123 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.embeddings import Embeddings
+
+# Configuración de la caché de embeddings
+# Por defecto en la caché del usuario, fuera del repositorio y del directorio de trabajo
+RUTA_CACHE = os.getenv('CACHE_EMBEDDINGS_RUTA') or os.path.join(
+    os.getenv('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'analisis_penal', 'cache_embeddings.sqlite')
+MAX_ENTRADAS = int(os.getenv('CACHE_EMBEDDINGS_MAX_ENTRADAS', 200000))
+TAMANO_LOTE = int(os.getenv('CACHE_EMBEDDINGS_TAMANO_LOTE', 256))
+MAX_CONCURRENCIA = int(os.getenv('CACHE_EMBEDDINGS_CONCURRENCIA', 4))
+
+
+class EmbeddingsConCache(Embeddings):
+    """
+    Envuelve un modelo de embeddings con una caché persistente hash -> vector.
+    Elimina textos repetidos dentro de cada llamada, envía los faltantes en lotes
+    con concurrencia acotada y desaloja las entradas menos usadas (LRU).
+    """
+
+    def __init__(self, modelo, espacio, ruta=RUTA_CACHE, max_entradas=MAX_ENTRADAS,
+                 tamano_lote=TAMANO_LOTE, max_concurrencia=MAX_CONCURRENCIA):
+        self.modelo = modelo
+        self.espacio = espacio  # nombre del modelo: evita mezclar vectores de modelos distintos
+        self.max_entradas = max_entradas
+        self.tamano_lote = tamano_lote
+        self.max_concurrencia = max_concurrencia
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        self._conn = sqlite3.connect(ruta, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            '''CREATE TABLE IF NOT EXISTS embeddings (
+                   clave TEXT PRIMARY KEY,
+                   vector BLOB NOT NULL,
+                   accedido REAL NOT NULL
+               )'''
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_accedido ON embeddings (accedido)')
+        self._conn.commit()
+
+    def _clave(self, texto):
+        return hashlib.sha256((self.espacio + '\x00' + texto).encode('utf-8')).hexdigest()
+
+    def _leer(self, claves):
+        encontrados = {}
+        with self._lock:
+            for inicio in range(0, len(claves), 500):
+                bloque = claves[inicio:inicio + 500]
+                marcas = ','.join('?' * len(bloque))
+                for clave, blob in self._conn.execute(
+                    f'SELECT clave, vector FROM embeddings WHERE clave IN ({marcas})', bloque
+                ):
+                    vector = array('f')
+                    vector.frombytes(blob)
+                    encontrados[clave] = vector.tolist()
+            if encontrados:
+                ahora = time.time()
+                self._conn.executemany('UPDATE embeddings SET accedido = ? WHERE clave = ?',
+                                       [(ahora, clave) for clave in encontrados])
+                self._conn.commit()
+        return encontrados
+
+    def _guardar(self, vectores):
+        ahora = time.time()
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)',
+                [(clave, array('f', vector).tobytes(), ahora) for clave, vector in vectores.items()]
+            )
+            self._desalojar()
+            self._conn.commit()
+
+    def _desalojar(self):
+        """Elimina las entradas menos usadas recientemente si se supera max_entradas"""
+        total = self._conn.execute('SELECT COUNT(*) FROM embeddings').fetchone()[0]
+        if total > self.max_entradas:
+            self._conn.execute(
+                'DELETE FROM embeddings WHERE clave IN '
+                '(SELECT clave FROM embeddings ORDER BY accedido LIMIT ?)',
+                (total - self.max_entradas,)
+            )
+
+    def embed_documents(self, texts):
+        # Deduplicar: cada texto distinto se busca y se envía una sola vez
+        claves = [self._clave(texto) for texto in texts]
+        unicos = dict(zip(claves, texts))
+        vectores = self._leer(list(unicos))
+        faltantes = [clave for clave in unicos if clave not in vectores]
+        self.aciertos += len(unicos) - len(faltantes)
+        self.fallos += len(faltantes)
+
+        if faltantes:
+            lotes = [faltantes[i:i + self.tamano_lote] for i in range(0, len(faltantes), self.tamano_lote)]
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrencia, len(lotes))) as executor:
+                resultados = executor.map(
+                    lambda lote: self.modelo.embed_documents([unicos[clave] for clave in lote]), lotes
+                )
+                for lote, vectores_lote in zip(lotes, resultados):
+                    nuevos = dict(zip(lote, vectores_lote))
+                    self._guardar(nuevos)
+                    vectores.update(nuevos)
+
+        return [vectores[clave] for clave in claves]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    def tasa_aciertos(self):
+        total = self.aciertos + self.fallos
+        return self.aciertos / total if total else 0.0
+
+    def cerrar(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,137 @@
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+# Configuración de la caché de respuestas
+MAX_ENTRADAS = int(os.getenv('CACHE_RESPUESTAS_MAX_ENTRADAS', 256))
+TTL = int(os.getenv('CACHE_RESPUESTAS_TTL', 3600))  # segundos
+# Similitud coseno mínima para reutilizar la respuesta de una pregunta parecida (vacío = solo exacta)
+UMBRAL_SIMILITUD = float(os.getenv('CACHE_RESPUESTAS_UMBRAL') or 0) or None
+
+
+def normalizar_pregunta(pregunta):
+    """Minúsculas, sin tildes, sin signos de puntuación y con espacios simples"""
+    texto = unicodedata.normalize('NFKD', pregunta.lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r'[^\w\s]', ' ', texto)
+    return ' '.join(texto.split())
+
+
+class CacheRespuestas:
+    """
+    Caché de respuestas por (versión del corpus, pregunta normalizada) con TTL y desalojo LRU.
+    Opcionalmente reutiliza la respuesta de una pregunta con embedding muy similar.
+    Al cambiar la versión del corpus las entradas anteriores dejan de ser válidas.
+    """
+
+    def __init__(self, max_entradas=MAX_ENTRADAS, ttl=TTL, umbral_similitud=UMBRAL_SIMILITUD):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.umbral_similitud = umbral_similitud
+        self._entradas = OrderedDict()  # (version, pregunta) -> (respuesta, creada, vector)
+        self._version = None
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def _invalidar_si_cambio(self, version):
+        if version != self._version:
+            self._entradas.clear()
+            self._version = version
+
+    def obtener(self, version, pregunta, vector=None):
+        """Retorna la respuesta guardada o None"""
+        clave = (version, normalizar_pregunta(pregunta))
+        ahora = time.time()
+        with self._lock:
+            self._invalidar_si_cambio(version)
+            entrada = self._entradas.get(clave)
+            if entrada is None and vector is not None and self.umbral_similitud:
+                entrada, clave = self._mas_similar(vector)
+            if entrada is None or ahora - entrada[1] > self.ttl:
+                if entrada is not None:
+                    del self._entradas[clave]
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[0]
+
+    def _mas_similar(self, vector):
+        candidatos = [(clave, entrada) for clave, entrada in self._entradas.items() if entrada[2] is not None]
+        if not candidatos:
+            return None, None
+        consulta = np.asarray(vector, dtype=np.float32)
+        consulta /= max(float(np.linalg.norm(consulta)), 1e-12)
+        similitudes = np.stack([entrada[2] for _, entrada in candidatos]) @ consulta
+        mejor = int(np.argmax(similitudes))
+        if similitudes[mejor] < self.umbral_similitud:
+            return None, None
+        clave, entrada = candidatos[mejor]
+        return entrada, clave
+
+    def guardar(self, version, pregunta, respuesta, vector=None):
+        if vector is not None:
+            vector = np.asarray(vector, dtype=np.float32)
+            vector /= max(float(np.linalg.norm(vector)), 1e-12)
+        with self._lock:
+            self._invalidar_si_cambio(version)
+            clave = (version, normalizar_pregunta(pregunta))
+            self._entradas[clave] = (respuesta, time.time(), vector)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+
+class ChainConCache:
+    """
+    Envuelve el chain de análisis con la caché de respuestas. Expone invoke y stream;
+    una respuesta en caché se entrega completa en un solo fragmento.
+    """
+
+    def __init__(self, chain, cache, obtener_version, embeddings=None):
+        self.chain = chain
+        self.cache = cache
+        self.obtener_version = obtener_version
+        # Solo se calcula el embedding de la pregunta si la caché usa similitud
+        self.embeddings = embeddings if cache.umbral_similitud else None
+
+    def _vector(self, pregunta):
+        return self.embeddings.embed_query(pregunta) if self.embeddings is not None else None
+
+    def invoke(self, pregunta):
+        version = self.obtener_version()
+        vector = self._vector(pregunta)
+        respuesta = self.cache.obtener(version, pregunta, vector)
+        if respuesta is None:
+            respuesta = self.chain.invoke(pregunta)
+            self.cache.guardar(version, pregunta, respuesta, vector)
+        return respuesta
+
+    def stream(self, pregunta):
+        version = self.obtener_version()
+        vector = self._vector(pregunta)
+        respuesta = self.cache.obtener(version, pregunta, vector)
+        if respuesta is not None:
+            yield respuesta
+            return
+        partes = []
+        flujo = self.chain.stream(pregunta)
+        try:
+            for fragmento in flujo:
+                partes.append(fragmento)
+                yield fragmento
+        finally:
+            flujo.close()
+        # Solo se guardan respuestas completas (no las interrumpidas)
+        self.cache.guardar(version, pregunta, ''.join(partes), vector)
+
@@ -0,0 +1,136 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+# Configuración de la caché en disco
+# Por defecto en la caché del usuario, fuera del repositorio y del directorio de trabajo
+RUTA_CACHE = os.getenv('CACHE_SENTENCIAS_RUTA') or os.path.join(
+    os.getenv('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'analisis_penal', 'cache_sentencias.sqlite')
+MAX_BYTES = int(os.getenv('CACHE_SENTENCIAS_MAX_BYTES', 200 * 1024 * 1024))
+MAX_EDAD = int(os.getenv('CACHE_SENTENCIAS_MAX_EDAD', 30 * 24 * 3600))  # segundos
+FRESCURA = int(os.getenv('CACHE_SENTENCIAS_FRESCURA', 24 * 3600))  # segundos sin revalidar
+
+Entrada = namedtuple('Entrada', ['sentencia', 'texto', 'etag', 'last_modified', 'validado', 'fresca'])
+
+
+def sentencia_de_enlace(enlace):
+    """Deriva el identificador de la sentencia a partir del enlace (igual que la columna 'Sentencia')"""
+    return enlace.split('/relatoria/')[-1].split('.htm')[0]
+
+
+def validadores(entrada):
+    """Encabezados para una petición condicional (ETag / Last-Modified)"""
+    headers = {}
+    if entrada.etag:
+        headers['If-None-Match'] = entrada.etag
+    if entrada.last_modified:
+        headers['If-Modified-Since'] = entrada.last_modified
+    return headers
+
+
+class CacheSentencias:
+    """
+    Caché persistente (SQLite) del texto extraído de cada sentencia.
+    Las entradas recientes se usan sin tocar la red; las más antiguas se revalidan
+    con ETag/Last-Modified y las que superan MAX_EDAD o MAX_BYTES se desalojan.
+    """
+
+    def __init__(self, ruta=RUTA_CACHE, max_bytes=MAX_BYTES, max_edad=MAX_EDAD, frescura=FRESCURA):
+        self.max_bytes = max_bytes
+        self.max_edad = max_edad
+        self.frescura = frescura
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        self._conn = sqlite3.connect(ruta, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            '''CREATE TABLE IF NOT EXISTS sentencias (
+                   sentencia TEXT PRIMARY KEY,
+                   texto TEXT NOT NULL,
+                   etag TEXT,
+                   last_modified TEXT,
+                   tamano INTEGER NOT NULL,
+                   validado REAL NOT NULL,
+                   accedido REAL NOT NULL
+               )'''
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_accedido ON sentencias (accedido)')
+        self._conn.commit()
+
+    def obtener(self, sentencia):
+        """Retorna la Entrada de la sentencia o None si no está (o expiró)"""
+        ahora = time.time()
+        with self._lock:
+            fila = self._conn.execute(
+                'SELECT texto, etag, last_modified, validado FROM sentencias WHERE sentencia = ?',
+                (sentencia,)
+            ).fetchone()
+            if fila is None:
+                return None
+            texto, etag, last_modified, validado = fila
+            if ahora - validado > self.max_edad:
+                self._conn.execute('DELETE FROM sentencias WHERE sentencia = ?', (sentencia,))
+                self._conn.commit()
+                return None
+            self._conn.execute('UPDATE sentencias SET accedido = ? WHERE sentencia = ?', (ahora, sentencia))
+            self._conn.commit()
+        return Entrada(sentencia, texto, etag, last_modified, validado, ahora - validado <= self.frescura)
+
+    def guardar(self, sentencia, texto, etag=None, last_modified=None):
+        """Guarda (o reemplaza) el texto de la sentencia y sus validadores HTTP"""
+        ahora = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO sentencias VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (sentencia, texto, etag, last_modified, len(texto.encode('utf-8')), ahora, ahora)
+            )
+            self._desalojar()
+            self._conn.commit()
+
+    def revalidar(self, sentencia):
+        """Marca la entrada como vigente tras una respuesta 304 Not Modified"""
+        ahora = time.time()
+        with self._lock:
+            self._conn.execute(
+                'UPDATE sentencias SET validado = ?, accedido = ? WHERE sentencia = ?',
+                (ahora, ahora, sentencia)
+            )
+            self._conn.commit()
+
+    def _desalojar(self):
+        """Elimina entradas expiradas y, si se supera MAX_BYTES, las menos usadas recientemente"""
+        self._conn.execute('DELETE FROM sentencias WHERE validado < ?', (time.time() - self.max_edad,))
+        total = self._conn.execute('SELECT COALESCE(SUM(tamano), 0) FROM sentencias').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for sentencia, tamano in self._conn.execute(
+            'SELECT sentencia, tamano FROM sentencias ORDER BY accedido'
+        ).fetchall():
+            self._conn.execute('DELETE FROM sentencias WHERE sentencia = ?', (sentencia,))
+            total -= tamano
+            if total <= self.max_bytes:
+                break
+
+    def limpiar(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM sentencias')
+            self._conn.commit()
+
+    def cerrar(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def obtener_cache():
+    """Retorna la caché compartida del proceso"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheSentencias()
+        return _cache
@@ -0,0 +1,121 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from analisisPenal import (clave_termino, corpus_existente, indexar_pendientes, initialize_chain,
+                           obtener_embeddings, scraping_sentencias)
+from pipeline_ingesta import BusquedaCancelada, Progreso
+
+# Búsquedas que se ejecutan a la vez en segundo plano (las demás esperan en cola)
+MAX_BUSQUEDAS_SIMULTANEAS = int(os.getenv('MAX_BUSQUEDAS_SIMULTANEAS', 2))
+# Espera del indexador cuando aún no hay chunks nuevos (segundos)
+ESPERA_INDEXADOR = 0.5
+
+logger = logging.getLogger(__name__)
+
+
+class Corpus:
+    """Corpus de un término de búsqueda, su trabajo en segundo plano y el chain construido sobre él"""
+
+    def __init__(self, termino):
+        self.termino = termino
+        self.chain = None
+        self.sentencias = {}
+        self.creado = None
+        self.progreso = Progreso()
+        self.futuro = None
+
+    @property
+    def en_curso(self):
+        return self.futuro is not None and not self.futuro.done()
+
+
+class RegistroCorpus:
+    """
+    Registro de corpus compartido por todas las sesiones del proceso.
+    Cada búsqueda corre como un trabajo en un pool de hilos: la interfaz consulta su
+    progreso y puede cancelarlo. Un término que ya está construido o en construcción
+    no se vuelve a buscar; las sesiones se conectan al mismo Corpus. El chain queda
+    disponible apenas se indexa el primer lote de chunks.
+    """
+
+    def __init__(self, max_busquedas=MAX_BUSQUEDAS_SIMULTANEAS):
+        self._corpus = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_busquedas, thread_name_prefix='busqueda')
+
+    def buscar(self, termino_de_busqueda, actualizar=False):
+        """Lanza (o reutiliza) el trabajo de búsqueda del término y retorna su Corpus de inmediato"""
+        termino = clave_termino(termino_de_busqueda)
+        with self._lock:
+            corpus = self._corpus.setdefault(termino, Corpus(termino))
+            if corpus.en_curso:
+                return corpus
+            if corpus.chain is not None and corpus.progreso.estado == 'listo' and not actualizar:
+                return corpus
+            corpus.progreso = Progreso()
+            corpus.futuro = self._executor.submit(self._construir, corpus, termino_de_busqueda, actualizar)
+        return corpus
+
+    def obtener(self, termino):
+        """Retorna el Corpus del término (clave normalizada) o None si nunca se buscó"""
+        with self._lock:
+            return self._corpus.get(termino)
+
+    def cancelar(self, termino):
+        corpus = self.obtener(termino)
+        if corpus is not None and corpus.en_curso:
+            corpus.progreso.cancelar()
+
+    def terminos(self):
+        with self._lock:
+            return [termino for termino, corpus in self._corpus.items() if corpus.chain is not None]
+
+    def _construir(self, corpus, termino_de_busqueda, actualizar):
+        progreso = corpus.progreso
+        try:
+            # Si el corpus ya se ingirió completo (p. ej. en otro proceso) no se repite el scraping; uno
+            # cancelado o fallido no tiene la marca y se vuelve a descargar (las sentencias ya
+            # ingeridas salen de la caché y los chunks repetidos no se duplican)
+            if actualizar or not corpus_existente(corpus.termino):
+                progreso.estado = 'descargando'
+                terminado = threading.Event()
+                indexador = threading.Thread(target=self._indexar_mientras, args=(corpus, terminado), daemon=True)
+                indexador.start()
+                try:
+                    corpus.sentencias = scraping_sentencias(termino_de_busqueda, progreso)
+                finally:
+                    terminado.set()
+                    indexador.join()
+
+            # Indexar lo que falte y publicar el chain definitivo
+            progreso.estado = 'indexando'
+            indexar_pendientes(obtener_embeddings(), corpus.termino, progreso=progreso)
+            corpus.chain = initialize_chain(corpus.termino, indexar=False)
+            corpus.creado = time.time()
+            progreso.estado = 'listo'
+        except BusquedaCancelada:
+            progreso.estado = 'cancelado'
+        except Exception as e:
+            progreso.error = str(e)
+            progreso.estado = 'error'
+
+    def _indexar_mientras(self, corpus, terminado):
+        """Indexa por lotes los chunks que va insertando el scraping y publica un chain parcial"""
+        progreso = corpus.progreso
+        embeddings = obtener_embeddings()
+        try:
+            while not terminado.is_set():
+                if indexar_pendientes(embeddings, corpus.termino, max_lotes=1, progreso=progreso):
+                    if corpus.chain is None:
+                        corpus.chain = initialize_chain(corpus.termino, indexar=False)
+                else:
+                    terminado.wait(ESPERA_INDEXADOR)
+        except BusquedaCancelada:
+            pass
+        except Exception as e:
+            # El trabajo principal reintenta la indexación al terminar el scraping
+            logger.warning("Error indexando mientras se descargaba '%s'", corpus.termino, exc_info=True)
+            progreso.aviso = f"Error al indexar durante la descarga (se reintentará al terminar): {e}"
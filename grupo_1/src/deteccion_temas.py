@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from cache_respuestas import normalizar_pregunta
+
+# Parámetros por defecto de la llamada al LLM; cada llamada usa su propia copia
+PARAMS_TEMAS = {"model": os.getenv('MODELO_TEMAS', 'groq/llama-3.1-70b-versatile'), "temperature": 0.3}
+MAX_ENTRADAS_CACHE_TEMAS = int(os.getenv('CACHE_TEMAS_MAX_ENTRADAS', 256))
+
+PROMPT_TEMAS = """
+    Please identify the main topic the user want to know about in the following text. Respond in JSON format using this schema: {{"topics": ["topic1", "topic2", ...]}} with no preamble or additional text.
+
+    **User Query:** {text}
+    """
+
+
+class ParserTemas:
+    """
+    Parser incremental y tolerante de la respuesta {"topics": [...]} del LLM. Recibe el
+    texto por fragmentos y entrega cada tema apenas se cierra su cadena, sin esperar el
+    final de la respuesta. Ignora preámbulos, bloques ```json, texto después del arreglo y
+    elementos que no sean cadenas; también acepta un arreglo sin el objeto alrededor.
+    """
+
+    def __init__(self, clave='topics'):
+        self.clave = f'"{clave}"'
+        self.temas = []
+        self.terminado = False
+        self._pendiente = ''  # texto recibido que aún no se pudo interpretar
+        self._estado = 'inicio'  # inicio -> clave -> elementos -> terminado
+        self._vistos = set()
+
+    def agregar(self, fragmento):
+        """Procesa un fragmento del stream; retorna los temas nuevos que quedaron completos"""
+        if self.terminado:
+            return []
+        self._pendiente += fragmento
+        nuevos = []
+        while not self.terminado and self._avanzar(nuevos):
+            pass
+        return nuevos
+
+    def _avanzar(self, nuevos):
+        """Consume lo que pueda del texto pendiente; retorna False si necesita más texto"""
+        texto = self._pendiente
+        if self._estado == 'inicio':
+            llave, corchete = texto.find('{'), texto.find('[')
+            if llave < 0 and corchete < 0:
+                self._pendiente = ''
+                return False
+            if corchete >= 0 and (llave < 0 or corchete < llave):
+                self._estado, self._pendiente = 'elementos', texto[corchete + 1:]
+            else:
+                self._estado, self._pendiente = 'clave', texto[llave + 1:]
+            return True
+
+        if self._estado == 'clave':
+            posicion = texto.find(self.clave)
+            corchete = texto.find('[', posicion + len(self.clave)) if posicion >= 0 else -1
+            if corchete < 0:
+                # Conservar lo suficiente para reconocer la clave si llega partida
+                if posicion < 0:
+                    self._pendiente = texto[-len(self.clave):]
+                return False
+            self._estado, self._pendiente = 'elementos', texto[corchete + 1:]
+            return True
+
+        # Elementos del arreglo
+        texto = texto.lstrip(' \t\r\n,')
+        self._pendiente = texto
+        if not texto:
+            return False
+        if texto[0] == ']':
+            self.terminado = True
+            self._pendiente = ''
+            return False
+        if texto[0] != '"':
+            # Elemento que no es cadena: se descarta hasta la siguiente coma o el cierre
+            fin = min((i for i in (texto.find(','), texto.find(']')) if i >= 0), default=-1)
+            if fin < 0:
+                return False
+            self._pendiente = texto[fin:]
+            return True
+        fin = self._fin_cadena(texto)
+        if fin < 0:
+            return False
+        try:
+            tema = json.loads(texto[:fin + 1]).strip()
+        except ValueError:
+            tema = texto[1:fin].strip()
+        self._pendiente = texto[fin + 1:]
+        if tema and tema.lower() not in self._vistos:
+            self._vistos.add(tema.lower())
+            self.temas.append(tema)
+            nuevos.append(tema)
+        return True
+
+    @staticmethod
+    def _fin_cadena(texto):
+        """Posición de la comilla que cierra la cadena que empieza en texto[0], o -1"""
+        i = 1
+        while i < len(texto):
+            if texto[i] == '\\':
+                i += 2
+                continue
+            if texto[i] == '"':
+                return i
+            i += 1
+        return -1
+
+
+class CacheTemas:
+    """Caché LRU de los temas extraídos por (modelo, transcripción normalizada)"""
+
+    def __init__(self, max_entradas=MAX_ENTRADAS_CACHE_TEMAS):
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, modelo, texto):
+        clave = (modelo, normalizar_pregunta(texto))
+        with self._lock:
+            temas = self._entradas.get(clave)
+            if temas is not None:
+                self._entradas.move_to_end(clave)
+            return temas
+
+    def guardar(self, modelo, texto, temas):
+        clave = (modelo, normalizar_pregunta(texto))
+        with self._lock:
+            self._entradas[clave] = list(temas)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+
+_cache_temas = CacheTemas()
+
+
+def _llamada(texto, params):
+    llamada = {**PARAMS_TEMAS, **(params or {})}
+    llamada["messages"] = [{"role": "user", "content": PROMPT_TEMAS.format(text=texto)}]
+    llamada["stream"] = True
+    return llamada
+
+
+def detectar_temas(texto, params=None, cache=_cache_temas):
+    """Retorna la lista de temas del texto (llamada al LLM en flujo, o la caché si ya se extrajeron)"""
+    import litellm
+
+    llamada = _llamada(texto, params)
+    temas = cache.obtener(llamada["model"], texto)
+    if temas is not None:
+        return temas
+    parser = ParserTemas()
+    for chunk in litellm.completion(**llamada):
+        contenido = chunk.choices[0].delta.content
+        if contenido:
+            parser.agregar(contenido)
+    cache.guardar(llamada["model"], texto, parser.temas)
+    return parser.temas
+
+
+async def temas_en_flujo(texto, params=None, cache=_cache_temas, completar=None):
+    """
+    Generador asíncrono de los temas del texto: entrega cada uno apenas el LLM termina de
+    escribirlo. `completar` es la función asíncrona de completion (litellm.acompletion por defecto).
+    """
+    llamada = _llamada(texto, params)
+    temas = cache.obtener(llamada["model"], texto)
+    if temas is not None:
+        for tema in temas:
+            yield tema
+        return
+    if completar is None:
+        import litellm
+        completar = litellm.acompletion
+
+    parser = ParserTemas()
+    respuesta = await completar(**llamada)
+    async for chunk in respuesta:
+        contenido = chunk.choices[0].delta.content
+        if contenido:
+            for tema in parser.agregar(contenido):
+                yield tema
+    # Solo se guardan las extracciones completas
+    cache.guardar(llamada["model"], texto, parser.temas)
@@ -0,0 +1,87 @@
+import re
+from bisect import bisect_left, bisect_right
+
+from langchain_core.documents import Document
+
+MAX_TAMANO = 1000
+SOLAPAMIENTO = 150
+MIN_TAMANO = 200  # no se corta por oración antes de este tamaño (evita chunks diminutos)
+
+# Encabezados de las secciones habituales de una sentencia, en una línea corta propia
+# (opcionalmente numerados: "I. ANTECEDENTES", "III.- CONSIDERACIONES", "2. Hechos")
+PATRON_SECCION = re.compile(
+    r'^[ \t]*(?:[IVXLC]+|\d+)?[ \t]*[.\-)]*[ \t]*'
+    r'(ANTECEDENTES|HECHOS|PRUEBAS|ACTUACI[OÓ]N PROCESAL|DECISIONES? JUDICIALES? (?:QUE SE REVISAN?|OBJETO DE REVISI[OÓ]N)|'
+    r'CONSIDERACIONES(?: Y FUNDAMENTOS)?(?: DE LA CORTE)?|FUNDAMENTOS(?: JUR[IÍ]DICOS)?|PROBLEMA JUR[IÍ]DICO|'
+    r'COMPETENCIA|CASO CONCRETO|S[IÍ]NTESIS DE LA DECISI[OÓ]N|DECISI[OÓ]N|RESUELVE)\b(?=[^\n]{0,80}$)',
+    re.MULTILINE | re.IGNORECASE
+)
+# Fin de oración (o de párrafo): la posición de corte queda después del separador y sus espacios
+PATRON_ORACION = re.compile(r'(?:[.;:!?](?=\s)|\n)\s*')
+
+
+def _secciones(texto):
+    """Posiciones de inicio y nombres de las secciones encontradas en el texto"""
+    inicios, nombres = [0], ['ENCABEZADO']
+    for m in PATRON_SECCION.finditer(texto):
+        if m.start() > inicios[-1]:
+            inicios.append(m.start())
+            nombres.append(m.group(1).upper())
+    return inicios, nombres
+
+
+def _cortes(texto):
+    """Posiciones de corte: inicio de cada oración después de la primera"""
+    return [m.end() for m in PATRON_ORACION.finditer(texto)]
+
+
+def dividir_texto(texto, max_tamano=MAX_TAMANO, solapamiento=SOLAPAMIENTO, min_tamano=MIN_TAMANO):
+    """
+    Generador de tramos (inicio, fin, seccion) de a lo sumo max_tamano caracteres.
+    Corta preferentemente en fin de oración, nunca mezcla dos secciones en un chunk y
+    repite hasta `solapamiento` caracteres (desde un inicio de oración) entre chunks seguidos.
+    Trabaja solo con índices sobre el texto: el costo total es lineal en su longitud.
+    """
+    if max_tamano < 1:
+        raise ValueError("max_tamano debe ser al menos 1")
+    n = len(texto)
+    inicios_seccion, nombres = _secciones(texto)
+    cortes = _cortes(texto)
+    inicio = 0
+    seccion = 0
+    while inicio < n:
+        # Sección del tramo actual y límite impuesto por la siguiente sección
+        while seccion + 1 < len(inicios_seccion) and inicios_seccion[seccion + 1] <= inicio:
+            seccion += 1
+        fin_seccion = inicios_seccion[seccion + 1] if seccion + 1 < len(inicios_seccion) else n
+        limite = min(inicio + max_tamano, fin_seccion)
+
+        if limite == fin_seccion:
+            fin = limite
+        else:
+            # Último fin de oración dentro del tramo; si no hay, se corta en el límite. El tramo
+            # nunca queda vacío (con min_tamano=0 un corte en `inicio` no avanzaría)
+            i = bisect_right(cortes, limite) - 1
+            fin = cortes[i] if i >= 0 and cortes[i] >= inicio + max(min_tamano, 1) else limite
+
+        if texto[inicio:fin].strip():
+            yield inicio, fin, nombres[seccion]
+
+        if fin >= n:
+            break
+        # Siguiente inicio: primer inicio de oración dentro de la ventana de solapamiento
+        siguiente = fin
+        if solapamiento and fin < fin_seccion:
+            i = bisect_left(cortes, max(fin - solapamiento, inicio + 1))
+            if i < len(cortes) and cortes[i] < fin:
+                siguiente = cortes[i]
+        inicio = siguiente
+
+
+def dividir_documento(doc, max_tamano=MAX_TAMANO, solapamiento=SOLAPAMIENTO):
+    """Genera los Document de cada chunk con la sección y los offsets en la metadata"""
+    for numero, (inicio, fin, seccion) in enumerate(dividir_texto(doc.page_content, max_tamano, solapamiento)):
+        yield Document(
+            page_content=doc.page_content[inicio:fin],
+            metadata={**doc.metadata, 'seccion': seccion, 'inicio': inicio, 'fin': fin, 'chunk': numero}
+        )
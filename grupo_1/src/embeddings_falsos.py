@@ -0,0 +1,35 @@
+import hashlib
+import math
+import time
+
+from langchain_core.embeddings import Embeddings
+
+
+class EmbeddingsFalsos(Embeddings):
+    """
+    Backend de embeddings local y determinista para pruebas y benchmarks sin conexión.
+    Simula la latencia de una API: un costo fijo por llamada más un costo por texto.
+    """
+
+    def __init__(self, dimension=1536, latencia_llamada=0.2, latencia_texto=0.001):
+        self.dimension = dimension
+        self.latencia_llamada = latencia_llamada
+        self.latencia_texto = latencia_texto
+        self.llamadas = 0
+        self.textos_enviados = 0
+
+    def _vector(self, texto):
+        # Vector pseudoaleatorio derivado del hash del texto, normalizado
+        bytes_hash = hashlib.shake_256(texto.encode('utf-8')).digest(self.dimension)
+        vector = [b - 127.5 for b in bytes_hash]
+        norma = math.sqrt(sum(v * v for v in vector))
+        return [v / norma for v in vector]
+
+    def embed_documents(self, texts):
+        self.llamadas += 1
+        self.textos_enviados += len(texts)
+        time.sleep(self.latencia_llamada + self.latencia_texto * len(texts))
+        return [self._vector(texto) for texto in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
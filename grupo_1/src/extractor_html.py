@@ -0,0 +1,131 @@
+from html.parser import HTMLParser
+
+try:
+    from lxml import etree
+except ImportError:  # lxml es opcional: se usa el parser en Python puro
+    etree = None
+
+# Clases del div que contiene el cuerpo de la sentencia, en orden de preferencia
+CLASES_CUERPO = ('WordSection1', 'Section1')
+TAMANO_BLOQUE = 64 * 1024
+ETIQUETAS_SIN_TEXTO = ('script', 'style', 'template')
+
+
+class _ExtractorCuerpo(HTMLParser):
+    """
+    Parser incremental que acumula el texto de los divs con las clases buscadas.
+    Marca terminado apenas se cierra el div de la clase preferida.
+    """
+
+    def __init__(self, clases):
+        super().__init__(convert_charrefs=True)
+        self.clases = clases
+        self.textos = {}
+        self.terminado = False
+        self._activos = []  # [clase, profundidad de divs, partes de texto]
+        self._sin_texto = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'div':
+            for activo in self._activos:
+                activo[1] += 1
+            for nombre, valor in attrs:
+                if nombre != 'class' or not valor:
+                    continue
+                for clase in valor.split():
+                    if clase in self.clases and clase not in self.textos \
+                            and all(activo[0] != clase for activo in self._activos):
+                        self._activos.append([clase, 1, []])
+        elif tag in ETIQUETAS_SIN_TEXTO:
+            self._sin_texto += 1
+
+    def handle_endtag(self, tag):
+        if tag == 'div':
+            for activo in list(self._activos):
+                activo[1] -= 1
+                if activo[1] == 0:
+                    self._cerrar(activo)
+        elif tag in ETIQUETAS_SIN_TEXTO and self._sin_texto:
+            self._sin_texto -= 1
+
+    def handle_data(self, data):
+        if self._activos and not self._sin_texto:
+            for activo in self._activos:
+                activo[2].append(data)
+
+    def _cerrar(self, activo):
+        self._activos.remove(activo)
+        self.textos[activo[0]] = ''.join(activo[2])
+        if activo[0] == self.clases[0]:
+            self.terminado = True
+
+    def finalizar(self):
+        """Cierra los divs que quedaron abiertos al final del documento"""
+        self.close()
+        for activo in list(self._activos):
+            self._cerrar(activo)
+
+
+def _extraer_python(html, clases):
+    parser = _ExtractorCuerpo(clases)
+    for inicio in range(0, len(html), TAMANO_BLOQUE):
+        parser.feed(html[inicio:inicio + TAMANO_BLOQUE])
+        if parser.terminado:
+            break
+    else:
+        parser.finalizar()
+    return parser.textos
+
+
+def _texto_lxml(elemento, partes=None):
+    """Texto de un elemento lxml sin comentarios, scripts ni estilos (igual que BeautifulSoup .text)"""
+    raiz = partes is None
+    if raiz:
+        partes = []
+    if elemento.text and elemento.tag not in ETIQUETAS_SIN_TEXTO:
+        partes.append(elemento.text)
+    for hijo in elemento:
+        # Los comentarios (y los <![if ...]> de Word) no aportan texto, pero sí su cola
+        if isinstance(hijo.tag, str):
+            _texto_lxml(hijo, partes)
+        if hijo.tail:
+            partes.append(hijo.tail)
+    if raiz:
+        return ''.join(partes)
+
+
+def _extraer_lxml(html, clases):
+    parser = etree.HTMLPullParser(events=('start', 'end'), tag='div')
+    textos = {}
+    abiertos = {}
+    for inicio in range(0, len(html), TAMANO_BLOQUE):
+        parser.feed(html[inicio:inicio + TAMANO_BLOQUE])
+        for evento, elemento in parser.read_events():
+            clase = next((c for c in (elemento.get('class') or '').split() if c in clases), None)
+            if clase is None or clase in textos:
+                continue
+            if evento == 'start':
+                abiertos.setdefault(clase, elemento)
+            elif abiertos.get(clase) is elemento:
+                textos[clase] = _texto_lxml(elemento)
+                if clase == clases[0]:
+                    return textos
+    parser.close()
+    for clase, elemento in abiertos.items():
+        textos.setdefault(clase, _texto_lxml(elemento))
+    return textos
+
+
+def extraer_cuerpo(html, clases=CLASES_CUERPO, usar_lxml=None):
+    """
+    Retorna el texto (sin espacios al inicio y al final) del primer div cuya clase
+    esté en `clases`, respetando su orden de preferencia. Recorre la página una
+    sola vez y se detiene al cerrar el div preferido. Retorna None si no lo encuentra.
+    """
+    if usar_lxml is None:
+        usar_lxml = etree is not None
+    textos = _extraer_lxml(html, clases) if usar_lxml else _extraer_python(html, clases)
+    for clase in clases:
+        if clase in textos:
+            return textos[clase].strip()
+    return None
@@ -0,0 +1,226 @@
+import math
+import os
+import re
+import threading
+import unicodedata
+from array import array
+from collections import Counter
+from typing import Any, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+# Configuración de la búsqueda léxica y de la fusión con la vectorial
+BM25_K1 = 1.2
+BM25_B = 0.75
+K_RRF = 60  # constante de reciprocal rank fusion
+CANDIDATOS = int(os.getenv('RETRIEVER_CANDIDATOS', 20))  # resultados de cada retriever antes de fusionar
+K_RETRIEVER = int(os.getenv('RETRIEVER_K', 6))  # chunks que recibe el LLM
+
+# Identificadores de providencias (T-406, SU-214, C-355 ...) con año opcional (T-406/24, T-406-24, T-406 de 2024)
+PATRON_SENTENCIA = re.compile(r'\b(su|t|c|a)\s*-\s*(\d{1,4})(?:\s*(?:/|-|de)\s*(?:19|20)?(\d{2})\b)?')
+PATRON_TOKEN = re.compile(r'(?:su|t|c|a)-\d+|\w+')
+STOPWORDS = frozenset(
+    'a al como con de del el en es la las lo los no o para por que se sobre su sus un una y'.split()
+)
+
+
+def _sin_tildes(texto):
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def tokenizar(texto):
+    """Tokens en minúsculas y sin tildes; los identificadores de sentencias quedan en un solo token (t-406)"""
+    texto = PATRON_SENTENCIA.sub(lambda m: f' {m.group(1)}-{int(m.group(2))} {m.group(3) or ""} ', _sin_tildes(texto))
+    return [token for token in PATRON_TOKEN.findall(texto) if token not in STOPWORDS]
+
+
+def clave_sentencia(texto):
+    """Clave normalizada de la primera sentencia mencionada en el texto ('t-406-24', o 't-406' sin año)"""
+    m = PATRON_SENTENCIA.search(_sin_tildes(texto))
+    if m is None:
+        return None
+    return f'{m.group(1)}-{int(m.group(2))}' + (f'-{m.group(3)}' if m.group(3) else '')
+
+
+def sentencias_mencionadas(texto):
+    """Claves de todas las sentencias mencionadas en el texto"""
+    return [clave_sentencia(m.group(0)) for m in PATRON_SENTENCIA.finditer(_sin_tildes(texto))]
+
+
+class IndiceBM25:
+    """
+    Índice invertido en proceso con puntaje BM25. Se actualiza por lotes a medida que se
+    insertan chunks (costo proporcional a los tokens nuevos): cada lista de postings es un
+    par de arrays (documentos, frecuencias) que la búsqueda recorre vectorizada con numpy.
+    Permite filtrar por sentencia (metadata['sentencia']).
+    """
+
+    def __init__(self, k1=BM25_K1, b=BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.documentos = []
+        self.hashes = set()
+        self._postings = {}  # token -> (array de documentos, array de frecuencias)
+        self._longitudes = array('f')
+        self._longitud_total = 0
+        self._sentencias = {}  # clave de sentencia -> id
+        self._sentencia_doc = array('i')  # id de la sentencia de cada documento
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.documentos)
+
+    def agregar(self, documentos):
+        """Agrega chunks ({'page_content', 'metadata', 'hash'}); los hashes ya indexados se ignoran"""
+        with self._lock:
+            for doc in documentos:
+                if doc.get('hash') is not None and doc['hash'] in self.hashes:
+                    continue
+                i = len(self.documentos)
+                tokens = tokenizar(doc['page_content'])
+                for token, frecuencia in Counter(tokens).items():
+                    postings = self._postings.get(token)
+                    if postings is None:
+                        postings = self._postings[token] = (array('i'), array('f'))
+                    postings[0].append(i)
+                    postings[1].append(frecuencia)
+                self._longitudes.append(len(tokens))
+                self._longitud_total += len(tokens)
+                clave = clave_sentencia((doc.get('metadata') or {}).get('sentencia', '').rsplit('/', 1)[-1])
+                self._sentencia_doc.append(self._sentencias.setdefault(clave, len(self._sentencias)))
+                self.documentos.append({'page_content': doc['page_content'], 'metadata': doc.get('metadata', {}),
+                                        'hash': doc.get('hash')})
+                self.hashes.add(doc.get('hash'))
+
+    def _permitidos(self, sentencias):
+        """Máscara de los documentos de las sentencias indicadas (una clave sin año incluye todos los años)"""
+        with self._lock:
+            ids = [id_ for clave, id_ in self._sentencias.items() if clave is not None and any(
+                clave == buscada or clave.startswith(buscada + '-') for buscada in sentencias)]
+            return np.isin(np.frombuffer(self._sentencia_doc, dtype=np.int32), ids)
+
+    def _puntajes(self, tokens, sentencias):
+        # Las vistas de numpy sobre los arrays solo viven dentro de esta función (bajo el lock):
+        # mientras existen, agregar no podría extender los arrays
+        n = len(self.documentos)
+        longitudes = np.frombuffer(self._longitudes, dtype=np.float32)
+        normalizacion = self.k1 * (1 - self.b + self.b * longitudes / (max(self._longitud_total, 1) / n))
+        puntajes = np.zeros(n, dtype=np.float32)
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            docs = np.frombuffer(postings[0], dtype=np.int32)
+            frecuencias = np.frombuffer(postings[1], dtype=np.float32)
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            puntajes[docs] += idf * frecuencias * (self.k1 + 1) / (frecuencias + normalizacion[docs])
+        if sentencias:
+            puntajes[~self._permitidos(sentencias)] = 0
+        return puntajes
+
+    def buscar(self, consulta, k=CANDIDATOS, sentencias=None):
+        """Retorna [(indice, puntaje)] de los k chunks con mayor BM25, opcionalmente solo de `sentencias`"""
+        tokens = set(tokenizar(consulta))
+        with self._lock:
+            if not self.documentos or not tokens:
+                return []
+            puntajes = self._puntajes(tokens, sentencias)
+        candidatos = np.flatnonzero(puntajes)
+        if len(candidatos) == 0:
+            return []
+        k = min(k, len(candidatos))
+        mejores = candidatos[np.argpartition(-puntajes[candidatos], k - 1)[:k]]
+        mejores = mejores[np.argsort(-puntajes[mejores])]
+        return [(int(i), float(puntajes[i])) for i in mejores]
+
+    def sincronizar(self, coleccion, filtro=None):
+        """Carga desde MongoDB los chunks (que cumplan el filtro) que aún no están en el índice"""
+        consulta = {**(filtro or {}), 'hash': {'$nin': list(self.hashes)}}
+        nuevos = list(coleccion.find(consulta, {'page_content': 1, 'metadata': 1, 'hash': 1, '_id': 0}))
+        self.agregar(nuevos)
+        return len(nuevos)
+
+    def limpiar(self):
+        with self._lock:
+            self.documentos = []
+            self.hashes = set()
+            self._postings = {}
+            self._longitudes = array('f')
+            self._longitud_total = 0
+            self._sentencias = {}
+            self._sentencia_doc = array('i')
+
+
+def _sentencia_de_documento(doc):
+    # Atlas deja la metadata del chunk anidada; el retriever local la entrega aplanada
+    metadata = doc.metadata.get('metadata', doc.metadata)
+    return clave_sentencia(metadata.get('sentencia', '').rsplit('/', 1)[-1]) or ''
+
+
+class RetrieverHibrido(BaseRetriever):
+    """
+    Fusiona con reciprocal rank fusion los resultados del retriever vectorial y del índice
+    BM25. Si la pregunta menciona sentencias (p. ej. "T-406 de 2024") o se indican en
+    `sentencias`, solo se consideran chunks de esas sentencias.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectorial: Any
+    lexico: Any
+    k: int = K_RETRIEVER
+    candidatos: int = CANDIDATOS
+    k_rrf: int = K_RRF
+    sentencias: Optional[List[str]] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        sentencias = self.sentencias or sentencias_mencionadas(query)
+        # Solo se filtra por sentencias que existen en el corpus
+        if sentencias and not self.lexico._permitidos(sentencias).any():
+            sentencias = None
+
+        fusion = {}
+        vectoriales = self.vectorial.invoke(query)
+        if sentencias:
+            vectoriales = [doc for doc in vectoriales if any(
+                _sentencia_de_documento(doc) == s or _sentencia_de_documento(doc).startswith(s + '-')
+                for s in sentencias)]
+        for rango, doc in enumerate(vectoriales):
+            fusion[doc.page_content] = [doc, 1 / (self.k_rrf + rango + 1)]
+
+        for rango, (i, puntaje) in enumerate(self.lexico.buscar(query, self.candidatos, sentencias)):
+            chunk = self.lexico.documentos[i]
+            entrada = fusion.setdefault(chunk['page_content'], [
+                Document(page_content=chunk['page_content'], metadata=dict(chunk['metadata'])), 0.0])
+            entrada[1] += 1 / (self.k_rrf + rango + 1)
+            entrada[0].metadata['bm25'] = puntaje
+
+        mejores = sorted(fusion.values(), key=lambda entrada: -entrada[1])[:self.k]
+        for doc, puntaje in mejores:
+            doc.metadata['rrf'] = puntaje
+        return [doc for doc, _ in mejores]
+
+
+_indices = {}
+_indices_lock = threading.Lock()
+
+
+def obtener_indice_bm25(termino):
+    """Retorna el índice BM25 del término de búsqueda, compartido en el proceso"""
+    with _indices_lock:
+        if termino not in _indices:
+            _indices[termino] = IndiceBM25()
+        return _indices[termino]
+
+
+def limpiar_indices():
+    """Vacía y descarta los índices BM25 de todos los términos"""
+    with _indices_lock:
+        for indice in _indices.values():
+            indice.limpiar()
+        _indices.clear()
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from typing import Any, List
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+# Configuración del índice vectorial local
+# Por defecto en la caché del usuario, junto a las cachés de embeddings y sentencias
+DIRECTORIO_INDICE = os.getenv('INDICE_LOCAL_DIR') or os.path.join(
+    os.getenv('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'analisis_penal', 'indice_local')
+UMBRAL_IVF = int(os.getenv('INDICE_LOCAL_UMBRAL_IVF', 20000))  # chunks a partir de los cuales se usa IVF
+NPROBE = int(os.getenv('INDICE_LOCAL_NPROBE', 8))
+
+
+class IndiceVectorialLocal:
+    """
+    Índice vectorial en proceso. Los vectores (normalizados) viven en una matriz
+    float32 contigua mapeada en memoria desde disco; la búsqueda exacta es un
+    producto punto vectorizado. Para corpus grandes se puede construir un índice
+    aproximado IVF (k-means sobre los vectores + búsqueda en las nprobe listas más cercanas).
+    """
+
+    def __init__(self, directorio=DIRECTORIO_INDICE, umbral_ivf=UMBRAL_IVF, nprobe=NPROBE):
+        self.directorio = directorio
+        self.umbral_ivf = umbral_ivf
+        self.nprobe = nprobe
+        self._ruta_vectores = os.path.join(directorio, 'vectores.f32')
+        self._ruta_documentos = os.path.join(directorio, 'documentos.jsonl')
+        self._lock = threading.RLock()
+        self.dimension = None
+        self.matriz = None
+        self.documentos = []
+        self.hashes = set()
+        self._ivf = None
+        os.makedirs(directorio, exist_ok=True)
+        self._cargar()
+
+    def _cargar(self):
+        if not os.path.exists(self._ruta_documentos):
+            return
+        with open(self._ruta_documentos, encoding='utf-8') as f:
+            self.documentos = [json.loads(linea) for linea in f]
+        self.hashes = {doc.get('hash') for doc in self.documentos}
+        if self.documentos:
+            self.dimension = os.path.getsize(self._ruta_vectores) // (4 * len(self.documentos))
+            self._mapear()
+
+    def _mapear(self):
+        n = len(self.documentos)
+        self.matriz = np.memmap(self._ruta_vectores, dtype=np.float32, mode='r', shape=(n, self.dimension))
+
+    def __len__(self):
+        return len(self.documentos)
+
+    def agregar(self, vectores, documentos):
+        """Agrega vectores (n, d) y sus documentos ({'page_content', 'metadata', 'hash'}) al final del índice"""
+        vectores = np.asarray(vectores, dtype=np.float32)
+        if len(vectores) == 0:
+            return
+        vectores = vectores / np.maximum(np.linalg.norm(vectores, axis=1, keepdims=True), 1e-12)
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = vectores.shape[1]
+            elif vectores.shape[1] != self.dimension:
+                raise ValueError(f"Dimensión {vectores.shape[1]} distinta a la del índice ({self.dimension})")
+            self.matriz = None  # liberar el mapa antes de extender el archivo
+            with open(self._ruta_vectores, 'ab') as f:
+                f.write(np.ascontiguousarray(vectores).tobytes())
+            with open(self._ruta_documentos, 'a', encoding='utf-8') as f:
+                for doc in documentos:
+                    f.write(json.dumps(doc, ensure_ascii=False) + '\n')
+            self.documentos.extend(documentos)
+            self.hashes.update(doc.get('hash') for doc in documentos)
+            self._mapear()
+            self._ivf = None
+
+    def construir_ivf(self, n_listas=None, iteraciones=10, semilla=0):
+        """Construye el índice aproximado IVF con k-means esférico"""
+        with self._lock:
+            n = len(self.documentos)
+            n_listas = n_listas or max(1, int(np.sqrt(n)))
+            generador = np.random.default_rng(semilla)
+            centroides = np.array(self.matriz[generador.choice(n, n_listas, replace=False)])
+            for _ in range(iteraciones):
+                asignacion = self._asignar(centroides)
+                sumas = np.zeros_like(centroides)
+                np.add.at(sumas, asignacion, self.matriz)
+                vacios = ~sumas.any(axis=1)
+                sumas[vacios] = centroides[vacios]
+                centroides = sumas / np.maximum(np.linalg.norm(sumas, axis=1, keepdims=True), 1e-12)
+            asignacion = self._asignar(centroides)
+            orden = np.argsort(asignacion, kind='stable')
+            limites = np.searchsorted(asignacion[orden], np.arange(n_listas + 1))
+            self._ivf = (centroides.astype(np.float32), orden, limites)
+
+    def _asignar(self, centroides, bloque=65536):
+        asignacion = np.empty(len(self.matriz), dtype=np.int64)
+        for inicio in range(0, len(self.matriz), bloque):
+            asignacion[inicio:inicio + bloque] = np.argmax(self.matriz[inicio:inicio + bloque] @ centroides.T, axis=1)
+        return asignacion
+
+    def buscar(self, vector, k=4, usar_ivf=None, filtro=None):
+        """
+        Retorna [(indice, puntaje)] de los k vectores más similares (coseno).
+        usar_ivf=None decide según el tamaño del índice; filtro recibe la metadata y retorna bool.
+        """
+        with self._lock:
+            if not self.documentos:
+                return []
+            consulta = np.asarray(vector, dtype=np.float32)
+            consulta = consulta / max(float(np.linalg.norm(consulta)), 1e-12)
+            if usar_ivf is None:
+                usar_ivf = len(self.documentos) >= self.umbral_ivf
+            if usar_ivf and self._ivf is None:
+                self.construir_ivf()
+
+            if usar_ivf:
+                centroides, orden, limites = self._ivf
+                listas = np.argsort(-(centroides @ consulta))[:self.nprobe]
+                candidatos = np.concatenate([orden[limites[l]:limites[l + 1]] for l in listas])
+            else:
+                candidatos = None
+
+            if filtro is not None:
+                permitidos = np.array([i for i, doc in enumerate(self.documentos) if filtro(doc['metadata'])],
+                                      dtype=np.int64)
+                candidatos = permitidos if candidatos is None else np.intersect1d(candidatos, permitidos)
+
+            if candidatos is None:
+                puntajes = self.matriz @ consulta
+                indices = np.arange(len(puntajes))
+            else:
+                puntajes = self.matriz[candidatos] @ consulta
+                indices = candidatos
+            if len(puntajes) == 0:
+                return []
+            k = min(k, len(puntajes))
+            mejores = np.argpartition(-puntajes, k - 1)[:k]
+            mejores = mejores[np.argsort(-puntajes[mejores])]
+            return [(int(indices[i]), float(puntajes[i])) for i in mejores]
+
+    def sincronizar(self, coleccion, filtro=None):
+        """Carga desde MongoDB los chunks con embedding (que cumplan el filtro) que aún no están en el índice"""
+        nuevos, vectores = [], []
+        consulta = {**(filtro or {}), 'embedding': {'$exists': True}, 'hash': {'$nin': list(self.hashes)}}
+        for doc in coleccion.find(consulta,
+                                  {'page_content': 1, 'metadata': 1, 'hash': 1, 'embedding': 1}):
+            vectores.append(doc['embedding'])
+            nuevos.append({'page_content': doc['page_content'], 'metadata': doc.get('metadata', {}),
+                           'hash': doc.get('hash')})
+        self.agregar(vectores, nuevos)
+        return len(nuevos)
+
+    def limpiar(self):
+        with self._lock:
+            self.matriz = None
+            for ruta in (self._ruta_vectores, self._ruta_documentos):
+                if os.path.exists(ruta):
+                    os.remove(ruta)
+            self.dimension = None
+            self.documentos = []
+            self.hashes = set()
+            self._ivf = None
+
+
+class RetrieverLocal(BaseRetriever):
+    """Retriever de LangChain sobre el IndiceVectorialLocal"""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    indice: Any
+    embeddings: Any
+    k: int = 4
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        resultados = self.indice.buscar(self.embeddings.embed_query(query), k=self.k)
+        documentos = []
+        for i, puntaje in resultados:
+            doc = self.indice.documentos[i]
+            documentos.append(Document(page_content=doc['page_content'],
+                                       metadata={**doc['metadata'], 'score': puntaje}))
+        return documentos
+
+
+_indices = {}
+_indices_lock = threading.Lock()
+
+
+def obtener_indice_local(termino):
+    """Retorna el índice local del término de búsqueda, compartido en el proceso"""
+    with _indices_lock:
+        if termino not in _indices:
+            carpeta = hashlib.sha1(termino.encode('utf-8')).hexdigest()[:16]
+            _indices[termino] = IndiceVectorialLocal(os.path.join(DIRECTORIO_INDICE, carpeta))
+        return _indices[termino]
+
+
+def limpiar_indices():
+    """Borra los índices locales de todos los términos, también los que este proceso nunca abrió"""
+    with _indices_lock:
+        for indice in _indices.values():
+            indice.limpiar()
+        _indices.clear()
+        shutil.rmtree(DIRECTORIO_INDICE, ignore_errors=True)
@@ -1,15 +1,22 @@
 import streamlit as st
-from analisisPenal import scraping_sentencias, initialize_chain, clear_collection
+from corpus_compartido import RegistroCorpus
+import asyncio
 import logging
 import os
-from record_audio import record_audio
-from record_audio import AudioRecorder
-from transcribe_audio import transcribe_audio
-from voice_mode import detect_topic
+import threading
 from datetime import datetime
 import tempfile
 import time
 
+logger = logging.getLogger(__name__)
+
+# Intervalo mínimo entre actualizaciones de la respuesta en pantalla (segundos)
+INTERVALO_REFRESCO = 0.05
+# Transcribir la voz con el modelo Whisper local (sin conexión) en lugar del servicio de Groq
+TRANSCRIPCION_LOCAL = os.getenv('TRANSCRIPCION_LOCAL', '0') == '1'
+# Transcribir por segmentos mientras se graba (al detener solo falta el último segmento)
+TRANSCRIPCION_EN_VIVO = os.getenv('TRANSCRIPCION_EN_VIVO', '1') == '1'
+
 def initialize_session_state():
     """Inicializa el estado de la sesión"""
     if 'is_recording' not in st.session_state:
@@ -21,10 +28,22 @@ def initialize_session_state():
     if 'text_input' not in st.session_state:
         st.session_state.text_input = ""
     if 'recorder' not in st.session_state:
-        st.session_state.recorder = AudioRecorder()
+        # La grabadora (pyaudio) se crea al usar el micrófono por primera vez
+        st.session_state.recorder = None
+    if 'transcriptor' not in st.session_state:
+        st.session_state.transcriptor = None
+    if 'metricas' not in st.session_state:
+        st.session_state.metricas = []
 
 def handle_recording():
     """Maneja la lógica de grabación"""
+    # pyaudio y litellm solo se importan si se usa la entrada de voz
+    from record_audio import AudioRecorder, RATE
+    from transcribe_audio import transcribe_audio, transcribe_samples
+    from transcripcion_en_vivo import TranscriptorEnVivo
+
+    if st.session_state.recorder is None:
+        st.session_state.recorder = AudioRecorder()
     try:
         # Manejar el inicio/detención de la grabación
         if not st.session_state.is_recording:
@@ -33,6 +52,14 @@ def handle_recording():
             timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
             st.session_state.output_file = os.path.join(temp_dir, f"record-{timestamp}.wav")
 
+            # En vivo: el hilo escritor de la grabadora entrega el audio al transcriptor
+            if TRANSCRIPCION_EN_VIVO:
+                st.session_state.transcriptor = TranscriptorEnVivo(
+                    lambda muestras: transcribe_samples(muestras, use_local=TRANSCRIPCION_LOCAL), RATE)
+                st.session_state.recorder.consumidor = st.session_state.transcriptor.agregar
+            else:
+                st.session_state.recorder.consumidor = None
+
             # Iniciar grabación
             if st.session_state.recorder.start_recording(st.session_state.output_file, verbose=True):
                 st.session_state.is_recording = True
@@ -50,15 +77,22 @@ def handle_recording():
                     if file_size < 1024:
                         raise Exception("La grabación es demasiado corta")
 
-                    # Transcribir el audio
+                    # Transcribir el audio (en vivo solo queda pendiente el último segmento)
                     st.write("Iniciando transcripción...")
-                    transcript = transcribe_audio(st.session_state.output_file, verbose=True, use_local=False)
+                    if st.session_state.transcriptor is not None:
+                        transcript = st.session_state.transcriptor.finalizar()
+                        st.session_state.transcriptor = None
+                    else:
+                        transcript = transcribe_audio(st.session_state.output_file, verbose=True,
+                                                      use_local=TRANSCRIPCION_LOCAL)
 
                     if not transcript or transcript.strip() == "." or len(transcript.strip()) < 2:
                         raise Exception("La transcripción está vacía o no es válida")
 
                     st.session_state.text_input = transcript.strip()
                     st.session_state.recording_status = "success"
+                    if st.session_state.get("buscar_por_voz"):
+                        buscar_temas_de_voz(transcript.strip())
                 else:
                     raise Exception("No se encontró el archivo de audio")
             
@@ -79,8 +113,121 @@ def handle_recording():
         st.session_state.recording_status = f"error: {str(e)}"
         st.session_state.is_recording = False
         st.session_state.recorder.cleanup()
+        if st.session_state.transcriptor is not None:
+            st.session_state.transcriptor.cancelar()
+            st.session_state.transcriptor = None
         st.rerun()
 
+
+def buscar_temas_de_voz(transcripcion):
+    """
+    Lanza en paralelo una búsqueda por cada tema de la pregunta dictada (cada una apenas
+    el LLM escribe el tema) y calienta el embedding de la pregunta en segundo plano.
+    """
+    from pipeline_voz import buscar_temas, calentar_consulta
+
+    corpus = asyncio.run(buscar_temas(transcripcion, obtener_registro()))
+    threading.Thread(target=asyncio.run, args=(calentar_consulta(transcripcion),), daemon=True).start()
+    if corpus:
+        st.session_state.chat_history = []
+        st.session_state.termino = corpus[0].termino
+        st.session_state.temas_voz = [c.termino for c in corpus]
+
+
+@st.fragment(run_every=1)
+def mostrar_transcripcion_parcial():
+    """Muestra el texto ya transcrito mientras se sigue grabando"""
+    transcriptor = st.session_state.transcriptor
+    if transcriptor is not None and st.session_state.is_recording:
+        texto = transcriptor.texto_parcial()
+        if texto:
+            st.caption(f"Transcripción parcial: {texto}")
+
+def responder_en_flujo(pregunta, contenedor):
+    """
+    Muestra la respuesta del chain a medida que llegan los tokens y la agrega al historial.
+    Si el usuario envía otra pregunta mientras tanto, Streamlit interrumpe esta ejecución:
+    se cierra el stream del modelo y se guarda la respuesta parcial.
+    """
+    inicio = time.perf_counter()
+    primer_token = None
+    ultimo_refresco = 0.0
+    partes = []
+    completa = False
+    flujo = st.session_state.chain.stream(pregunta)
+    try:
+        for fragmento in flujo:
+            ahora = time.perf_counter()
+            if primer_token is None:
+                primer_token = ahora - inicio
+            partes.append(fragmento)
+            if ahora - ultimo_refresco >= INTERVALO_REFRESCO:
+                contenedor.markdown(f"**Asistente:** {''.join(partes)}▌")
+                ultimo_refresco = ahora
+        completa = True
+    finally:
+        flujo.close()
+        metricas = {
+            "primer_token": primer_token,
+            "total": time.perf_counter() - inicio,
+            "cancelada": not completa,
+        }
+        st.session_state.metricas.append({"pregunta": pregunta, **metricas})
+        logger.info("Pregunta respondida: primer token %s s, total %.2f s, cancelada %s",
+                    f"{primer_token:.2f}" if primer_token is not None else "-",
+                    metricas["total"], metricas["cancelada"])
+        if partes or completa:
+            contenido = "".join(partes) if completa else "".join(partes) + " _(respuesta interrumpida)_"
+            st.session_state.chat_history.append(
+                {"role": "assistant", "content": contenido, "metricas": metricas}
+            )
+    contenedor.empty()
+
+
+@st.cache_resource
+def obtener_registro():
+    """Registro de corpus y chains compartido por todas las sesiones del proceso"""
+    return RegistroCorpus()
+
+
+ESTADOS_BUSQUEDA = {
+    "en_cola": "En cola",
+    "descargando": "Descargando sentencias",
+    "indexando": "Calculando embeddings",
+    "listo": "Índice listo",
+    "cancelado": "Búsqueda cancelada",
+    "error": "Error en la búsqueda",
+}
+
+
+@st.fragment(run_every=1)
+def mostrar_progreso(termino):
+    """Muestra el avance de la búsqueda en segundo plano; se refresca cada segundo sin bloquear la página"""
+    corpus = obtener_registro().obtener(termino)
+    if corpus is None:
+        return
+    progreso = corpus.progreso
+    st.info(f"Término: {corpus.termino} · {ESTADOS_BUSQUEDA.get(progreso.estado, progreso.estado)}")
+    if progreso.paginas_total:
+        st.progress(min(progreso.paginas_procesadas / progreso.paginas_total, 1.0),
+                    text=f"Páginas procesadas: {progreso.paginas_procesadas}/{progreso.paginas_total}")
+    st.caption(f"Chunks insertados: {progreso.chunks_insertados} · Chunks con embedding: {progreso.chunks_indexados}")
+
+    if corpus.en_curso:
+        if progreso.aviso:
+            st.warning(progreso.aviso)
+        if corpus.chain is not None:
+            st.success("El chat ya está disponible con un índice parcial")
+        if st.button("Cancelar búsqueda", key="cancelar_busqueda"):
+            obtener_registro().cancelar(termino)
+    elif progreso.estado == "error":
+        st.error(f"Error al buscar sentencias: {progreso.error}")
+    elif progreso.estado == "listo" and corpus.sentencias:
+        with st.expander(f"Sentencias encontradas ({len(corpus.sentencias)})"):
+            for enlace in corpus.sentencias:
+                st.write(enlace)
+
+
 def main():
     # Inicializar el estado de la sesión
     initialize_session_state()
@@ -89,37 +236,33 @@ def main():
 
     if 'chain' not in st.session_state:
         st.session_state.chain = None
-        clear_collection()
 
     st.sidebar.header("Buscar Sentencias")
     termino_de_busqueda = st.sidebar.text_input("Ingrese el término de búsqueda", "")
+    st.sidebar.checkbox("Buscar los temas de la pregunta dictada por voz", key="buscar_por_voz")
+    if st.session_state.get("temas_voz"):
+        st.sidebar.caption("Temas detectados: " + ", ".join(st.session_state.temas_voz))
 
     if st.sidebar.button("Buscar Sentencias"):
         if termino_de_busqueda.strip():
-            st.sidebar.success(f"Buscando sentencias con el término: {termino_de_busqueda}...")
-            st.sidebar.warning("El análisis puede tomar unos minutos")
-            with st.spinner("Realizando la búsqueda..."):
-                try:
-                    # Limpiar el historial y la cadena anterior
-                    st.session_state.chat_history = []
-                    clear_collection()
-                    diccionario_relatorias = scraping_sentencias(termino_de_busqueda)
-                    st.session_state.chain = initialize_chain()
-                    st.sidebar.success("Búsqueda completada")
-                except Exception as e:
-                    st.sidebar.error(f"Error al buscar sentencias: {e}")
+            try:
+                # Limpiar el historial y lanzar (o reutilizar) la búsqueda en segundo plano
+                st.session_state.chat_history = []
+                corpus = obtener_registro().buscar(termino_de_busqueda)
+                st.session_state.termino = corpus.termino
+                if corpus.en_curso:
+                    st.sidebar.warning("La búsqueda continúa en segundo plano; puede tomar unos minutos")
+            except Exception as e:
+                st.sidebar.error(f"Error al buscar sentencias: {e}")
         else:
             st.sidebar.error("Por favor, ingrese un término de búsqueda válido")
 
     if 'termino' in st.session_state:
-        termino_de_busqueda = st.session_state.termino
-        st.sidebar.info("Resultados encontrados:")
-
-        if diccionario_relatorias:
-            for enlace, texto in diccionario_relatorias.items():
-                st.success(f"Enlace: {enlace}, Total enlaces: {len(diccionario_relatorias)}")
-        else:
-            st.error("No se encontraron resultados para este término")
+        # El chain puede ser parcial mientras la búsqueda sigue indexando
+        corpus = obtener_registro().obtener(st.session_state.termino)
+        st.session_state.chain = corpus.chain if corpus is not None else None
+        with st.sidebar:
+            mostrar_progreso(st.session_state.termino)
 
     st.subheader("Chat para Ánalisis de Sentencias")
     if 'chat_history' not in st.session_state:
@@ -151,6 +294,7 @@ def main():
         # Mostrar mensajes de estado
         if st.session_state.recording_status == "recording":
             st.info("Grabando... Presiona ⏹️ para detener", icon="🎤")
+            mostrar_transcripcion_parcial()
         elif st.session_state.recording_status == "processing":
             st.info("Procesando grabación...", icon="⌛")
         elif st.session_state.recording_status == "success":
@@ -168,13 +312,12 @@ def main():
 
             with st.spinner("Analizando la respuesta..."):
                 try:
-                    if st.session_state.chain is None:
+                    if st.session_state.chain is None and 'termino' in st.session_state:
+                        st.warning("El índice aún se está construyendo; intente de nuevo en unos segundos.")
+                    elif st.session_state.chain is None:
                         st.error("Por favor, primero realice una búsqueda de sentencias.")
                     else:
-                        result = st.session_state.chain.invoke(user_input)
-                        st.session_state.chat_history.append(
-                            {"role": "assistant", "content": result}
-                        )
+                        responder_en_flujo(user_input, st.empty())
                 except Exception as e:
                     st.session_state.chat_history.append(
                         {"role": "assistant", "content": f"Error al procesar la pregunta: {e}"}
@@ -189,6 +332,9 @@ def main():
             st.markdown(f"**Usuario:** {message['content']}")
         else:
             st.markdown(f"**Asistente:** {message['content']}")
+            metricas = message.get("metricas")
+            if metricas and metricas["primer_token"] is not None:
+                st.caption(f"Primer token: {metricas['primer_token']:.1f} s · Total: {metricas['total']:.1f} s")
 
     st.sidebar.info(
         """
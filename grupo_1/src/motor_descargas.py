@@ -0,0 +1,131 @@
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Configuración por defecto del motor de descargas
+MAX_TRABAJADORES = 16
+MAX_POR_HOST = 8
+TIMEOUT = (5, 30)  # (conexión, lectura) en segundos
+REINTENTOS = 3
+BACKOFF = 0.5
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+class MotorDescargas:
+    """
+    Descarga páginas en paralelo con un pool acotado de hilos sobre una
+    sesión HTTP compartida (conexiones keep-alive reutilizables).
+    """
+
+    def __init__(self, max_trabajadores=MAX_TRABAJADORES, max_por_host=MAX_POR_HOST,
+                 timeout=TIMEOUT, reintentos=REINTENTOS, backoff=BACKOFF):
+        self.max_trabajadores = max_trabajadores
+        self.max_por_host = max_por_host
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.backoff = backoff
+
+        # Sesión con un pool de conexiones del tamaño del pool de hilos
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_trabajadores, pool_maxsize=max_trabajadores)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._semaforos = {}
+        self._lock = threading.Lock()
+
+    def _semaforo(self, url):
+        """Retorna el semáforo que limita la concurrencia por host"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._semaforos:
+                self._semaforos[host] = threading.BoundedSemaphore(self.max_por_host)
+            return self._semaforos[host]
+
+    def descargar(self, url, headers=None):
+        """
+        Descarga una URL con reintentos y backoff exponencial.
+        Lanza requests.exceptions.RequestException si no se logra descargar.
+        """
+        intento = 0
+        while True:
+            try:
+                with self._semaforo(url):
+                    response = self.session.get(url, headers=headers, timeout=self.timeout)
+                if response.status_code not in ESTADOS_REINTENTABLES or intento >= self.reintentos:
+                    response.raise_for_status()
+                    return response
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if intento >= self.reintentos:
+                    raise
+            # Esperar antes de reintentar (backoff exponencial con jitter)
+            time.sleep(self.backoff * (2 ** intento) * (1 + random.random()))
+            intento += 1
+
+    def _descargar_seguro(self, url, headers=None):
+        try:
+            return url, self.descargar(url, headers), None
+        except requests.exceptions.RequestException as e:
+            return url, None, e
+
+    def descargar_todos(self, urls, headers_por_url=None):
+        """
+        Descarga todas las URLs en paralelo. Genera tuplas (url, respuesta, error)
+        en el mismo orden de entrada; respuesta es None cuando hubo error.
+        headers_por_url permite enviar encabezados propios a cada URL (p. ej. peticiones condicionales).
+        """
+        headers_por_url = headers_por_url or {}
+        headers = [headers_por_url.get(url) for url in urls]
+        with ThreadPoolExecutor(max_workers=self.max_trabajadores) as executor:
+            yield from executor.map(self._descargar_seguro, urls, headers)
+
+    def descargar_en_flujo(self, urls, headers_por_url=None, max_en_vuelo=None):
+        """
+        Igual que descargar_todos, pero genera cada resultado apenas termina (sin orden)
+        y nunca tiene más de max_en_vuelo descargas pendientes, para acotar la memoria.
+        """
+        headers_por_url = headers_por_url or {}
+        max_en_vuelo = max_en_vuelo or 2 * self.max_trabajadores
+        executor = ThreadPoolExecutor(max_workers=self.max_trabajadores)
+        en_vuelo = set()
+        try:
+            for url in urls:
+                en_vuelo.add(executor.submit(self._descargar_seguro, url, headers_por_url.get(url)))
+                if len(en_vuelo) >= max_en_vuelo:
+                    listos, en_vuelo = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                    for futuro in listos:
+                        yield futuro.result()
+            while en_vuelo:
+                listos, en_vuelo = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                for futuro in listos:
+                    yield futuro.result()
+        finally:
+            # Si el consumidor se detiene antes, no se lanzan las descargas que faltan
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def cerrar(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+_motor = None
+_motor_lock = threading.Lock()
+
+
+def obtener_motor():
+    """Retorna el motor compartido del proceso (reutiliza las conexiones entre búsquedas)"""
+    global _motor
+    with _motor_lock:
+        if _motor is None:
+            _motor = MotorDescargas()
+        return _motor
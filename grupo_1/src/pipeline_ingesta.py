@@ -0,0 +1,207 @@
+import hashlib
+import json
+import queue
+import threading
+
+from langchain_core.documents import Document
+from pymongo import UpdateOne
+
+from cache_sentencias import obtener_cache, sentencia_de_enlace, validadores
+from divisor_sentencias import dividir_documento
+from extractor_html import extraer_cuerpo
+from motor_descargas import obtener_motor
+
+# Configuración del pipeline de ingesta
+TAMANO_LOTE_INSERCION = 500
+MAX_COLA_CHUNKS = 2000
+_FIN = object()
+
+
+class BusquedaCancelada(Exception):
+    """Se lanza dentro del pipeline cuando se cancela la búsqueda"""
+
+
+class Progreso:
+    """Estado de una búsqueda, actualizado por el pipeline y consultado por la interfaz"""
+
+    def __init__(self):
+        self.estado = 'en_cola'
+        self.paginas_total = 0
+        self.paginas_procesadas = 0
+        self.chunks_insertados = 0
+        self.chunks_indexados = 0
+        self.error = None
+        self.aviso = None  # falla no fatal (p. ej. del indexador en segundo plano): la búsqueda continúa
+        self._cancelado = threading.Event()
+
+    def cancelar(self):
+        self._cancelado.set()
+
+    @property
+    def cancelado(self):
+        return self._cancelado.is_set()
+
+    def verificar(self):
+        """Lanza BusquedaCancelada si se pidió cancelar"""
+        if self._cancelado.is_set():
+            raise BusquedaCancelada()
+
+
+def hash_chunk(page_content, metadata):
+    """Hash del contenido de un chunk (incluye la sentencia para no mezclar documentos)"""
+    clave = metadata.get('sentencia', '') + '\x00' + page_content
+    return hashlib.sha256(clave.encode('utf-8')).hexdigest()
+
+
+def generar_textos(enlaces, motor=None, cache=None):
+    """
+    Genera (enlace, sentencia, texto) de cada relatoría a medida que está disponible:
+    primero las que están frescas en la caché y luego las descargadas (en orden de llegada).
+    """
+    motor = motor or obtener_motor()
+    cache = cache or obtener_cache()
+
+    # Consultar primero la caché de sentencias: las entradas frescas no tocan la red
+    entradas = {}
+    pendientes = []
+    for enlace in enlaces:
+        sentencia = sentencia_de_enlace(enlace)
+        entrada = cache.obtener(sentencia)
+        if entrada is not None and entrada.fresca:
+            yield enlace, sentencia, entrada.texto
+        else:
+            pendientes.append(enlace)
+            if entrada is not None:
+                entradas[enlace] = entrada
+
+    # Descargar las relatorías pendientes en paralelo (condicionales si ya estaban en caché)
+    condicionales = {enlace: validadores(entrada) for enlace, entrada in entradas.items()}
+    for enlace, nota, error in motor.descargar_en_flujo(pendientes, condicionales):
+        sentencia = sentencia_de_enlace(enlace)
+        if error is not None:
+            print(f"Error al solicitar el enlace {enlace}: {error}")
+            continue
+        if nota.status_code == 304:
+            # La página no cambió: se reutiliza el texto de la caché
+            cache.revalidar(sentencia)
+            yield enlace, sentencia, entradas[enlace].texto
+            continue
+        # Extraer el cuerpo de 'WordSection1' (o 'Section1' si no existe) en una sola pasada
+        texto = extraer_cuerpo(nota.text)
+        if texto is None:
+            print(f"Error procesando el contenido del enlace {enlace}: no se encontró WordSection1 ni Section1")
+            continue
+        cache.guardar(sentencia, texto, nota.headers.get('ETag'), nota.headers.get('Last-Modified'))
+        yield enlace, sentencia, texto
+
+
+def generar_chunks(textos):
+    """Divide cada texto en chunks listos para insertar en MongoDB"""
+    for enlace, sentencia, texto in textos:
+        doc = Document(page_content=texto, metadata={'sentencia': sentencia})
+        for chunk in dividir_documento(doc):
+            yield {
+                'page_content': chunk.page_content,
+                'metadata': chunk.metadata,
+                'type': 'Document',
+                'hash': hash_chunk(chunk.page_content, chunk.metadata),
+            }
+
+
+def exportar_jsonl(textos, nombre_json):
+    """Escribe cada texto en un archivo JSON Lines mientras lo deja pasar"""
+    with open(nombre_json, 'w', encoding='utf-8') as f:
+        for enlace, sentencia, texto in textos:
+            f.write(json.dumps({'Sentencia': sentencia, 'Texto': texto}, ensure_ascii=False) + '\n')
+            yield enlace, sentencia, texto
+
+
+class _Insertor(threading.Thread):
+    """
+    Hilo que consume chunks de una cola acotada y los inserta en lotes (bulk write sin orden).
+    Cada chunk queda marcado con el término de búsqueda; un chunk ya existente solo suma el término.
+    Después de escribir cada lote se llama a `al_insertar` con sus chunks (p. ej. el índice BM25).
+    """
+
+    def __init__(self, coleccion, termino, progreso, tamano_lote=TAMANO_LOTE_INSERCION, max_cola=MAX_COLA_CHUNKS,
+                 al_insertar=None):
+        super().__init__(daemon=True)
+        self.coleccion = coleccion
+        self.termino = termino
+        self.progreso = progreso
+        self.al_insertar = al_insertar
+        self.tamano_lote = tamano_lote
+        self.cola = queue.Queue(maxsize=max_cola)
+        self.insertados = 0
+        self.error = None
+
+    def run(self):
+        lote = []
+        while True:
+            chunk = self.cola.get()
+            if chunk is _FIN:
+                break
+            if self.error is not None:
+                continue  # seguir vaciando la cola para no bloquear al productor
+            lote.append(chunk)
+            if len(lote) >= self.tamano_lote:
+                self._escribir(lote)
+                lote = []
+        if lote and self.error is None:
+            self._escribir(lote)
+
+    def _escribir(self, lote):
+        try:
+            operaciones = [UpdateOne({'hash': chunk['hash']},
+                                     {'$setOnInsert': chunk, '$addToSet': {'terminos': self.termino}},
+                                     upsert=True) for chunk in lote]
+            resultado = self.coleccion.bulk_write(operaciones, ordered=False)
+            self.insertados += resultado.upserted_count
+            self.progreso.chunks_insertados += len(lote)
+            if self.al_insertar is not None:
+                self.al_insertar(lote)
+        except Exception as e:
+            self.error = e
+
+
+def ingerir(enlaces, coleccion, termino, nombre_json=None, motor=None, cache=None, progreso=None, al_insertar=None):
+    """
+    Pipeline en flujo: descarga -> extracción -> división -> inserción.
+    Cada etapa procesa una relatoría a la vez y la inserción corre en otro hilo,
+    así la memoria no depende del número de resultados y los primeros chunks
+    llegan a MongoDB antes de terminar las descargas.
+    El avance se reporta en `progreso`, que también permite cancelar (BusquedaCancelada);
+    `al_insertar` recibe cada lote de chunks ya escrito.
+    Retorna un diccionario {enlace: sentencia} de las relatorías procesadas.
+    """
+    progreso = progreso or Progreso()
+    coleccion.create_index('hash', unique=True)
+    coleccion.create_index('terminos')
+    procesadas = {}
+
+    enlaces = list(dict.fromkeys(enlaces))
+    progreso.paginas_total = len(enlaces)
+    textos = generar_textos(enlaces, motor, cache)
+    if nombre_json:
+        textos = exportar_jsonl(textos, nombre_json)
+
+    def registrar(textos):
+        for enlace, sentencia, texto in textos:
+            progreso.verificar()
+            procesadas[enlace] = sentencia
+            progreso.paginas_procesadas += 1
+            yield enlace, sentencia, texto
+
+    insertor = _Insertor(coleccion, termino, progreso, al_insertar=al_insertar)
+    insertor.start()
+    try:
+        for chunk in generar_chunks(registrar(textos)):
+            if insertor.error is not None:
+                break
+            insertor.cola.put(chunk)
+    finally:
+        insertor.cola.put(_FIN)
+        insertor.join()
+    if insertor.error is not None:
+        raise insertor.error
+    return procesadas
@@ -0,0 +1,53 @@
+import asyncio
+import os
+
+from deteccion_temas import temas_en_flujo
+
+# Búsquedas que se lanzan como máximo por consulta de voz
+MAX_TEMAS = int(os.getenv('MAX_TEMAS_VOZ', 3))
+
+
+async def buscar_temas(transcripcion, registro, params=None, max_temas=MAX_TEMAS, completar=None):
+    """
+    Lanza una búsqueda en segundo plano (RegistroCorpus.buscar) por cada tema apenas el
+    LLM lo termina de escribir, sin esperar al resto de la respuesta. Retorna los Corpus.
+    """
+    corpus = []
+    async for tema in temas_en_flujo(transcripcion, params, completar=completar):
+        corpus.append(await asyncio.to_thread(registro.buscar, tema))
+        if len(corpus) >= max_temas:
+            break
+    return corpus
+
+
+async def esperar_corpus(corpus):
+    """Espera a que terminen las búsquedas lanzadas (las fallidas o canceladas no interrumpen a las demás)"""
+    futuros = [asyncio.wrap_future(c.futuro) for c in corpus if c.futuro is not None]
+    await asyncio.gather(*futuros, return_exceptions=True)
+    return [c for c in corpus if c.chain is not None]
+
+
+async def calentar_consulta(transcripcion, obtener_embeddings=None):
+    """
+    Calcula y deja en la caché el embedding de la transcripción: la primera consulta del
+    retriever con esa pregunta no espera al modelo de embeddings.
+    """
+    if obtener_embeddings is None:
+        from analisisPenal import obtener_embeddings
+    await asyncio.to_thread(obtener_embeddings().embed_query, transcripcion)
+
+
+async def consulta_por_voz(ruta_audio, registro, use_local=False, params=None, max_temas=MAX_TEMAS):
+    """
+    Pipeline de voz a búsqueda: transcribe la grabación, detecta los temas en flujo, lanza
+    en paralelo una búsqueda por tema y, mientras tanto, calienta el embedding de la consulta.
+    Retorna (transcripción, Corpus con chain listo).
+    """
+    from transcribe_audio import transcribe_audio
+
+    transcripcion = await asyncio.to_thread(transcribe_audio, ruta_audio, False, use_local)
+    calentamiento = asyncio.create_task(calentar_consulta(transcripcion))
+    corpus = await buscar_temas(transcripcion, registro, params, max_temas)
+    listos = await esperar_corpus(corpus)
+    await calentamiento
+    return transcripcion, listos
@@ -0,0 +1,124 @@
+import io
+import os
+import wave
+
+import numpy as np
+
+try:
+    from scipy.signal import resample_poly
+except ImportError:  # scipy es opcional: se usa el filtro + interpolación en numpy
+    resample_poly = None
+
+try:
+    import soundfile
+except ImportError:  # sin soundfile (libsndfile) solo se puede enviar WAV
+    soundfile = None
+
+# Configuración del audio que se envía a transcribir
+RATE_TRANSCRIPCION = 16000  # Whisper trabaja a 16 kHz
+FORMATO_AUDIO = os.getenv('FORMATO_AUDIO', 'flac')  # 'flac', 'opus' o 'wav'
+RECORTAR_SILENCIO = os.getenv('RECORTAR_SILENCIO', '1') == '1'
+
+# Detección de voz por energía: son voz los tramos de VENTANA_VAD segundos cuya energía
+# supera UMBRAL_VAD_DB respecto al tramo más fuerte y FACTOR_RUIDO_VAD veces el ruido de
+# fondo (percentil 10 de las energías); se conserva MARGEN_VAD segundos alrededor
+VENTANA_VAD = 0.02
+UMBRAL_VAD_DB = -35
+FACTOR_RUIDO_VAD = 3.0
+MARGEN_VAD = 0.25
+
+# Extensión y parámetros de soundfile de cada formato
+FORMATOS = {
+    'flac': ('.flac', 'FLAC', 'PCM_16'),
+    'opus': ('.ogg', 'OGG', 'OPUS'),  # ~6x más pequeño que FLAC, pero su codificación es más lenta
+    'wav': ('.wav', None, None),
+}
+
+
+def leer_wav(ruta):
+    """Retorna (muestras float32 en [-1, 1] mono, rate) de un WAV PCM de 16 bits"""
+    with wave.open(ruta, 'rb') as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"Solo se admite PCM de 16 bits (el archivo tiene {8 * wf.getsampwidth()} bits)")
+        canales, rate = wf.getnchannels(), wf.getframerate()
+        muestras = np.frombuffer(wf.readframes(wf.getnframes()), dtype='<i2')
+    muestras = muestras.reshape(-1, canales).mean(axis=1) if canales > 1 else muestras
+    return muestras.astype(np.float32) / 32768, rate
+
+
+def _filtro_pasabajos(corte, taps=129):
+    """Filtro FIR pasabajos (sinc con ventana de Blackman); corte en fracción de la frecuencia de muestreo"""
+    n = np.arange(taps) - (taps - 1) / 2
+    h = 2 * corte * np.sinc(2 * corte * n) * np.blackman(taps)
+    return (h / h.sum()).astype(np.float32)
+
+
+def remuestrear(muestras, rate, rate_destino=RATE_TRANSCRIPCION):
+    """Cambia la frecuencia de muestreo (polifásico con scipy; si no, filtro FIR + interpolación lineal)"""
+    if rate == rate_destino or len(muestras) == 0:
+        return muestras
+    if resample_poly is not None:
+        mcd = np.gcd(rate, rate_destino)
+        return resample_poly(muestras, rate_destino // mcd, rate // mcd).astype(np.float32)
+    if rate_destino < rate:
+        # Antialiasing: eliminar lo que está por encima de la nueva frecuencia de Nyquist
+        muestras = np.convolve(muestras, _filtro_pasabajos(0.45 * rate_destino / rate), mode='same')
+    n_destino = int(round(len(muestras) * rate_destino / rate))
+    posiciones = np.arange(n_destino) * (rate / rate_destino)
+    return np.interp(posiciones, np.arange(len(muestras)), muestras).astype(np.float32)
+
+
+def recortar_silencio(muestras, rate, umbral_db=UMBRAL_VAD_DB, ventana=VENTANA_VAD, margen=MARGEN_VAD):
+    """Quita el silencio al inicio y al final según la energía de cada tramo; retorna las muestras recortadas"""
+    tamano = max(1, int(ventana * rate))
+    n_tramos = len(muestras) // tamano
+    if n_tramos == 0:
+        return muestras
+    tramos = muestras[:n_tramos * tamano].reshape(n_tramos, tamano)
+    energia = np.sqrt(np.mean(tramos.astype(np.float64) ** 2, axis=1))
+    umbral = max(energia.max() * 10 ** (umbral_db / 20), FACTOR_RUIDO_VAD * np.percentile(energia, 10), 1e-4)
+    voz = np.flatnonzero(energia > umbral)
+    if len(voz) == 0:
+        return muestras[:0]
+    inicio = max(0, voz[0] * tamano - int(margen * rate))
+    fin = min(len(muestras), (voz[-1] + 1) * tamano + int(margen * rate))
+    return muestras[inicio:fin]
+
+
+def codificar(muestras, rate, formato=FORMATO_AUDIO):
+    """Codifica las muestras en el formato indicado; retorna (bytes, extensión)"""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de audio desconocido: '{formato}' (opciones: {', '.join(FORMATOS)})")
+    extension, tipo, subtipo = FORMATOS[formato]
+    pcm = (np.clip(muestras, -1, 1) * 32767).astype('<i2')
+    salida = io.BytesIO()
+    if tipo is None or soundfile is None:
+        with wave.open(salida, 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(rate)
+            wf.writeframes(pcm.tobytes())
+        return salida.getvalue(), '.wav'
+    soundfile.write(salida, pcm, rate, format=tipo, subtype=subtipo)
+    return salida.getvalue(), extension
+
+
+def muestras_para_transcripcion(ruta, recortar=RECORTAR_SILENCIO, rate_destino=RATE_TRANSCRIPCION):
+    """Muestras float32 mono a 16 kHz de una grabación, sin silencio al inicio y al final (opcional)"""
+    muestras, rate = leer_wav(ruta)
+    muestras = remuestrear(muestras, rate, rate_destino)
+    if recortar:
+        muestras = recortar_silencio(muestras, rate_destino)
+    if len(muestras) == 0:
+        raise ValueError("La grabación no contiene voz")
+    return muestras
+
+
+def preparar_audio(ruta, formato=FORMATO_AUDIO, recortar=RECORTAR_SILENCIO, rate_destino=RATE_TRANSCRIPCION):
+    """
+    Prepara una grabación para transcribir: mono a 16 kHz, sin silencio al inicio y al
+    final (opcional) y comprimida. Retorna (bytes, extensión, segundos de audio).
+    """
+    muestras = muestras_para_transcripcion(ruta, recortar, rate_destino)
+    datos, extension = codificar(muestras, rate_destino, formato)
+    return datos, extension, len(muestras) / rate_destino
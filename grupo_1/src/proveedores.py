@@ -0,0 +1,74 @@
+import os
+
+# Proveedor y modelo del LLM del chain de análisis: 'groq', 'openai' u 'ollama'
+LLM_PROVEEDOR = os.getenv('LLM_PROVEEDOR', 'groq')
+LLM_MODELO = os.getenv('LLM_MODELO')
+# Proveedor y modelo de embeddings: 'openai' o 'nomic'
+EMBEDDINGS_PROVEEDOR = os.getenv('EMBEDDINGS_PROVEEDOR', 'openai')
+EMBEDDINGS_MODELO = os.getenv('EMBEDDINGS_MODELO')
+
+# Modelo por defecto de cada proveedor
+MODELOS_LLM = {
+    'groq': 'llama-3.1-70b-versatile',
+    'openai': 'gpt-4o',
+    'ollama': 'phi3.5',
+}
+MODELOS_EMBEDDINGS = {
+    'openai': 'text-embedding-ada-002',
+    'nomic': 'nomic-embed-text-v1.5',
+}
+
+
+def _groq(modelo):
+    from langchain_groq import ChatGroq
+    return ChatGroq(temperature=0, model=modelo)
+
+
+def _openai(modelo):
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(temperature=0, model=modelo)
+
+
+def _ollama(modelo):
+    from langchain_ollama import ChatOllama
+    return ChatOllama(model=modelo)
+
+
+def _embeddings_openai(modelo):
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings(model=modelo)
+
+
+def _embeddings_nomic(modelo):
+    from langchain_nomic import NomicEmbeddings
+    return NomicEmbeddings(model=modelo)
+
+
+FABRICAS_LLM = {'groq': _groq, 'openai': _openai, 'ollama': _ollama}
+FABRICAS_EMBEDDINGS = {'openai': _embeddings_openai, 'nomic': _embeddings_nomic}
+
+
+def _proveedor(fabricas, proveedor, tipo):
+    if proveedor not in fabricas:
+        raise ValueError(f"Proveedor de {tipo} desconocido: '{proveedor}' (opciones: {', '.join(fabricas)})")
+    return fabricas[proveedor]
+
+
+def crear_llm(proveedor=None, modelo=None):
+    """
+    Crea el LLM del proveedor configurado. Solo se importa la integración de LangChain
+    de ese proveedor, en el momento de crearlo.
+    """
+    proveedor = proveedor or LLM_PROVEEDOR
+    fabrica = _proveedor(FABRICAS_LLM, proveedor, 'LLM')
+    return fabrica(modelo or LLM_MODELO or MODELOS_LLM[proveedor])
+
+
+def crear_embeddings(proveedor=None, modelo=None):
+    """Crea el modelo de embeddings configurado. Retorna (modelo, nombre del espacio vectorial)"""
+    proveedor = proveedor or EMBEDDINGS_PROVEEDOR
+    fabrica = _proveedor(FABRICAS_EMBEDDINGS, proveedor, 'embeddings')
+    modelo = modelo or EMBEDDINGS_MODELO or MODELOS_EMBEDDINGS[proveedor]
+    # El espacio identifica los vectores en la caché: dos modelos distintos no se mezclan
+    espacio = modelo if proveedor == 'openai' else f'{proveedor}/{modelo}'
+    return fabrica(modelo), espacio
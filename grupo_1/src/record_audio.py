@@ -1,23 +1,100 @@
-import pyaudio
 import wave
 import os
+import threading
+import time
 from rich.console import Console
 
+try:
+    import pyaudio
+except ImportError:  # sin pyaudio no hay micrófono, pero el modo en flujo se puede alimentar a mano
+    pyaudio = None
+
 console = Console()
 
 # Configuración de audio
-FORMAT = pyaudio.paInt16
+FORMAT = 8  # pyaudio.paInt16
+SAMPLE_WIDTH = 2  # bytes por muestra de paInt16
 CHANNELS = 1
 RATE = 44100
 CHUNK = 1024
+PA_CONTINUE = 0  # pyaudio.paContinue
+
+# Segundos de audio que caben en el buffer circular del modo en flujo
+SEGUNDOS_BUFFER = 5
+
+
+class BufferCircular:
+    """
+    Buffer circular de bytes para un productor (el callback de audio) y un consumidor
+    (el hilo escritor), sin locks: cada contador lo modifica un único hilo y se publica
+    después de copiar los datos. Si el buffer está lleno, escribir descarta el bloque.
+    """
+
+    def __init__(self, capacidad):
+        self.capacidad = capacidad
+        self._datos = bytearray(capacidad)
+        self._escritos = 0  # total de bytes escritos (solo lo modifica el productor)
+        self._leidos = 0  # total de bytes leídos (solo lo modifica el consumidor)
+
+    def __len__(self):
+        return self._escritos - self._leidos
+
+    def escribir(self, datos):
+        """Copia los datos al buffer; retorna False (sin copiar nada) si no caben"""
+        n = len(datos)
+        if n > self.capacidad - len(self):
+            return False
+        inicio = self._escritos % self.capacidad
+        primero = min(n, self.capacidad - inicio)
+        vista = memoryview(datos)
+        self._datos[inicio:inicio + primero] = vista[:primero]
+        self._datos[:n - primero] = vista[primero:]
+        self._escritos += n
+        return True
+
+    def leer(self):
+        """Retorna los bytes pendientes como a lo sumo dos vistas sobre el buffer y los marca como leídos"""
+        n = len(self)
+        if n == 0:
+            return []
+        inicio = self._leidos % self.capacidad
+        primero = min(n, self.capacidad - inicio)
+        vista = memoryview(self._datos)
+        partes = [vista[inicio:inicio + primero]]
+        if n > primero:
+            partes.append(vista[:n - primero])
+        return partes
+
+    def liberar(self, n):
+        """Marca como leídos n bytes (después de consumir las vistas de leer)"""
+        self._leidos += n
+
 
 class AudioRecorder:
-    def __init__(self):
+    """
+    Graba del micrófono a un archivo WAV. En modo en flujo (por defecto) el callback copia
+    cada bloque a un BufferCircular y un hilo escritor lo vuelca al archivo: la memoria es
+    constante sin importar la duración y detener la grabación solo escribe lo pendiente.
+    Con streaming=False se acumulan los bloques en memoria y se guardan al detener.
+    En modo en flujo, `consumidor` (si se asigna) recibe desde el hilo escritor cada bloque
+    escrito, p. ej. TranscriptorEnVivo.agregar.
+    """
+
+    def __init__(self, streaming=True, segundos_buffer=SEGUNDOS_BUFFER, consumidor=None):
         self.is_recording = False
+        self.streaming = streaming
+        self.consumidor = consumidor
+        self.segundos_buffer = segundos_buffer
         self.frames = []
         self.output_file = None
         self.stream = None
         self.pyaudio = None
+        self.buffer = None
+        self.bytes_escritos = 0
+        self.bloques_perdidos = 0
+        self._wav = None
+        self._escritor = None
+        self._detener_escritor = threading.Event()
 
     def start_recording(self, output_file, verbose=False):
         # Limpiar estado anterior
@@ -32,6 +109,9 @@ class AudioRecorder:
             console.print("[yellow]Iniciando grabación...[/yellow]")
 
         try:
+            if pyaudio is None:
+                raise Exception("pyaudio no está instalado")
+            self.preparar_escritura()
             self.pyaudio = pyaudio.PyAudio()
 
             # Obtener información del dispositivo de entrada predeterminado
@@ -65,11 +145,70 @@ class AudioRecorder:
             self.cleanup()
             raise Exception(f"Error en la grabación de audio: {str(e)}")
 
+    def preparar_escritura(self):
+        """
+        En modo en flujo abre el archivo WAV y arranca el hilo escritor. Tras llamarla
+        (y poner is_recording en True) el callback se puede alimentar sin micrófono.
+        """
+        if not self.streaming:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.output_file)), exist_ok=True)
+        self._wav = wave.open(self.output_file, "wb")
+        self._wav.setnchannels(CHANNELS)
+        self._wav.setsampwidth(SAMPLE_WIDTH)
+        self._wav.setframerate(RATE)
+        self.buffer = BufferCircular(int(self.segundos_buffer * RATE) * CHANNELS * SAMPLE_WIDTH)
+        self.bytes_escritos = 0
+        self.bloques_perdidos = 0
+        self._detener_escritor.clear()
+        self._escritor = threading.Thread(target=self._escribir_en_flujo, daemon=True)
+        self._escritor.start()
+
+    def _escribir_en_flujo(self):
+        """Hilo escritor: vuelca el buffer circular al WAV hasta que se detiene la grabación"""
+        espera = CHUNK / RATE / 2
+        while True:
+            detener = self._detener_escritor.is_set()
+            partes = self.buffer.leer()
+            for parte in partes:
+                self._wav.writeframesraw(parte)
+                self._consumir(parte)
+                self.buffer.liberar(len(parte))
+                self.bytes_escritos += len(parte)
+            if detener:
+                break
+            if not partes:
+                time.sleep(espera)
+
+    def _consumir(self, parte):
+        if self.consumidor is None:
+            return
+        try:
+            self.consumidor(parte)
+        except Exception as e:
+            # La grabación continúa aunque falle el consumidor
+            console.print(f"[red]Error en el consumidor de audio: {str(e)}[/red]")
+            self.consumidor = None
+
+    def _finalizar_escritura(self):
+        """Espera a que el escritor vacíe el buffer y cierra el WAV (actualiza la cabecera)"""
+        if self._escritor is not None:
+            self._detener_escritor.set()
+            self._escritor.join()
+            self._escritor = None
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
     def _audio_callback(self, in_data, frame_count, time_info, status):
         """Callback para la grabación de audio"""
         if self.is_recording:
-            self.frames.append(in_data)
-        return (in_data, pyaudio.paContinue)
+            if self.streaming:
+                if not self.buffer.escribir(in_data):
+                    self.bloques_perdidos += 1
+            else:
+                self.frames.append(in_data)
+        return (None, PA_CONTINUE)
             
     def _save_audio_file(self, verbose=False):
         """Guarda el archivo de audio"""
@@ -94,18 +233,17 @@ class AudioRecorder:
                 self.pyaudio.terminate()
                 self.pyaudio = None
 
-            # Preparar los datos de audio
-            audio_data = b"".join(self.frames)
-            if len(audio_data) == 0:
+            # Guardar el archivo (bloque a bloque, sin concatenar el audio en memoria)
+            if not any(self.frames):
                 raise Exception("No se grabaron datos de audio")
-
-            # Guardar el archivo
             wf = wave.open(self.output_file, "wb")
             wf.setnchannels(CHANNELS)
-            wf.setsampwidth(pyaudio.get_sample_size(FORMAT))
+            wf.setsampwidth(SAMPLE_WIDTH)
             wf.setframerate(RATE)
-            wf.writeframes(b"".join(self.frames))
+            for frame in self.frames:
+                wf.writeframesraw(frame)
             wf.close()
+            self.frames = []
 
             # Verificar que el archivo se guardó correctamente
             if not os.path.exists(self.output_file):
@@ -132,6 +270,12 @@ class AudioRecorder:
     def stop_recording(self):
         """Detiene la grabación"""
         self.is_recording = False
+        if self.streaming:
+            self._cerrar_stream()
+            self._finalizar_escritura()
+            if self.bloques_perdidos:
+                console.print(f"[red]Se perdieron {self.bloques_perdidos} bloques de audio (buffer lleno)[/red]")
+            return self.bytes_escritos > 0
         if self.frames:
             self._save_audio_file(verbose=True)
             return True
@@ -141,11 +285,7 @@ class AudioRecorder:
         """Retorna el estado de la grabación"""
         return self.is_recording
 
-    def cleanup(self):
-        """
-        Limpia los recursos de audio
-        """
-        self.is_recording = False
+    def _cerrar_stream(self):
         if self.stream:
             try:
                 self.stream.stop_stream()
@@ -159,6 +299,14 @@ class AudioRecorder:
             except:
                 pass
             self.pyaudio = None
+
+    def cleanup(self):
+        """
+        Limpia los recursos de audio
+        """
+        self.is_recording = False
+        self._cerrar_stream()
+        self._finalizar_escritura()
         self.frames = []
 
 def record_audio(output_file, verbose=False):
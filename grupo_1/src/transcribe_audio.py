@@ -1,30 +1,62 @@
-from litellm import transcription
+import io
+
 from rich.console import Console
 
+from preparar_audio import FORMATO_AUDIO, RATE_TRANSCRIPCION, RECORTAR_SILENCIO, codificar, preparar_audio
+
 console = Console()
 
 
-def transcribe_audio(audio_file_path, verbose, use_local):
+def transcribe_audio(audio_file_path, verbose, use_local, formato=FORMATO_AUDIO, recortar=RECORTAR_SILENCIO):
     if verbose:
         console.print("[yellow]Attempting to run transcription[/yellow]")
 
     if use_local:
-        pass
+        response = transcribe_local(audio_file_path, recortar, verbose)
     else:
-        response = transcribe_hosted(audio_file_path)
+        response = transcribe_hosted(audio_file_path, formato, recortar, verbose)
 
     # for debugging
     # print(f"Transcription: {response}")
     return response
 
 
-def transcribe_hosted(audio_file_path):
-    with open(audio_file_path, "rb") as audio_file:
-        response = transcription(
-            model="groq/whisper-large-v3-turbo",
-            file=audio_file,
-            prompt="Specify context or spelling",
-            temperature=0,
-            response_format="json",
-        )
+def transcribe_local(audio_file_path, recortar=RECORTAR_SILENCIO, verbose=False):
+    # Modelo Whisper cuantizado en CPU; se carga en la primera llamada y queda residente
+    from transcripcion_local import transcribir_local
+    texto, segundos, duracion = transcribir_local(audio_file_path, recortar=recortar)
+    if verbose:
+        console.print(f"Transcripción local: {segundos:.1f} s de audio en {duracion:.2f} s")
+    return texto
+
+
+def transcribe_samples(samples, use_local, formato=FORMATO_AUDIO):
+    """Transcribe muestras float32 a 16 kHz (p. ej. un segmento de la transcripción en vivo)"""
+    if use_local:
+        from transcripcion_local import transcribir_local
+        return transcribir_local(samples)[0]
+    datos, extension = codificar(samples, RATE_TRANSCRIPCION, formato)
+    return _transcribe_upload(datos, extension)
+
+
+def transcribe_hosted(audio_file_path, formato=FORMATO_AUDIO, recortar=RECORTAR_SILENCIO, verbose=False):
+    # Se envía audio de voz a 16 kHz, sin silencios en los extremos y comprimido (FLAC por defecto)
+    datos, extension, segundos = preparar_audio(audio_file_path, formato, recortar)
+    if verbose:
+        console.print(f"Audio preparado: {segundos:.1f} s, {len(datos)} bytes ({extension})")
+    return _transcribe_upload(datos, extension)
+
+
+def _transcribe_upload(datos, extension):
+    from litellm import transcription
+
+    audio_file = io.BytesIO(datos)
+    audio_file.name = "audio" + extension
+    response = transcription(
+        model="groq/whisper-large-v3-turbo",
+        file=audio_file,
+        prompt="Specify context or spelling",
+        temperature=0,
+        response_format="json",
+    )
     return response["text"]
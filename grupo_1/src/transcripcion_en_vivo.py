@@ -0,0 +1,145 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from preparar_audio import FACTOR_RUIDO_VAD, VENTANA_VAD, remuestrear
+
+# Segmentación de la voz en vivo (segundos)
+MIN_SEGMENTO = 4.0  # no se corta un segmento antes de esta duración (Whisper necesita contexto)
+MAX_SEGMENTO = 25.0  # se corta aunque no haya pausa (acota la latencia del último segmento)
+SILENCIO_CORTE = 0.5  # pausa que cierra un segmento
+# Subida por tramo del estimado de ruido de fondo (sigue al mínimo de la energía, sube despacio)
+SUBIDA_PISO = 1.002
+ENERGIA_MINIMA = 1e-4
+# Segmentos que se transcriben a la vez
+MAX_TRANSCRIPCIONES = 2
+
+
+class SegmentadorVAD:
+    """
+    Divide en segmentos el audio PCM de 16 bits que llega por bloques. Un segmento se cierra
+    en la primera pausa de SILENCIO_CORTE después de MIN_SEGMENTO, o al llegar a MAX_SEGMENTO.
+    La voz se detecta por energía frente a un estimado del ruido de fondo que se adapta solo.
+    """
+
+    def __init__(self, rate, min_segmento=MIN_SEGMENTO, max_segmento=MAX_SEGMENTO,
+                 silencio_corte=SILENCIO_CORTE, ventana=VENTANA_VAD):
+        self.rate = rate
+        self.tamano_tramo = max(1, int(ventana * rate))
+        self.min_muestras = int(min_segmento * rate)
+        self.max_muestras = int(max_segmento * rate)
+        self.silencio_corte = int(silencio_corte * rate)
+        self.piso = None
+        self._pendiente = bytearray()  # bytes que aún no completan un tramo
+        self._tramos = []
+        self._muestras = 0
+        self._silencio = 0  # muestras de silencio seguidas al final del segmento
+        self._hubo_voz = False
+
+    def _es_voz(self, energia):
+        if self.piso is None or energia < self.piso:
+            self.piso = energia
+        else:
+            self.piso *= SUBIDA_PISO
+        return energia > max(FACTOR_RUIDO_VAD * self.piso, ENERGIA_MINIMA)
+
+    def agregar(self, datos):
+        """Agrega bytes PCM; retorna los segmentos (int16) que quedaron completos"""
+        self._pendiente += datos
+        tamano_bytes = 2 * self.tamano_tramo
+        n = len(self._pendiente) // tamano_bytes
+        if n == 0:
+            return []
+        tramos = np.frombuffer(bytes(self._pendiente[:n * tamano_bytes]), dtype='<i2').reshape(n, self.tamano_tramo)
+        del self._pendiente[:n * tamano_bytes]
+        energias = np.sqrt(np.mean((tramos.astype(np.float32) / 32768) ** 2, axis=1))
+
+        segmentos = []
+        for tramo, energia in zip(tramos, energias):
+            self._tramos.append(tramo)
+            self._muestras += self.tamano_tramo
+            if self._es_voz(energia):
+                self._hubo_voz = True
+                self._silencio = 0
+            else:
+                self._silencio += self.tamano_tramo
+            pausa = self._muestras >= self.min_muestras and self._silencio >= self.silencio_corte
+            if pausa or self._muestras >= self.max_muestras:
+                segmento = self._emitir()
+                if segmento is not None:
+                    segmentos.append(segmento)
+        return segmentos
+
+    def _emitir(self):
+        """Cierra el segmento actual; retorna None si no contenía voz"""
+        segmento = np.concatenate(self._tramos) if self._hubo_voz else None
+        self._tramos = []
+        self._muestras = 0
+        self._silencio = 0
+        self._hubo_voz = False
+        return segmento
+
+    def cerrar(self):
+        """Retorna el último segmento (incluye los bytes que no completaban un tramo) o None"""
+        if self._pendiente:
+            resto = np.frombuffer(bytes(self._pendiente[:len(self._pendiente) // 2 * 2]), dtype='<i2')
+            self._tramos.append(resto)
+            self._pendiente = bytearray()
+        return self._emitir()
+
+
+class TranscriptorEnVivo:
+    """
+    Transcribe la voz mientras se graba: cada segmento que cierra el SegmentadorVAD se
+    transcribe en segundo plano y los textos se unen en orden. Al detener la grabación
+    solo queda pendiente el último segmento, de duración acotada.
+    `transcribir` recibe muestras float32 a 16 kHz y retorna el texto.
+    """
+
+    def __init__(self, transcribir, rate, segmentador=None, max_transcripciones=MAX_TRANSCRIPCIONES):
+        self.transcribir = transcribir
+        self.rate = rate
+        self.segmentador = segmentador or SegmentadorVAD(rate)
+        self.segmentos = 0
+        self._futuros = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_transcripciones, thread_name_prefix='transcripcion')
+
+    def agregar(self, datos):
+        """Recibe bytes PCM de la grabación (se llama desde el hilo escritor de AudioRecorder)"""
+        with self._lock:
+            for segmento in self.segmentador.agregar(datos):
+                self._enviar(segmento)
+
+    def _enviar(self, segmento):
+        self.segmentos += 1
+        self._futuros.append(self._executor.submit(self._transcribir_segmento, segmento))
+
+    def _transcribir_segmento(self, segmento):
+        muestras = remuestrear(segmento.astype(np.float32) / 32768, self.rate)
+        return self.transcribir(muestras).strip()
+
+    def texto_parcial(self):
+        """Texto de los segmentos ya transcritos, en orden, hasta el primero que falte"""
+        partes = []
+        for futuro in list(self._futuros):
+            if not futuro.done():
+                break
+            if futuro.exception() is None:
+                partes.append(futuro.result())
+        return ' '.join(parte for parte in partes if parte)
+
+    def finalizar(self):
+        """Envía el último segmento, espera todas las transcripciones y retorna el texto completo"""
+        with self._lock:
+            ultimo = self.segmentador.cerrar()
+            if ultimo is not None:
+                self._enviar(ultimo)
+        try:
+            return ' '.join(texto for texto in (futuro.result() for futuro in self._futuros) if texto)
+        finally:
+            self._executor.shutdown()
+
+    def cancelar(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,46 @@
+import os
+import threading
+import time
+
+from preparar_audio import RATE_TRANSCRIPCION, RECORTAR_SILENCIO, muestras_para_transcripcion
+
+# Configuración del modelo local (faster-whisper, CTranslate2 cuantizado en CPU)
+MODELO_LOCAL = os.getenv('WHISPER_LOCAL_MODELO', 'small')  # tiny, base, small, medium, large-v3 o una ruta
+TIPO_COMPUTO = os.getenv('WHISPER_LOCAL_COMPUTO', 'int8')
+HILOS = int(os.getenv('WHISPER_LOCAL_HILOS', 0))  # 0 = todos los núcleos
+TAMANO_BEAM = int(os.getenv('WHISPER_LOCAL_BEAM', 1))  # 1 = greedy, lo más rápido en CPU
+IDIOMA = os.getenv('WHISPER_LOCAL_IDIOMA', 'es')
+
+_modelo = None
+_modelo_lock = threading.Lock()
+# CTranslate2 ya paraleliza cada transcripción en HILOS núcleos: se atiende una a la vez
+_transcripcion_lock = threading.Lock()
+
+
+def obtener_modelo_local(modelo=MODELO_LOCAL, hilos=HILOS, tipo_computo=TIPO_COMPUTO):
+    """Carga el modelo Whisper local una sola vez por proceso y lo deja residente"""
+    global _modelo
+    with _modelo_lock:
+        if _modelo is None:
+            try:
+                from faster_whisper import WhisperModel
+            except ImportError:
+                raise Exception("La transcripción local requiere faster-whisper (pip install faster-whisper)")
+            _modelo = WhisperModel(modelo, device='cpu', compute_type=tipo_computo, cpu_threads=hilos)
+        return _modelo
+
+
+def transcribir_local(audio, tamano_beam=TAMANO_BEAM, idioma=IDIOMA, recortar=RECORTAR_SILENCIO):
+    """
+    Transcribe una grabación (ruta de un WAV o muestras float32 a 16 kHz) con el modelo
+    residente. Retorna (texto, segundos de audio, segundos de transcripción).
+    """
+    muestras = muestras_para_transcripcion(audio, recortar) if isinstance(audio, str) else audio
+    modelo = obtener_modelo_local()
+    with _transcripcion_lock:
+        inicio = time.perf_counter()
+        segmentos, _ = modelo.transcribe(muestras, language=idioma, beam_size=tamano_beam,
+                                         condition_on_previous_text=False)
+        # Los segmentos se generan de forma perezosa: la transcripción ocurre al recorrerlos
+        texto = ' '.join(segmento.text.strip() for segmento in segmentos)
+        return texto, len(muestras) / RATE_TRANSCRIPCION, time.perf_counter() - inicio
@@ -1,12 +1,13 @@
 import argparse
+import asyncio
 import json
 from datetime import datetime
 
-import litellm
 from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
 
+from deteccion_temas import detectar_temas
 from record_audio import record_audio
 from transcribe_audio import transcribe_audio
 
@@ -21,30 +22,16 @@ ASCII_ART = r"""
 |___/ \___||_| |_| \__|\___||_| |_| \___|\____/ \_/ \_/
 by UdeMedellín (entrada de voz)
 """
-console.print(Text(ASCII_ART, style="bold blue"))
-
-# information about the model
-params = {"model": "groq/llama-3.1-70b-versatile", "temperature": 0.3, "stream": True}
-
-
-def detect_topic(text, params) -> str:
-    prompt = f"""
-    Please identify the main topic the user want to know about in the following text. Respond in JSON format using this schema: {{"topics": ["topic1", "topic2", ...]}} with no preamble or additional text.
-    
-    **User Query:** {text}
-    """
-    params["messages"] = [{"role": "user", "content": prompt}]
-    response = litellm.completion(**params)
-    assistant_message = ""
-    for chunk in response:
-        content = chunk.choices[0].delta.content
-        if content:
-            assistant_message += content
-    assistant_message.strip()
-    # Parse the string into a dictionary
-    data_dict = json.loads(assistant_message)
+
+# information about the model (valores por defecto; cada llamada usa su propia copia)
+params = {"model": "groq/llama-3.1-70b-versatile", "temperature": 0.3}
+
+
+def detect_topic(text, params=params) -> str:
+    # Respuesta en flujo con parser incremental y caché por transcripción (ver deteccion_temas)
+    topics = detectar_temas(text, params)
     # Pretty-print the JSON object
-    pretty_json = json.dumps(data_dict, indent=4, ensure_ascii=False)
+    pretty_json = json.dumps({"topics": topics}, indent=4, ensure_ascii=False)
     return pretty_json
 
 
@@ -71,17 +58,31 @@ def display_rich_output(transcript, topics) -> None:
 
 
 def main() -> None:
+    console.print(Text(ASCII_ART, style="bold blue"))
     parser = argparse.ArgumentParser(description="Voice Assistant")
     parser.add_argument(
         "--local", action="store_true", help="Use local transcription model"
     )
+    parser.add_argument(
+        "--buscar", action="store_true", help="Buscar sentencias de cada tema detectado"
+    )
     args = parser.parse_args()
 
     timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
     output_file = f"record-{timestamp}.wav"
+    # record_audio inicia la grabación y, en la segunda llamada, la detiene
+    record_audio(output_file, verbose=True)
+    input("Presiona Enter para detener la grabación...")
     record_audio(output_file, verbose=True)
-    transcript = transcribe_audio(output_file, verbose=True, use_local=args.local)
-    topics = detect_topic(transcript, params)
+
+    if args.buscar:
+        from corpus_compartido import RegistroCorpus
+        from pipeline_voz import consulta_por_voz
+        transcript, corpus = asyncio.run(consulta_por_voz(output_file, RegistroCorpus(), use_local=args.local))
+        topics = json.dumps({"topics": [c.termino for c in corpus]}, indent=4, ensure_ascii=False)
+    else:
+        transcript = transcribe_audio(output_file, verbose=True, use_local=args.local)
+        topics = detect_topic(transcript, params)
 
     display_rich_output(transcript, topics)
 
@@ -0,0 +1,56 @@
+"""
+Benchmark del bosque compilado (bosque_compilado.py) frente a
+model.predict(scaler.transform(X)) de sklearn, para lotes de 1 a 1M filas.
+
+    python grupo_2/benchmarks/bench_bosque.py --lotes 1 10 100 1000 10000 100000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from datos_sinteticos import entrenar_modelo, generar_transacciones
+from bosque_compilado import compilar_bosque
+from preprocesamiento import caracteristicas, feature_names
+
+
+def medir(funcion, minimo=1.0):
+    """Segundos por llamada: repite durante al menos `minimo` segundos (y al menos 3 veces)"""
+    funcion()
+    repeticiones = 0
+    inicio = time.perf_counter()
+    while repeticiones < 3 or time.perf_counter() - inicio < minimo:
+        funcion()
+        repeticiones += 1
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del bosque compilado")
+    parser.add_argument("--lotes", type=int, nargs="+", default=[1, 10, 100, 1000, 10000, 100000, 1000000])
+    parser.add_argument("--arboles", type=int, default=100)
+    parser.add_argument("--hilos", type=int, default=0, help="hilos del bosque compilado (0 = todos)")
+    args = parser.parse_args()
+
+    model, scaler = entrenar_modelo(arboles=args.arboles)
+    model.n_jobs = -1
+    inicio = time.perf_counter()
+    bosque = compilar_bosque(model, scaler)
+    print(f"Compilación: {bosque.n_arboles} árboles, {len(bosque.caracteristica):,} nodos, "
+          f"profundidad {bosque.profundidad}, {time.perf_counter() - inicio:.2f} s")
+
+    datos = caracteristicas(generar_transacciones(max(args.lotes), np.random.default_rng(3)))
+    X = datos.to_numpy(dtype=np.float64)
+    print(f"{'filas':>9}  {'sklearn':>12}  {'compilado':>12}  {'aceleración':>11}  {'filas/s compilado':>18}")
+    for n in args.lotes:
+        lote, marco = X[:n], datos.iloc[:n]
+        t_sklearn = medir(lambda: model.predict(scaler.transform(marco)))
+        t_bosque = medir(lambda: bosque.predict(lote, hilos=args.hilos))
+        assert np.array_equal(bosque.predict(lote), model.predict(scaler.transform(pd.DataFrame(lote, columns=feature_names))))
+        print(f"{n:9,}  {t_sklearn * 1000:9.2f} ms  {t_bosque * 1000:9.2f} ms  {t_sklearn / t_bosque:10.1f}x  "
+              f"{n / t_bosque:18,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark del entrenamiento fuera de memoria (entrenamiento.py) frente al camino del
+notebook: leer Fraud.csv completo con pandas, `.map` de `type`, submuestrear las normales,
+dividir, escalar y entrenar. Cada modo corre en un subproceso para medir su tiempo y su
+pico de memoria (VmHWM) por separado; "cache" es un reentrenamiento con el Parquet ya
+construido.
+
+    python grupo_2/benchmarks/bench_entrenamiento.py --filas 2000000 6500000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from bench_lotes import pico_rss_mb
+from datos_sinteticos import escribir_csv
+
+
+def ingenuo(csv, salida, arboles, semilla, n_jobs):
+    """Los pasos del notebook, con todo el CSV en memoria"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    from entrenamiento import guardar_artefactos
+    from preprocesamiento import feature_names
+
+    df = pd.read_csv(csv)
+    df = df.drop(['nameOrig', 'nameDest', 'newbalanceOrig', 'newbalanceDest'], axis=1)
+    df['type'] = df['type'].map({'CASH_OUT': 5, 'PAYMENT': 4, 'CASH_IN': 3, 'TRANSFER': 2, 'DEBIT': 1})
+    fraud_transaction = df[df['isFraud'] == 1]
+    normal_transaction = df[df['isFraud'] == 0].sample(n=len(fraud_transaction), random_state=semilla)
+    new_df = pd.concat([normal_transaction, fraud_transaction], axis=0)
+    X, y = new_df[feature_names], new_df['isFraud']
+    x_train, x_test, y_train, y_test = train_test_split(X, y, test_size=0.2, stratify=y, random_state=semilla)
+    scaler = StandardScaler().fit(x_train)
+    model = RandomForestClassifier(n_estimators=arboles, n_jobs=n_jobs, random_state=semilla)
+    model.fit(scaler.transform(x_train), y_train)
+    exactitud = model.score(scaler.transform(x_test), y_test)
+    guardar_artefactos(model, scaler, salida)
+    return {'muestra': len(new_df), 'exactitud': exactitud}
+
+
+def ejecutar_modo(args):
+    inicio = time.perf_counter()
+    if args.modo == 'ingenuo':
+        resumen = ingenuo(args.csv, args.salida, args.arboles, 0, args.n_jobs)
+    else:
+        from entrenamiento import entrenar_desde_csv
+
+        resultado = entrenar_desde_csv(args.csv, args.cache, args.salida, arboles=args.arboles,
+                                       n_jobs=args.n_jobs, tamano_bloque=args.bloque)
+        resumen = {'muestra': resultado['muestra'], 'exactitud': resultado['metricas']['exactitud'],
+                   'cache_construido': resultado['cache_construido']}
+    resumen['segundos'] = time.perf_counter() - inicio
+    resumen['rss_mb'] = pico_rss_mb()
+    print(json.dumps(resumen))
+
+
+def medir(modo, csv, cache, directorio, arboles, n_jobs, bloque):
+    comando = [sys.executable, __file__, '--modo', modo, '--csv', csv, '--cache', cache,
+               '--salida', os.path.join(directorio, modo), '--arboles', str(arboles), '--n-jobs', str(n_jobs),
+               '--bloque', str(bloque)]
+    salida = subprocess.run(comando, capture_output=True, text=True, check=True).stdout
+    return json.loads(salida.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del entrenamiento fuera de memoria")
+    parser.add_argument("--filas", type=int, nargs="+", default=[2000000])
+    parser.add_argument("--arboles", type=int, default=100)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--bloque", type=int, default=500000)
+    parser.add_argument("--modo", choices=['ingenuo', 'cache'], help=argparse.SUPPRESS)
+    parser.add_argument("--csv", help=argparse.SUPPRESS)
+    parser.add_argument("--cache", help=argparse.SUPPRESS)
+    parser.add_argument("--salida", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.modo:
+        return ejecutar_modo(args)
+
+    print(f"{'filas':>10}  {'modo':>14}  {'tiempo':>8}  {'pico RSS':>9}  {'muestra':>8}  {'exactitud':>9}")
+    for filas in args.filas:
+        with tempfile.TemporaryDirectory() as directorio:
+            csv = escribir_csv(os.path.join(directorio, 'Fraud.csv'), filas)
+            cache = os.path.join(directorio, 'Fraud.parquet')
+            # El segundo "cache" reutiliza el Parquet construido por el primero
+            for modo, nombre in (('ingenuo', 'ingenuo'), ('cache', 'cache (nuevo)'), ('cache', 'reentrenamiento')):
+                r = medir(modo, csv, cache, directorio, args.arboles, args.n_jobs, args.bloque)
+                print(f"{filas:10,}  {nombre:>14}  {r['segundos']:6.1f} s  {r['rss_mb']:6.0f} MB  "
+                      f"{r['muestra']:8,}  {r['exactitud']:9.2%}")
+            print(f"{'':>10}  CSV {os.path.getsize(csv) / 2 ** 20:,.0f} MB, cache Parquet "
+                  f"{os.path.getsize(cache) / 2 ** 20:,.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
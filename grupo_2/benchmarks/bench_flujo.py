@@ -0,0 +1,155 @@
+"""
+Benchmark del motor de características por cuenta (caracteristicas_flujo.py):
+
+1. Verifica las características contra una implementación de referencia fila por fila
+   (diccionario por cuenta) en un flujo con muchas cuentas repetidas, también con la tabla
+   hash creciendo desde 16 posiciones y con desalojo de cuentas.
+2. Mide las transacciones por segundo de MotorCaracteristicas.procesar sobre un flujo con
+   millones de cuentas distintas, la memoria del estado y las cuentas desalojadas, para
+   varios límites de cuentas (el pico de RSS es del proceso, acumulado entre límites).
+3. Entrena con y sin las características del flujo (entrenamiento.py --flujo) y puntúa el
+   archivo con los vectores enriquecidos (puntuar_lotes.py --flujo).
+
+    python grupo_2/benchmarks/bench_flujo.py --transacciones 10000000 --cuentas 5000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from bench_lotes import pico_rss_mb
+from datos_sinteticos import escribir_csv, generar_transacciones
+from caracteristicas_flujo import CARACTERISTICAS_FLUJO, EstadoCuentas, MotorCaracteristicas
+
+
+def referencia(datos, media_vida):
+    """Las mismas características con un diccionario por cuenta, una transacción a la vez"""
+    estado = {}
+    filas = []
+    for t in datos.itertuples(index=False):
+        fila = {'error_saldo_origen': t.newbalanceOrig + t.amount - t.oldbalanceOrg,
+                'error_saldo_destino': t.oldbalanceDest + t.amount - t.newbalanceDest}
+        for rol, nombre, inicial, final, campo in (('origen', t.nameOrig, t.oldbalanceOrg, t.newbalanceOrig, 'envios'),
+                                                   ('destino', t.nameDest, t.oldbalanceDest, t.newbalanceDest, 'recepciones')):
+            cuenta = estado.setdefault(nombre, {'paso': -1, 'saldo': 0.0, 'envios': 0.0, 'monto_enviado': 0.0,
+                                                'recepciones': 0.0, 'monto_recibido': 0.0})
+            decaimiento = 2 ** ((cuenta['paso'] - t.step) / media_vida)
+            for suma in ('envios', 'monto_enviado', 'recepciones', 'monto_recibido'):
+                cuenta[suma] *= decaimiento
+            conocida = cuenta['paso'] >= 0
+            fila[f'pasos_desde_ultima_{rol}'] = t.step - cuenta['paso'] if conocida else -1
+            fila[f'diferencia_saldo_{rol}'] = inicial - cuenta['saldo'] if conocida else 0.0
+            monto = 'monto_enviado' if campo == 'envios' else 'monto_recibido'
+            fila[f'{campo}_{rol}'], fila[f'{monto}_{rol}'] = cuenta[campo], cuenta[monto]
+            cuenta[campo] += 1
+            cuenta[monto] += t.amount
+            cuenta['paso'], cuenta['saldo'] = t.step, final
+        filas.append(fila)
+    return pd.DataFrame(filas)[CARACTERISTICAS_FLUJO]
+
+
+def verificar(bloque=7000):
+    """
+    Compara con la referencia con la tabla inicial por defecto, creciendo desde 16 posiciones
+    y con desalojo (límite menor que las cuentas, por recencia y por inactividad). Con desalojo
+    una cuenta desalojada vuelve sin estado, así que se comparan solo las filas cuyas cuentas
+    conservan estado: sus pasos desde la última transacción y diferencias de saldo.
+    """
+    datos = generar_transacciones(60000, np.random.default_rng(0), cuentas=3000)
+    datos['step'] = 1 + np.arange(len(datos)) // 500  # 120 pasos: el decaimiento importa
+    esperado = referencia(datos, 24)
+    casos = (('tabla por defecto', {}, None), ('crecimiento desde 16 posiciones', {}, 16),
+             ('desalojo por recencia', {'max_cuentas': 5000}, None),
+             ('desalojo por inactividad', {'max_cuentas': 5000, 'inactividad': 5}, 16))
+    for nombre_caso, parametros, capacidad_inicial in casos:
+        motor = MotorCaracteristicas(media_vida=24, **parametros)
+        if capacidad_inicial:
+            motor.estado = EstadoCuentas(motor.estado.max_cuentas, motor.estado.inactividad, capacidad_inicial)
+        obtenido = pd.concat([motor.procesar(datos.iloc[i:i + bloque]) for i in range(0, len(datos), bloque)])
+        estado = motor.estado
+        if 'max_cuentas' not in parametros:
+            assert estado.desalojadas == 0, nombre_caso
+            comparadas = CARACTERISTICAS_FLUJO
+            conservadas = np.ones(len(datos), dtype=bool)
+        else:
+            assert estado.desalojadas > 0 and estado.n <= estado.max_cuentas, nombre_caso
+            comparadas = ['error_saldo_origen', 'error_saldo_destino']
+            conservadas = np.ones(len(datos), dtype=bool)
+            for rol in ('origen', 'destino'):
+                # Sin estado en el motor: cuenta nueva o desalojada; con estado, igual a la referencia
+                con_estado = obtenido[f'pasos_desde_ultima_{rol}'].to_numpy() >= 0
+                for nombre in (f'pasos_desde_ultima_{rol}', f'diferencia_saldo_{rol}'):
+                    np.testing.assert_allclose(obtenido[nombre].to_numpy()[con_estado],
+                                               esperado[nombre].to_numpy()[con_estado], rtol=1e-6, atol=1e-3,
+                                               err_msg=f"{nombre_caso}: {nombre}")
+                conservadas &= con_estado | (esperado[f'pasos_desde_ultima_{rol}'].to_numpy() < 0)
+        for nombre in comparadas:
+            # Las sumas con decaimiento se guardan en float32
+            np.testing.assert_allclose(obtenido[nombre].to_numpy(), esperado[nombre].to_numpy(), rtol=1e-6,
+                                       atol=1e-3, err_msg=f"{nombre_caso}: {nombre}")
+        print(f"Verificación ({nombre_caso}): {len(datos):,} transacciones iguales a la referencia; "
+              f"{estado.n:,} cuentas con estado en {estado.capacidad:,} posiciones, "
+              f"{estado.desalojadas:,} desalojadas, {conservadas.mean():.0%} de filas con estado completo")
+
+
+def rendimiento(transacciones, cuentas, max_cuentas, bloque):
+    motor = MotorCaracteristicas(max_cuentas=max_cuentas)
+    generador = np.random.default_rng(1)
+    segundos = 0.0
+    for inicio in range(0, transacciones, bloque):
+        datos = generar_transacciones(min(bloque, transacciones - inicio), generador,
+                                      paso_inicial=1 + inicio // 20000, cuentas=cuentas)
+        comienzo = time.perf_counter()
+        motor.procesar(datos)
+        segundos += time.perf_counter() - comienzo
+    estado = motor.estado
+    print(f"{max_cuentas:12,}  {transacciones / segundos:12,.0f}  {estado.n:12,}  {estado.desalojadas:12,}  "
+          f"{estado.nbytes / 2 ** 20:8.0f} MB  {pico_rss_mb():8.0f} MB")
+
+
+def modelo(filas, arboles):
+    from entrenamiento import entrenar_desde_csv
+    from puntuar_lotes import cargar_artefacto, puntuar_archivo
+
+    with tempfile.TemporaryDirectory() as directorio:
+        csv = escribir_csv(os.path.join(directorio, 'Fraud.csv'), filas, cuentas=200000)
+        print(f"{'características':>15}  {'cache':>7}  {'exactitud':>9}  {'precisión':>9}  {'recall':>7}  "
+              f"{'puntuación':>14}")
+        for flujo in (False, True):
+            salida = os.path.join(directorio, 'flujo' if flujo else 'base')
+            resumen = entrenar_desde_csv(csv, salida=salida, arboles=arboles, flujo=flujo)
+            model, scaler = (cargar_artefacto(ruta) for ruta in resumen['artefactos'])
+            puntuado = puntuar_archivo(csv, os.path.join(salida, 'resultados.parquet'), model, scaler,
+                                       motor=MotorCaracteristicas() if flujo else None)
+            metricas = resumen['metricas']
+            print(f"{'con flujo' if flujo else 'feature_names':>15}  {resumen['tiempos']['cache']:5.1f} s  "
+                  f"{metricas['exactitud']:9.2%}  {metricas['precision_fraude']:9.2%}  "
+                  f"{metricas['recall_fraude']:7.2%}  {puntuado['filas_por_segundo']:8,.0f} filas/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del motor de características por cuenta")
+    parser.add_argument("--transacciones", type=int, default=10_000_000)
+    parser.add_argument("--cuentas", type=int, default=5_000_000, help="cuentas de clientes distintas")
+    parser.add_argument("--max-cuentas", type=int, nargs="+", default=[1_000_000, 4_000_000, 16_000_000])
+    parser.add_argument("--bloque", type=int, default=100000)
+    parser.add_argument("--filas-modelo", type=int, default=2_000_000)
+    parser.add_argument("--arboles", type=int, default=100)
+    args = parser.parse_args()
+
+    verificar()
+    print(f"\n{args.transacciones:,} transacciones entre {args.cuentas:,} clientes y comercios, "
+          f"bloques de {args.bloque:,}")
+    print(f"{'máx. cuentas':>12}  {'tx/s':>12}  {'con estado':>12}  {'desalojadas':>12}  {'estado':>11}  "
+          f"{'pico RSS':>11}")
+    for max_cuentas in args.max_cuentas:
+        rendimiento(args.transacciones, args.cuentas, max_cuentas, args.bloque)
+    print()
+    modelo(args.filas_modelo, args.arboles)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark de la puntuación por lotes (puntuar_lotes.py) frente al camino ingenuo: leer el
+CSV completo con pandas, `.map` de `type`, escalar, predecir todo de una vez y escribir.
+Cada modo corre en un subproceso para medir su pico de memoria (RSS máximo) por separado.
+
+    python grupo_2/benchmarks/bench_lotes.py --filas 2000000 --bloque 100000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from datos_sinteticos import entrenar_modelo, escribir_csv, guardar_artefactos
+from preprocesamiento import feature_names
+from puntuar_lotes import cargar_artefacto, puntuar_archivo
+
+
+def ingenuo(entrada, salida, model, scaler):
+    """Todo en memoria, como el formulario de app.py pero con el archivo completo"""
+    inicio = time.perf_counter()
+    datos = pd.read_csv(entrada)
+    datos['type'] = datos['type'].map({'CASH_OUT': 5, 'PAYMENT': 4, 'CASH_IN': 3, 'TRANSFER': 2, 'DEBIT': 1})
+    datos['prediccion'] = model.predict(scaler.transform(datos[feature_names]))
+    datos.to_parquet(salida, index=False)
+    return {'filas': len(datos), 'segundos': time.perf_counter() - inicio}
+
+
+def pico_rss_mb():
+    """Pico de memoria residente del proceso (VmHWM; ru_maxrss conserva el del padre tras exec)"""
+    try:
+        with open('/proc/self/status') as f:
+            for linea in f:
+                if linea.startswith('VmHWM:'):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def ejecutar_modo(args):
+    """Corre un modo dentro del subproceso e imprime su resultado como JSON"""
+    model = cargar_artefacto(args.modelo)
+    scaler = cargar_artefacto(args.scaler)
+    base_mb = pico_rss_mb()
+    if args.modo == 'ingenuo':
+        resumen = ingenuo(args.entrada, args.salida, model, scaler)
+    else:
+        resumen = puntuar_archivo(args.entrada, args.salida, model, scaler, args.bloque, args.n_jobs)
+    resumen['rss_mb'] = pico_rss_mb()
+    resumen['datos_mb'] = resumen['rss_mb'] - base_mb  # por encima de intérprete, librerías y modelo
+    print(json.dumps(resumen))
+
+
+def medir(modo, entrada, directorio, rutas, bloque, n_jobs):
+    comando = [sys.executable, __file__, '--modo', modo, '--entrada', entrada,
+               '--salida', os.path.join(directorio, f'{modo}.parquet'), '--modelo', rutas[0],
+               '--scaler', rutas[1], '--bloque', str(bloque), '--n-jobs', str(n_jobs)]
+    salida = subprocess.run(comando, capture_output=True, text=True, check=True).stdout
+    return json.loads(salida.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la puntuación por lotes")
+    parser.add_argument("--filas", type=int, nargs="+", default=[500000, 2000000])
+    parser.add_argument("--bloque", type=int, default=100000)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--modo", choices=['ingenuo', 'bloques'], help=argparse.SUPPRESS)
+    parser.add_argument("--entrada", help=argparse.SUPPRESS)
+    parser.add_argument("--salida", help=argparse.SUPPRESS)
+    parser.add_argument("--modelo", help=argparse.SUPPRESS)
+    parser.add_argument("--scaler", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.modo:
+        return ejecutar_modo(args)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        rutas = guardar_artefactos(directorio, *entrenar_modelo())
+        for filas in args.filas:
+            entrada = escribir_csv(os.path.join(directorio, 'Fraud.csv'), filas)
+            megas = os.path.getsize(entrada) / 2 ** 20
+            print(f"{filas:,} filas ({megas:.0f} MB de CSV):")
+            for modo in ('ingenuo', 'bloques'):
+                r = medir(modo, entrada, directorio, rutas, args.bloque, args.n_jobs)
+                print(f"  {modo:8s} {r['segundos']:7.1f} s  {r['filas'] / r['segundos']:10,.0f} filas/s  "
+                      f"pico RSS {r['rss_mb']:6.0f} MB (datos {r['datos_mb']:5.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
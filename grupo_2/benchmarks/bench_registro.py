@@ -0,0 +1,163 @@
+"""
+Benchmark del registro de modelos (registro_modelos.py) frente a la carga anterior de
+app.py (pickle.load de model.sav y scaler.sav al inicio del script, en cada re-ejecución).
+Levanta varios procesos trabajadores de cada tipo a la vez y mide por trabajador el
+tiempo de arranque (hasta la primera predicción), el costo de obtener el modelo en cada
+re-ejecución, el RSS y el PSS (la memoria compartida se reparte entre los procesos que la
+mapean). También verifica la recarga en caliente y que una versión alterada se descarte.
+
+    python grupo_2/benchmarks/bench_registro.py --trabajadores 4 --arboles 100
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from datos_sinteticos import generar_transacciones
+from preprocesamiento import caracteristicas
+
+
+def memoria_mb(pid):
+    """RSS (anónima y de archivos) de /proc/<pid>/status y PSS de /proc/<pid>/smaps_rollup"""
+    memoria = {}
+    with open(f'/proc/{pid}/status') as f:
+        for linea in f:
+            campo, _, valor = linea.partition(':')
+            if campo in ('VmRSS', 'RssAnon', 'RssFile'):
+                memoria[campo] = int(valor.split()[0]) / 1024
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for linea in f:
+            if linea.startswith('Pss:'):
+                memoria['Pss'] = int(linea.split()[1]) / 1024
+    return memoria
+
+
+def trabajador(args):
+    """Proceso trabajador: carga el modelo como app.py (antes o después), predice y espera"""
+    import pandas as pd
+
+    X = np.load(args.filas)
+    fila = pd.DataFrame([X[0]], columns=['step', 'type', 'amount', 'oldbalanceOrg', 'oldbalanceDest',
+                                          'isFlaggedFraud'])
+    inicio = time.perf_counter()
+    if args.modo == 'pickle':
+        import pickle
+        from preprocesamiento import feature_names
+
+        def cargar():
+            # Como el app.py anterior (sin cerrar los archivos)
+            return pickle.load(open(args.modelo, 'rb')), pickle.load(open(args.scaler, 'rb'))
+
+        model, scaler = cargar()
+        carga = time.perf_counter() - inicio
+        model.predict(scaler.transform(fila))
+        inicio_rerun = time.perf_counter()
+        model, scaler = cargar()
+        rerun = time.perf_counter() - inicio_rerun
+        model.predict(scaler.transform(pd.DataFrame(X, columns=feature_names)))
+    else:
+        from registro_modelos import RegistroModelos
+
+        registro = RegistroModelos(args.directorio)
+        version = registro.actual()
+        carga = time.perf_counter() - inicio
+        version.predict(fila)
+        inicio_rerun = time.perf_counter()
+        version = registro.actual()
+        rerun = time.perf_counter() - inicio_rerun
+        version.predict(X)
+    print(json.dumps({'carga_ms': carga * 1000, 'rerun_ms': rerun * 1000}), flush=True)
+    sys.stdin.readline()  # se mantiene vivo hasta que el padre mida la memoria
+
+
+def medir(modo, n, rutas, directorio, filas):
+    comando = [sys.executable, __file__, '--modo', modo, '--modelo', rutas[0], '--scaler', rutas[1],
+               '--directorio', directorio, '--filas', filas]
+    inicio = time.perf_counter()
+    procesos = [subprocess.Popen(comando, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+                for _ in range(n)]
+    resultados = []
+    for proceso in procesos:
+        resultado = json.loads(proceso.stdout.readline())
+        resultado['arranque_s'] = time.perf_counter() - inicio
+        resultados.append(resultado)
+    # Todos siguen vivos: el PSS reparte las páginas compartidas entre ellos
+    for proceso, resultado in zip(procesos, resultados):
+        resultado.update(memoria_mb(proceso.pid))
+        proceso.stdin.close()
+        proceso.wait()
+    return resultados
+
+
+def verificar_recarga(rutas, directorio):
+    """Una versión nueva se toma sin reiniciar; una con un archivo alterado se descarta"""
+    from registro_modelos import RegistroModelos, publicar_version
+
+    registro = RegistroModelos(directorio, intervalo=0)
+    primera = registro.actual().version
+    nueva = publicar_version(*rutas, directorio, version='v2')
+    assert registro.actual().version == nueva, "no se recargó la versión nueva"
+    alterada = publicar_version(*rutas, directorio, version='v3')
+    ruta = os.path.join(directorio, alterada, 'bosque', 'umbral.npy')
+    with open(ruta, 'r+b') as f:
+        f.seek(-1, os.SEEK_END)
+        ultimo = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([ultimo[0] ^ 1]))
+    logging.disable(logging.WARNING)
+    assert registro.actual().version == nueva, "se cargó una versión con un hash inválido"
+    logging.disable(logging.NOTSET)
+    print(f"Recarga en caliente: {primera} -> {nueva}; {alterada} (alterada) descartada")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del registro de modelos")
+    parser.add_argument("--trabajadores", type=int, default=4)
+    parser.add_argument("--arboles", type=int, default=100)
+    parser.add_argument("--modo", choices=['pickle', 'registro'], help=argparse.SUPPRESS)
+    parser.add_argument("--modelo", help=argparse.SUPPRESS)
+    parser.add_argument("--scaler", help=argparse.SUPPRESS)
+    parser.add_argument("--directorio", help=argparse.SUPPRESS)
+    parser.add_argument("--filas", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.modo:
+        return trabajador(args)
+
+    from datos_sinteticos import entrenar_modelo, guardar_artefactos
+    from registro_modelos import publicar_version
+
+    with tempfile.TemporaryDirectory() as temporal:
+        rutas = guardar_artefactos(temporal, *entrenar_modelo(arboles=args.arboles))
+        directorio = os.path.join(temporal, 'modelos')
+        inicio = time.perf_counter()
+        publicar_version(*rutas, directorio, version='v1')
+        print(f"model.sav: {os.path.getsize(rutas[0]) / 2 ** 20:.1f} MB; "
+              f"versión publicada en {time.perf_counter() - inicio:.2f} s")
+        filas = os.path.join(temporal, 'filas.npy')
+        datos = generar_transacciones(20000, np.random.default_rng(5))
+        np.save(filas, caracteristicas(datos).to_numpy(dtype=np.float64))
+
+        print(f"{args.trabajadores} trabajadores a la vez; memoria después de predecir 20,000 filas")
+        print(f"{'modo':>9}  {'arranque':>9}  {'carga':>9}  {'re-ejecución':>12}  {'RSS':>8}  {'anónima':>8}  "
+              f"{'archivos':>8}  {'PSS':>8}  {'PSS total':>9}")
+        for modo in ('pickle', 'registro'):
+            resultados = medir(modo, args.trabajadores, rutas, directorio, filas)
+
+            def media(campo):
+                return np.mean([r[campo] for r in resultados])
+
+            print(f"{modo:>9}  {media('arranque_s'):7.2f} s  {media('carga_ms'):6.0f} ms  "
+                  f"{media('rerun_ms'):9.3f} ms  {media('VmRSS'):5.0f} MB  {media('RssAnon'):5.0f} MB  "
+                  f"{media('RssFile'):5.0f} MB  {media('Pss'):5.0f} MB  "
+                  f"{sum(r['Pss'] for r in resultados):6.0f} MB")
+        verificar_recarga(rutas, directorio)
+
+
+if __name__ == "__main__":
+    main()
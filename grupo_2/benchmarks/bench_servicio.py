@@ -0,0 +1,162 @@
+"""
+Prueba de carga del servicio de puntuación (servicio_puntuacion.py): latencia p50/p99 y
+transacciones por segundo con concurrencia creciente. Compara los micro-lotes con el camino
+del formulario de app.py (un DataFrame, preprocess_data y model.predict por solicitud).
+El servidor corre en un subproceso; los clientes son hilos con conexiones persistentes.
+
+    python grupo_2/benchmarks/bench_servicio.py --concurrencia 1 4 16 64 --segundos 5
+"""
+import argparse
+import http.client
+import json
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+from datos_sinteticos import entrenar_modelo, generar_transacciones, guardar_artefactos
+from preprocesamiento import feature_names, preprocess_data
+from puntuar_lotes import cargar_artefacto
+from servicio_puntuacion import ManejadorPuntuacion, ServidorPuntuacion, crear_servidor
+
+
+class PorSolicitud:
+    """Puntúa cada solicitud apenas llega, como el formulario de app.py"""
+
+    def __init__(self, model, scaler):
+        self.model = model
+        self.scaler = scaler
+        self.lotes = self.transacciones = 0
+
+    def enviar(self, transacciones):
+        datos = pd.DataFrame(transacciones)
+        probabilidades = self.model.predict_proba(preprocess_data(datos, self.scaler))
+        predicciones = self.model.classes_[np.argmax(probabilidades, axis=1)]  # lo mismo que model.predict
+        futuros = []
+        for probabilidad, prediccion in zip(probabilidades[:, 1], predicciones):
+            futuro = Future()
+            futuro.set_result({'prob_fraude': float(probabilidad), 'prediccion': int(prediccion)})
+            futuros.append(futuro)
+        return futuros
+
+
+def servir(args):
+    """Proceso servidor: micro-lotes o una predicción por solicitud"""
+    model, scaler = cargar_artefacto(args.modelo), cargar_artefacto(args.scaler)
+    if args.modo == 'por-solicitud':
+        model.n_jobs = 1
+        manejador = type('Manejador', (ManejadorPuntuacion,), {'micro_lotes': PorSolicitud(model, scaler)})
+        servidor = ServidorPuntuacion(('127.0.0.1', args.puerto), manejador)
+    else:
+        servidor = crear_servidor(model, scaler, args.puerto, args.max_lote, args.max_espera_ms)
+    servidor.serve_forever()
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def iniciar_servidor(modo, rutas, max_lote, max_espera_ms):
+    puerto = puerto_libre()
+    proceso = subprocess.Popen([sys.executable, __file__, '--servir', modo, '--puerto', str(puerto),
+                                '--modelo', rutas[0], '--scaler', rutas[1], '--max-lote', str(max_lote),
+                                '--max-espera-ms', str(max_espera_ms)])
+    for _ in range(200):
+        try:
+            conexion = http.client.HTTPConnection('127.0.0.1', puerto)
+            conexion.request('GET', '/salud')
+            conexion.getresponse().read()
+            return proceso, puerto
+        except OSError:
+            time.sleep(0.05)
+    proceso.kill()
+    raise RuntimeError("El servidor no respondió")
+
+
+def cargar(puerto, cuerpos, concurrencia, segundos):
+    """Cada cliente envía transacciones en bucle durante `segundos`; retorna latencias y total"""
+    latencias = [[] for _ in range(concurrencia)]
+    fin = time.perf_counter() + segundos
+
+    def cliente(i):
+        conexion = http.client.HTTPConnection('127.0.0.1', puerto)
+        j = i
+        while time.perf_counter() < fin:
+            inicio = time.perf_counter()
+            conexion.request('POST', '/puntuar', cuerpos[j % len(cuerpos)], {'Content-Type': 'application/json'})
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            assert respuesta.status == 200
+            latencias[i].append(time.perf_counter() - inicio)
+            j += concurrencia
+        conexion.close()
+
+    hilos = [threading.Thread(target=cliente, args=(i,)) for i in range(concurrencia)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    todas = np.concatenate([np.array(l) for l in latencias])
+    return todas, time.perf_counter() - inicio
+
+
+def verificar_paridad(puerto, transacciones, model, scaler):
+    """Las respuestas del servicio coinciden con model.predict sobre preprocess_data"""
+    conexion = http.client.HTTPConnection('127.0.0.1', puerto)
+    conexion.request('POST', '/puntuar', json.dumps(transacciones))
+    respuesta = json.loads(conexion.getresponse().read())
+    esperado = model.predict(preprocess_data(pd.DataFrame(transacciones), scaler))
+    assert [r['prediccion'] for r in respuesta] == esperado.tolist()
+    print(f"Paridad: {len(transacciones)} predicciones del servicio iguales a model.predict")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio de puntuación")
+    parser.add_argument("--concurrencia", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--segundos", type=float, default=5)
+    parser.add_argument("--max-lote", type=int, default=256)
+    parser.add_argument("--max-espera-ms", type=float, default=2)
+    parser.add_argument("--servir", choices=['micro-lotes', 'por-solicitud'], help=argparse.SUPPRESS)
+    parser.add_argument("--puerto", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--modelo", help=argparse.SUPPRESS)
+    parser.add_argument("--scaler", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.servir:
+        args.modo = args.servir
+        return servir(args)
+
+    datos = generar_transacciones(2000, np.random.default_rng(1))[feature_names]
+    transacciones = [{**fila, 'isFlaggedFraud': bool(fila['isFlaggedFraud'])}
+                     for fila in json.loads(datos.to_json(orient='records'))]
+    cuerpos = [json.dumps(t) for t in transacciones]
+
+    with tempfile.TemporaryDirectory() as directorio:
+        model, scaler = entrenar_modelo()
+        rutas = guardar_artefactos(directorio, model, scaler)
+        for modo in ('por-solicitud', 'micro-lotes'):
+            proceso, puerto = iniciar_servidor(modo, rutas, args.max_lote, args.max_espera_ms)
+            try:
+                if modo == 'micro-lotes':
+                    verificar_paridad(puerto, transacciones[:500], model, scaler)
+                print(f"{modo}:")
+                for concurrencia in args.concurrencia:
+                    latencias, segundos = cargar(puerto, cuerpos, concurrencia, args.segundos)
+                    p50, p99 = np.percentile(latencias, [50, 99]) * 1000
+                    print(f"  {concurrencia:3d} clientes   p50 {p50:7.2f} ms   p99 {p99:7.2f} ms   "
+                          f"{len(latencias) / segundos:8,.0f} transacciones/s")
+            finally:
+                proceso.terminate()
+                proceso.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Transacciones sintéticas con el formato de Fraud.csv y un modelo entrenado sobre ellas,
+para ejecutar los benchmarks sin el dataset ni model.sav. El fraude se concentra en
+TRANSFER y CASH_OUT que vacían la cuenta de origen, como en los datos reales.
+"""
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "venv"))
+
+from preprocesamiento import feature_names, preprocess_data
+
+TIPOS = np.array(['CASH_OUT', 'PAYMENT', 'CASH_IN', 'TRANSFER', 'DEBIT'])
+PROPORCION_TIPOS = [0.35, 0.34, 0.22, 0.08, 0.01]
+
+
+def generar_transacciones(n, generador, paso_inicial=1, cuentas=1_000_000, tasa_fraude=0.0013):
+    """DataFrame de n transacciones ordenadas por `step` (una hora por paso, ~20k transacciones por paso)"""
+    tipos = generador.choice(len(TIPOS), n, p=PROPORCION_TIPOS)
+    saldo_origen = np.round(generador.lognormal(10, 2.0, n) * (generador.random(n) > 0.3), 2)
+    monto = np.round(generador.lognormal(11, 1.3, n), 2)
+    fraude = (np.isin(tipos, [0, 3]) & (generador.random(n) < tasa_fraude / 0.43)).astype(np.int8)
+    # Los fraudes vacían la cuenta de origen
+    monto = np.where(fraude == 1, np.maximum(saldo_origen, monto), monto)
+    saldo_origen = np.where(fraude == 1, monto, saldo_origen)
+    saldo_destino = np.round(generador.lognormal(11, 2.5, n) * (generador.random(n) > 0.4), 2)
+    salida = tipos != 2  # todo menos CASH_IN saca dinero del origen
+    return pd.DataFrame({
+        'step': paso_inicial + np.arange(n) // 20000,
+        'type': TIPOS[tipos],
+        'amount': monto,
+        'nameOrig': np.char.add('C', generador.integers(0, cuentas, n).astype(str)),
+        'oldbalanceOrg': saldo_origen,
+        'newbalanceOrig': np.where(salida, np.maximum(saldo_origen - monto, 0), saldo_origen + monto).round(2),
+        'nameDest': np.char.add(np.where(tipos == 1, 'M', 'C'), generador.integers(0, cuentas, n).astype(str)),
+        'oldbalanceDest': saldo_destino,
+        'newbalanceDest': np.where(tipos == 1, 0, saldo_destino + monto * salida).round(2),
+        'isFraud': fraude,
+        'isFlaggedFraud': ((fraude == 1) & (tipos == 3) & (monto > 200000) & (generador.random(n) < 0.01)).astype(np.int8),
+    })
+
+
+def escribir_csv(ruta, filas, semilla=0, bloque=500000, **kwargs):
+    """Escribe un CSV tipo Fraud.csv de `filas` filas por bloques (sin tenerlo entero en memoria)"""
+    generador = np.random.default_rng(semilla)
+    escritas = 0
+    while escritas < filas:
+        n = min(bloque, filas - escritas)
+        datos = generar_transacciones(n, generador, paso_inicial=1 + escritas // 20000, **kwargs)
+        datos.to_csv(ruta, mode='w' if escritas == 0 else 'a', header=escritas == 0, index=False)
+        escritas += n
+    return ruta
+
+
+def entrenar_modelo(filas=400000, arboles=100, semilla=0, tasa_fraude=0.02):
+    """
+    RandomForest y StandardScaler como en el notebook: clases balanceadas por submuestreo
+    (con la tasa por defecto quedan ~16k filas, como las del entrenamiento original)
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    generador = np.random.default_rng(semilla)
+    datos = generar_transacciones(filas, generador, tasa_fraude=tasa_fraude)
+    fraudes = datos[datos['isFraud'] == 1]
+    normales = datos[datos['isFraud'] == 0].sample(n=len(fraudes), random_state=semilla)
+    balanceado = pd.concat([normales, fraudes])
+    balanceado['type'] = balanceado['type'].map({'CASH_OUT': 5, 'PAYMENT': 4, 'CASH_IN': 3, 'TRANSFER': 2, 'DEBIT': 1})
+
+    scaler = StandardScaler().fit(balanceado[feature_names])
+    model = RandomForestClassifier(n_estimators=arboles, random_state=semilla)
+    model.fit(scaler.transform(balanceado[feature_names]), balanceado['isFraud'])
+    return model, scaler
+
+
+def guardar_artefactos(directorio, model, scaler):
+    """Guarda model.sav y scaler.sav; retorna sus rutas"""
+    rutas = os.path.join(directorio, 'model.sav'), os.path.join(directorio, 'scaler.sav')
+    for ruta, objeto in zip(rutas, (model, scaler)):
+        with open(ruta, 'wb') as f:
+            pickle.dump(objeto, f)
+    return rutas
+
+
+if __name__ == "__main__":
+    model, scaler = entrenar_modelo()
+    datos = generar_transacciones(10000, np.random.default_rng(1))
+    prediccion = model.predict(preprocess_data(datos, scaler))
+    print(f"Fraudes: {datos['isFraud'].sum()} reales, {prediccion.sum()} predichos en 10000 transacciones")
@@ -0,0 +1,91 @@
+"""
+Verificación de paridad del bosque compilado (bosque_compilado.py): las predicciones y
+probabilidades deben ser idénticas a model.predict(scaler.transform(X)) en datos
+sintéticos, en valores justo en los umbrales plegados (y un float antes y después), con
+NaN, en varios tamaños de bosque, después de guardar y cargar (también mapeado en memoria)
+y con varios hilos.
+
+    python grupo_2/benchmarks/prueba_bosque.py
+"""
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from datos_sinteticos import entrenar_modelo, generar_transacciones
+from bosque_compilado import BosqueCompilado, compilar_bosque
+from preprocesamiento import caracteristicas, feature_names
+
+
+def referencia(model, scaler, X):
+    escalado = scaler.transform(pd.DataFrame(X, columns=feature_names)) if scaler is not None else X
+    return model.predict_proba(escalado), model.predict(escalado)
+
+
+def comparar(nombre, bosque, model, scaler, X, hilos=1):
+    model.n_jobs = 1  # la suma de los árboles en orden, como el bosque compilado
+    proba, prediccion = referencia(model, scaler, X)
+    compilada = bosque.predict_proba(X, hilos=hilos)
+    assert np.array_equal(bosque.predict(X, hilos=hilos), prediccion), f"{nombre}: predicciones distintas"
+    assert np.array_equal(compilada, proba), f"{nombre}: probabilidades distintas " \
+                                             f"(máx. diferencia {np.abs(compilada - proba).max():.3g})"
+    print(f"  {nombre:55s} {len(X):8,} filas idénticas")
+
+
+def valores_en_umbrales(bosque, generador, n=20000):
+    """Filas con una característica exactamente en un umbral plegado, o un float antes o después"""
+    internos = np.flatnonzero(bosque.caracteristica >= 0)
+    elegidos = generador.choice(internos, n)
+    base = generador.choice(generar_filas(generador, 1000), n)
+    umbrales = bosque.umbral[elegidos]
+    desplazamiento = generador.integers(-1, 2, n)
+    valores = np.where(desplazamiento < 0, np.nextafter(umbrales, -np.inf),
+                       np.where(desplazamiento > 0, np.nextafter(umbrales, np.inf), umbrales))
+    base[np.arange(n), bosque.caracteristica[elegidos]] = valores
+    return base
+
+
+def generar_filas(generador, n):
+    datos = generar_transacciones(n, generador, tasa_fraude=0.05)
+    return caracteristicas(datos).to_numpy(dtype=np.float64)
+
+
+def main():
+    generador = np.random.default_rng(42)
+    X = generar_filas(generador, 100000)
+
+    print("Modelo como el de la aplicación (100 árboles, StandardScaler):")
+    model, scaler = entrenar_modelo()
+    bosque = compilar_bosque(model, scaler)
+    comparar("transacciones sintéticas", bosque, model, scaler, X)
+    comparar("valores en los umbrales (±1 float)", bosque, model, scaler, valores_en_umbrales(bosque, generador))
+    con_nan = X[:5000].copy()
+    con_nan[generador.random(con_nan.shape) < 0.1] = np.nan
+    comparar("10% de NaN", bosque, model, scaler, con_nan)
+    comparar("una fila", bosque, model, scaler, X[:1])
+    comparar("4 hilos", bosque, model, scaler, X, hilos=4)
+    with tempfile.TemporaryDirectory() as directorio:
+        bosque.guardar(directorio)
+        comparar("guardado y cargado", BosqueCompilado.cargar(directorio), model, scaler, X)
+        comparar("mapeado en memoria", BosqueCompilado.cargar(directorio, mmap_mode='r'), model, scaler, X)
+
+    print("Otras configuraciones:")
+    y = (generador.random(len(X)) < 0.3 + 0.4 * (X[:, 1] == 2)).astype(int)
+    # max_leaf_nodes construye los árboles primero en anchura: los nodos ya no están en preorden
+    for arboles, profundidad, hojas, escalar in ((1, None, None, True), (10, 4, None, True),
+                                                 (50, None, None, False), (200, 12, None, True), (20, None, 64, True)):
+        scaler = StandardScaler().fit(pd.DataFrame(X, columns=feature_names)) if escalar else None
+        entrada = scaler.transform(pd.DataFrame(X, columns=feature_names)) if escalar else X
+        model = RandomForestClassifier(n_estimators=arboles, max_depth=profundidad, max_leaf_nodes=hojas,
+                                       random_state=0, min_samples_leaf=3).fit(entrada[:20000], y[:20000])
+        bosque = compilar_bosque(model, scaler)
+        comparar(f"{arboles} árboles, profundidad {profundidad}, hojas {hojas}, scaler {escalar}",
+                 bosque, model, scaler, X)
+        comparar("  valores en los umbrales", bosque, model, scaler, valores_en_umbrales(bosque, generador))
+    print("Paridad verificada")
+
+
+if __name__ == "__main__":
+    main()
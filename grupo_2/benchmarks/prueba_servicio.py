@@ -0,0 +1,120 @@
+"""
+Verificación del manejo de errores del servicio de puntuación (servicio_puntuacion.py):
+una solicitud con valores no finitos ("1e400", "inf", "nan", Infinity) o con isFlaggedFraud
+distinto de 0 o 1, enviada a la vez que solicitudes válidas, recibe un 400 sin afectar a las
+demás, que se puntúan igual que model.predict ("0" vale lo mismo que false). Si el modelo
+falla al puntuar un micro-lote, cada cliente de ese lote recibe un 500 en JSON y su conexión
+sigue sirviendo. crear_servidor no cambia el modelo recibido.
+
+    python grupo_2/benchmarks/prueba_servicio.py
+"""
+import http.client
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+
+from datos_sinteticos import entrenar_modelo, generar_transacciones
+from preprocesamiento import feature_names, preprocess_data
+from servicio_puntuacion import crear_servidor
+
+
+class ModeloQueFalla:
+    """
+    Delegado del modelo cuyo predict_proba lanza una excepción mientras `fallar` esté activado
+    (un Event, que comparte la copia que hace crear_servidor)
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.classes_ = model.classes_
+        self.fallar = threading.Event()
+
+    def predict_proba(self, X):
+        if self.fallar.is_set():
+            raise RuntimeError("fallo simulado del modelo")
+        return self.model.predict_proba(X)
+
+
+def enviar(puerto, cuerpo, conexion=None):
+    conexion = conexion or http.client.HTTPConnection('127.0.0.1', puerto, timeout=10)
+    conexion.request('POST', '/puntuar', cuerpo, {'Content-Type': 'application/json'})
+    respuesta = conexion.getresponse()
+    return respuesta.status, json.loads(respuesta.read())
+
+
+def a_la_vez(puerto, cuerpos):
+    """Envía los cuerpos desde hilos distintos, liberados juntos para que caigan en el mismo micro-lote"""
+    resultados = [None] * len(cuerpos)
+    barrera = threading.Barrier(len(cuerpos))
+
+    def cliente(i):
+        conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=10)
+        conexion.connect()
+        barrera.wait()
+        try:
+            resultados[i] = enviar(puerto, cuerpos[i], conexion)
+        except Exception as e:
+            resultados[i] = (None, repr(e))
+
+    hilos = [threading.Thread(target=cliente, args=(i,)) for i in range(len(cuerpos))]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return resultados
+
+
+def main():
+    model, scaler = entrenar_modelo(arboles=20)
+    delegado = ModeloQueFalla(model)
+    # Una espera larga para que las solicitudes concurrentes compartan el micro-lote
+    servidor = crear_servidor(delegado, scaler, puerto=0, max_espera_ms=50)
+    puerto = servidor.server_address[1]
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+    datos = generar_transacciones(8, np.random.default_rng(3))[feature_names]
+    validas = [{**fila, 'isFlaggedFraud': bool(fila['isFlaggedFraud'])}
+               for fila in json.loads(datos.to_json(orient='records'))]
+    esperado = model.predict(preprocess_data(pd.DataFrame(validas), scaler)).tolist()
+    # json.dumps escribe Infinity y NaN, que json.loads del servidor acepta
+    invalidas = [{**validas[0], 'amount': '1e400'}, {**validas[0], 'oldbalanceOrg': 'inf'},
+                 {**validas[0], 'step': 'nan'}, {**validas[0], 'oldbalanceDest': float('inf')},
+                 [validas[1], {**validas[1], 'amount': float('nan')}],
+                 {**validas[0], 'isFlaggedFraud': 2}, {**validas[0], 'isFlaggedFraud': 'no'}]
+    # isFlaggedFraud como número o texto vale lo mismo que el booleano
+    validas[2] = {**validas[2], 'isFlaggedFraud': '0' if not validas[2]['isFlaggedFraud'] else '1'}
+    validas[3] = {**validas[3], 'isFlaggedFraud': int(validas[3]['isFlaggedFraud'])}
+
+    cuerpos = [json.dumps(t) for t in invalidas + validas]
+    resultados = a_la_vez(puerto, cuerpos)
+    for transaccion, (estado, cuerpo) in zip(invalidas, resultados):
+        assert estado == 400, f"{transaccion}: se esperaba 400 y llegó {estado} {cuerpo}"
+    for i, (estado, cuerpo) in enumerate(resultados[len(invalidas):]):
+        assert estado == 200, f"solicitud válida {i}: {estado} {cuerpo}"
+        assert cuerpo['prediccion'] == esperado[i], f"solicitud válida {i}: predicción distinta"
+    print(f"No finitos o isFlaggedFraud inválido: {len(invalidas)} solicitudes con 400 y {len(validas)} válidas concurrentes "
+          f"iguales a model.predict")
+
+    delegado.fallar.set()
+    resultados = a_la_vez(puerto, [json.dumps(t) for t in validas])
+    for estado, cuerpo in resultados:
+        assert estado == 500 and 'error' in cuerpo, f"se esperaba un 500 en JSON y llegó {estado} {cuerpo}"
+    conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=10)
+    for fallo_esperado in (True, False):
+        if fallo_esperado:
+            delegado.fallar.set()
+        else:
+            delegado.fallar.clear()
+        estado, cuerpo = enviar(puerto, json.dumps(validas[0]), conexion)
+        assert estado == (500 if fallo_esperado else 200), f"{estado} {cuerpo}"
+    assert cuerpo['prediccion'] == esperado[0]
+    print(f"Fallo del modelo: {len(validas)} clientes del micro-lote con 500 en JSON; "
+          f"la misma conexión puntúa después del error")
+    assert not hasattr(delegado, 'n_jobs'), "crear_servidor cambió el n_jobs del modelo del llamador"
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+
+import streamlit as st
+import pandas as pd
+
+from preprocesamiento import caracteristicas
+from puntuar_lotes import puntuar_archivo
+from registro_modelos import RegistroModelos
+
+# Un registro por proceso (Streamlit re-ejecuta el script en cada interacción)
+@st.cache_resource
+def obtener_registro():
+    return RegistroModelos()
+
+# Puntuación por lotes de un archivo subido (CSV o Parquet con las columnas de Fraud.csv)
+def puntuar_archivo_subido(archivo, version):
+    barra = st.progress(0.0, text="Puntuando...")
+    total = max(archivo.size, 1)
+
+    def al_avanzar(filas, segundos):
+        # Avance aproximado según los bytes leídos del archivo subido
+        barra.progress(min(archivo.tell() / total, 1.0), text=f"{filas:,} filas ({filas / segundos:,.0f} filas/s)")
+
+    extension = '.parquet' if archivo.name.lower().endswith('.parquet') else '.csv'
+    with tempfile.TemporaryDirectory() as directorio:
+        salida = os.path.join(directorio, 'resultados' + extension)
+        resumen = puntuar_archivo(archivo, salida, version.model, version.scaler, al_avanzar=al_avanzar)
+        barra.progress(1.0, text="Listo")
+        with open(salida, 'rb') as f:
+            resultados = f.read()
+
+    st.write(f"{resumen['filas']:,} filas puntuadas en {resumen['segundos']:.1f} s "
+             f"({resumen['filas_por_segundo']:,.0f} filas/s); {resumen['fraudes']:,} predichas como fraude.")
+    st.download_button("Descargar resultados", resultados, file_name='resultados' + extension)
+
+# Aplicación en Streamlit
+def main():
+    st.title("Aplicación para Detección de Transacciones Fraudulentas")
+    version = obtener_registro().actual()
+    st.caption(f"Modelo: versión {version.version}")
+
+    # Obtener datos de entrada del usuario
+    st.header("Ingrese los Detalles de la Transacción:")
+    step = st.number_input("Paso", min_value=1)
+    type_val = st.selectbox("Tipo de Transacción", ['CASH_OUT', 'PAYMENT', 'CASH_IN', 'TRANSFER', 'DEBIT'])
+    amount = st.number_input("Monto")
+    oldbalanceOrg = st.number_input("Saldo Anterior del Origen")
+    oldbalanceDest = st.number_input("Saldo Anterior del Destino")
+    isFlaggedFraud = st.checkbox("Marcado como Fraude")
+
+    # Botón de envío
+    if st.button("Enviar"):
+        # Crear un DataFrame con los datos ingresados por el usuario
+        user_data = pd.DataFrame({
+            'step': [step],
+            'type': [type_val],
+            'amount': [amount],
+            'oldbalanceOrg': [oldbalanceOrg],
+            'oldbalanceDest': [oldbalanceDest],
+            'isFlaggedFraud': [isFlaggedFraud]
+        })
+
+        # Realizar una predicción (el bosque compilado ya incluye el escalamiento)
+        prediction = version.predict(caracteristicas(user_data))
+
+        # Mostrar el resultado
+        st.header("Predicción:")
+        if prediction[0] == 1:
+            st.error("¡Esta transacción se predice como Fraude!")
+        else:
+            st.success("Esta transacción se predice como No Fraudulenta.")
+
+    # Puntuación de archivos completos
+    st.header("Puntuar un Archivo de Transacciones:")
+    archivo = st.file_uploader("CSV o Parquet con las columnas de Fraud.csv", type=['csv', 'parquet'])
+    if archivo is not None and st.button("Puntuar archivo"):
+        puntuar_archivo_subido(archivo, version)
+
+if __name__ == '__main__':
+    main()
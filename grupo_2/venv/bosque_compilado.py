@@ -0,0 +1,211 @@
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from preprocesamiento import feature_names
+
+# Filas que recorre cada hilo a la vez (los arreglos de nodos por bloque caben en caché)
+BLOQUE_FILAS = int(os.getenv('BOSQUE_BLOQUE_FILAS', 4096))
+# Hilos para lotes grandes (0 = todos los núcleos)
+HILOS = int(os.getenv('BOSQUE_HILOS', 0))
+
+ARREGLOS = ('caracteristica', 'umbral', 'izquierdo', 'derecho', 'nan_izquierda', 'valores', 'raices')
+_SIGNO = np.int64(-2 ** 63)
+
+
+def _clave(x):
+    """Entero con el mismo orden que los float64 (para buscar por bisección entre floats consecutivos)"""
+    bits = x.view(np.int64)
+    return np.where(bits < 0, -(bits & ~_SIGNO), bits)
+
+
+def _desde_clave(clave):
+    return np.where(clave < 0, (-clave) | _SIGNO, clave).view(np.float64)
+
+
+def _plegar_umbrales(umbrales, medias, escalas):
+    """
+    Umbral sobre el valor sin escalar equivalente a cada división del árbol. sklearn compara
+    float32((x - media) / escala) <= umbral; como esa función es monótona en x, la condición
+    equivale a x <= u para el mayor float64 u que la cumple, que se busca por bisección.
+    """
+    def cumple(x):
+        return ((x - medias) / escalas).astype(np.float32) <= umbrales
+
+    with np.errstate(over='ignore', invalid='ignore'):
+        centro = umbrales * escalas + medias
+        paso = np.abs(centro) * 1e-6 + escalas * 1e-30
+        bajo, alto = centro - paso, centro + paso
+        while not cumple(bajo).all():
+            falla = ~cumple(bajo)
+            bajo[falla] -= paso[falla]
+            paso[falla] *= 2
+        paso = np.abs(centro) * 1e-6 + escalas * 1e-30
+        while cumple(alto).any():
+            pasa = cumple(alto)
+            alto[pasa] += paso[pasa]
+            paso[pasa] *= 2
+
+        bajo, alto = _clave(bajo), _clave(alto)
+        while (alto - bajo > 1).any():
+            medio = bajo + (alto - bajo) // 2
+            pasa = cumple(_desde_clave(medio))
+            bajo = np.where(pasa, medio, bajo)
+            alto = np.where(pasa, alto, medio)
+    return _desde_clave(bajo)
+
+
+class BosqueCompilado:
+    """
+    Random Forest aplanado en arreglos contiguos de NumPy: por nodo la característica (-1 en
+    las hojas), el umbral (ya sobre valores sin escalar), los hijos y las probabilidades de
+    la hoja. Todos los pares (fila, árbol) bajan un nivel por iteración con operaciones
+    vectorizadas y los que llegan a una hoja salen del conjunto activo. Da las mismas
+    predicciones que model.predict(scaler.transform(X)).
+    """
+
+    def __init__(self, caracteristica, umbral, izquierdo, derecho, nan_izquierda, valores, raices, clases,
+                 profundidad, nombres=feature_names):
+        self.caracteristica = caracteristica
+        self.umbral = umbral
+        self.izquierdo = izquierdo  # x <= umbral
+        self.derecho = derecho
+        self.nan_izquierda = nan_izquierda  # hacia dónde van los NaN en cada nodo
+        self.valores = valores
+        self.raices = raices
+        self.classes_ = np.asarray(clases)
+        self.profundidad = int(profundidad)
+        self.feature_names = list(nombres)
+        # sklearn numera los nodos en preorden: el hijo izquierdo es el nodo siguiente y no hace falta leerlo
+        internos = np.flatnonzero(self.caracteristica >= 0)
+        self._izquierdo_siguiente = np.array_equal(self.izquierdo[internos], internos + 1)
+
+    @property
+    def n_arboles(self):
+        return len(self.raices)
+
+    def _proba_bloque(self, X):
+        n, d = X.shape
+        plano = X.ravel()
+        con_nan = np.isnan(plano).any()
+        # Pares (árbol, fila) activos: posición en la matriz de hojas, inicio de la fila en X y nodo actual.
+        # Ordenados por árbol, los accesos a los arreglos de nodos quedan cerca unos de otros
+        posiciones = np.arange(self.n_arboles * n)
+        bases = np.tile(np.arange(n, dtype=np.intp) * d, self.n_arboles)
+        nodos = np.repeat(self.raices, n)
+        hojas = np.empty(n * self.n_arboles, dtype=np.intp)
+        while len(nodos):
+            columnas = self.caracteristica.take(nodos)
+            terminados = columnas < 0
+            if terminados.any():
+                hojas[posiciones[terminados]] = nodos[terminados]
+                activos = ~terminados
+                posiciones, bases = posiciones.compress(activos), bases.compress(activos)
+                nodos, columnas = nodos.compress(activos), columnas.compress(activos)
+            x = plano.take(bases + columnas)
+            izquierda = x <= self.umbral.take(nodos)
+            if con_nan:
+                izquierda |= np.isnan(x) & self.nan_izquierda.take(nodos)
+            siguiente = nodos + 1 if self._izquierdo_siguiente else self.izquierdo.take(nodos)
+            nodos = np.where(izquierda, siguiente, self.derecho.take(nodos))
+        # Se suma árbol por árbol, en el mismo orden que RandomForestClassifier.predict_proba
+        hojas = hojas.reshape(self.n_arboles, n)
+        proba = np.zeros((n, self.valores.shape[1]), dtype=np.float64)
+        for arbol in range(self.n_arboles):
+            proba += self.valores[hojas[arbol]]
+        proba /= self.n_arboles
+        return proba
+
+    def predict_proba(self, X, hilos=HILOS):
+        """Probabilidades por clase de las filas de X (características sin escalar, en el orden de feature_names)"""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if len(X) <= BLOQUE_FILAS:
+            return self._proba_bloque(X)
+        bloques = [X[i:i + BLOQUE_FILAS] for i in range(0, len(X), BLOQUE_FILAS)]
+        with ThreadPoolExecutor(max_workers=hilos or os.cpu_count()) as executor:
+            return np.concatenate(list(executor.map(self._proba_bloque, bloques)))
+
+    def predict(self, X, hilos=HILOS):
+        return self.classes_[np.argmax(self.predict_proba(X, hilos), axis=1)]
+
+    def guardar(self, directorio):
+        """Un .npy por arreglo y los metadatos en bosque.json"""
+        os.makedirs(directorio, exist_ok=True)
+        for nombre in ARREGLOS:
+            np.save(os.path.join(directorio, nombre + '.npy'), getattr(self, nombre))
+        with open(os.path.join(directorio, 'bosque.json'), 'w') as f:
+            json.dump({'clases': self.classes_.tolist(), 'profundidad': self.profundidad,
+                       'feature_names': self.feature_names}, f)
+
+    @classmethod
+    def cargar(cls, directorio, mmap_mode=None):
+        with open(os.path.join(directorio, 'bosque.json')) as f:
+            metadatos = json.load(f)
+        arreglos = {nombre: np.load(os.path.join(directorio, nombre + '.npy'), mmap_mode=mmap_mode)
+                    for nombre in ARREGLOS}
+        return cls(**arreglos, clases=metadatos['clases'], profundidad=metadatos['profundidad'],
+                   nombres=metadatos['feature_names'])
+
+
+def compilar_bosque(model, scaler=None):
+    """Aplana un RandomForestClassifier (de una sola salida) y pliega el StandardScaler en los umbrales"""
+    n_caracteristicas = model.n_features_in_
+    medias = np.zeros(n_caracteristicas)
+    escalas = np.ones(n_caracteristicas)
+    if scaler is not None:
+        if scaler.mean_ is not None:
+            medias = np.asarray(scaler.mean_, dtype=np.float64)
+        if scaler.scale_ is not None:
+            escalas = np.asarray(scaler.scale_, dtype=np.float64)
+
+    caracteristicas, umbrales, izquierdos, derechos, nan_izquierda, valores, raices = [], [], [], [], [], [], []
+    inicio = 0
+    for estimador in model.estimators_:
+        arbol = estimador.tree_
+        n = arbol.node_count
+        hoja = arbol.children_left < 0
+        caracteristicas.append(np.where(hoja, -1, arbol.feature))
+        umbrales.append(np.where(hoja, np.inf, arbol.threshold))
+        izquierdos.append(np.where(hoja, -1, arbol.children_left + inicio))
+        derechos.append(np.where(hoja, -1, arbol.children_right + inicio))
+        # Sin NaN en el entrenamiento, sklearn los envía al hijo con más muestras
+        nan_izquierda.append(np.asarray(getattr(arbol, 'missing_go_to_left', np.zeros(n)), dtype=bool) & ~hoja)
+        valor = arbol.value[:, 0, :].astype(np.float64)
+        # Versiones anteriores de sklearn guardan conteos en las hojas y normalizan al predecir
+        suma = valor.sum(axis=1, keepdims=True)
+        if not np.allclose(suma[hoja], 1):
+            valor = valor / np.where(suma == 0, 1, suma)
+        valores.append(valor)
+        raices.append(inicio)
+        inicio += n
+
+    caracteristica = np.concatenate(caracteristicas).astype(np.intp)
+    umbral = np.concatenate(umbrales)
+    internos = caracteristica >= 0
+    umbral[internos] = _plegar_umbrales(umbral[internos], medias[caracteristica[internos]],
+                                        escalas[caracteristica[internos]])
+    return BosqueCompilado(caracteristica, umbral, np.concatenate(izquierdos).astype(np.intp),
+                           np.concatenate(derechos).astype(np.intp), np.concatenate(nan_izquierda), np.concatenate(valores), np.array(raices, dtype=np.intp), model.classes_,
+                           max(e.tree_.max_depth for e in model.estimators_))
+
+
+def main():
+    from puntuar_lotes import cargar_artefacto
+
+    parser = argparse.ArgumentParser(description="Exporta model.sav + scaler.sav como bosque compilado")
+    parser.add_argument('--modelo', default='model.sav')
+    parser.add_argument('--scaler', default='scaler.sav')
+    parser.add_argument('--salida', default='bosque')
+    args = parser.parse_args()
+
+    bosque = compilar_bosque(cargar_artefacto(args.modelo), cargar_artefacto(args.scaler))
+    bosque.guardar(args.salida)
+    print(f"{bosque.n_arboles} árboles, {len(bosque.caracteristica):,} nodos, profundidad {bosque.profundidad} "
+          f"-> {args.salida}/")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,286 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from preprocesamiento import caracteristicas, feature_names
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+    pc = None
+
+# Pasos (horas) en los que el peso de una transacción pasada cae a la mitad
+MEDIA_VIDA = float(os.getenv('FLUJO_MEDIA_VIDA', 24))
+# Cuentas con estado como máximo; al llegar al límite se desalojan las inactivas
+MAX_CUENTAS = int(os.getenv('FLUJO_MAX_CUENTAS', 4_000_000))
+# Pasos sin actividad después de los que una cuenta puede desalojarse
+INACTIVIDAD = int(os.getenv('FLUJO_INACTIVIDAD', 720))
+
+# Columnas del flujo que se usan además de feature_names
+COLUMNAS_FLUJO = ['nameOrig', 'newbalanceOrig', 'nameDest', 'newbalanceDest']
+CARACTERISTICAS_FLUJO = [
+    'envios_origen', 'monto_enviado_origen', 'pasos_desde_ultima_origen', 'diferencia_saldo_origen',
+    'error_saldo_origen', 'recepciones_destino', 'monto_recibido_destino', 'pasos_desde_ultima_destino',
+    'diferencia_saldo_destino', 'error_saldo_destino',
+]
+# Vector que recibe el modelo entrenado con las características del flujo
+NOMBRES_ENRIQUECIDOS = feature_names + CARACTERISTICAS_FLUJO
+
+_CARGA_MAXIMA = 0.7  # fracción ocupada de la tabla hash antes de crecer o desalojar
+_MAX_MEDIAS_VIDAS_BLOQUE = 16  # un bloque más largo se parte para no perder precisión en las sumas escaladas
+
+
+def _mezclar(x):
+    """Permutación de los enteros de 64 bits (splitmix64) para repartir las claves en la tabla"""
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def claves_cuentas(nombres):
+    """
+    Clave de 64 bits de cada nombre de cuenta (0 queda reservado para las posiciones libres).
+    Los nombres como los de Fraud.csv (C o M seguida de dígitos) se convierten a enteros con
+    pyarrow, mucho más rápido que el hash de pandas, que queda para cualquier otro nombre.
+    """
+    claves = np.empty(len(nombres), dtype=np.uint64)
+    numericos = np.zeros(len(nombres), dtype=bool)
+    try:
+        arreglo = pa.array(nombres, type=pa.string(), from_pandas=True) if pa is not None and len(nombres) else None
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        arreglo = None
+    if arreglo is not None:
+        letra, digitos = pc.utf8_slice_codeunits(arreglo, 0, 1), pc.utf8_slice_codeunits(arreglo, 1)
+        # Sin ceros a la izquierda, para que dos nombres distintos nunca den el mismo entero
+        canonicos = pc.or_(pc.equal(pc.utf8_length(digitos), 1), pc.invert(pc.starts_with(digitos, '0')))
+        validos = pc.and_(pc.and_(pc.is_in(letra, pa.array(['C', 'M'])), pc.utf8_is_digit(digitos)),
+                          pc.and_(pc.less_equal(pc.utf8_length(digitos), 18), canonicos))
+        numericos = validos.fill_null(False).to_numpy(zero_copy_only=False)
+        if numericos.any():
+            numeros = pc.cast(pc.filter(digitos, validos), pa.uint64()).to_numpy()
+            comercio = pc.equal(pc.filter(letra, validos), 'M').to_numpy(zero_copy_only=False).astype(np.uint64)
+            claves[numericos] = _mezclar(numeros * np.uint64(2) + comercio)
+    if not numericos.all():
+        claves[~numericos] = pd.util.hash_array(np.asarray(nombres, dtype=object)[~numericos])
+    claves[claves == 0] = 1
+    return claves
+
+
+class EstadoCuentas:
+    """
+    Estado por cuenta en arreglos de NumPy (36 bytes por posición), ubicado con una tabla hash
+    de direccionamiento abierto y sondeo lineal sobre claves_cuentas. La tabla crece al doble
+    hasta la capacidad que corresponde a `max_cuentas`; desde ahí, para hacer lugar, se
+    reconstruye sin las cuentas inactivas por más de `inactividad` pasos y, si no alcanza,
+    conservando las de actividad más reciente.
+    """
+
+    CAMPOS = {'ultimo_paso': np.int32, 'envios': np.float32, 'monto_enviado': np.float32,
+              'recepciones': np.float32, 'monto_recibido': np.float32, 'ultimo_saldo': np.float64}
+
+    def __init__(self, max_cuentas=MAX_CUENTAS, inactividad=INACTIVIDAD, capacidad_inicial=1 << 16):
+        if max_cuentas < 4:
+            raise ValueError("max_cuentas debe ser al menos 4 (las dos cuentas de una transacción, dos veces)")
+        self.max_cuentas = max_cuentas
+        self.inactividad = inactividad
+        self.capacidad_maxima = 1 << int(np.ceil(np.log2(max_cuentas / _CARGA_MAXIMA)))
+        self.n = 0
+        self.desalojadas = 0
+        self._asignar(min(capacidad_inicial, self.capacidad_maxima))
+
+    def _asignar(self, capacidad):
+        self.capacidad = capacidad
+        self.claves = np.zeros(capacidad, dtype=np.uint64)
+        for campo, tipo in self.CAMPOS.items():
+            setattr(self, campo, np.zeros(capacidad, dtype=tipo))
+        self.ultimo_paso[:] = -1  # cuenta sin actividad registrada
+
+    @property
+    def nbytes(self):
+        return self.claves.nbytes + sum(getattr(self, campo).nbytes for campo in self.CAMPOS)
+
+    @property
+    def max_nuevas(self):
+        """Cuentas distintas que admite una sola llamada a ubicar: el resto del límite queda para las conocidas"""
+        return self.max_cuentas // 2
+
+    def _limite(self):
+        return min(self.max_cuentas, int(self.capacidad * _CARGA_MAXIMA))
+
+    def _sondear(self, claves, posiciones):
+        """Avanza cada posición hasta su clave o hasta una posición libre; retorna (posiciones, existe)"""
+        posiciones = posiciones.copy()
+        pendientes = np.arange(len(claves))
+        while pendientes.size:
+            encontradas = self.claves[posiciones[pendientes]]
+            pendientes = pendientes[(encontradas != claves[pendientes]) & (encontradas != 0)]
+            posiciones[pendientes] = (posiciones[pendientes] + 1) & (self.capacidad - 1)
+        return posiciones, self.claves[posiciones] == claves
+
+    def ubicar(self, claves, paso=0):
+        """Posición de cada clave (sin repetidas); agrega las nuevas sin estado, haciendo lugar si hace falta"""
+        inicio = (claves & np.uint64(self.capacidad - 1)).astype(np.int64)
+        posiciones, existe = self._sondear(claves, inicio)
+        nuevas = len(claves) - int(existe.sum())
+        if self.n + nuevas > self._limite():
+            self._hacer_lugar(nuevas, paso)
+            inicio = (claves & np.uint64(self.capacidad - 1)).astype(np.int64)
+            posiciones, existe = self._sondear(claves, inicio)
+        pendientes = np.flatnonzero(~existe)
+        while pendientes.size:
+            # Varias claves nuevas pueden llegar a la misma posición libre: se queda la primera
+            libres = posiciones[pendientes]
+            _, primeras = np.unique(libres, return_index=True)
+            self.claves[libres[primeras]] = claves[pendientes[primeras]]
+            self.n += len(primeras)
+            resto = np.ones(len(pendientes), dtype=bool)
+            resto[primeras] = False
+            pendientes = pendientes[resto]
+            posiciones[pendientes] = self._sondear(claves[pendientes], posiciones[pendientes])[0]
+        return posiciones
+
+    def _hacer_lugar(self, nuevas, paso):
+        necesarias = self.n + nuevas
+        capacidad = self.capacidad
+        while capacidad < self.capacidad_maxima and necesarias > capacidad * _CARGA_MAXIMA:
+            capacidad *= 2
+        conservar = self.claves != 0
+        if necesarias > min(self.max_cuentas, int(capacidad * _CARGA_MAXIMA)):
+            if nuevas > self.max_nuevas:
+                raise ValueError(f"{nuevas:,} cuentas nuevas en una llamada con max_cuentas={self.max_cuentas:,}: "
+                                 "MotorCaracteristicas.procesar parte esos bloques")
+            conservar &= self.ultimo_paso >= paso - self.inactividad
+            objetivo = int(self.max_cuentas * 0.75) - nuevas
+            indices = np.flatnonzero(conservar)
+            if len(indices) > objetivo:
+                # Se conservan las `objetivo` cuentas de actividad más reciente
+                recientes = np.argpartition(self.ultimo_paso[indices], len(indices) - objetivo)
+                conservar[:] = False
+                conservar[indices[recientes[len(indices) - objetivo:]]] = True
+            self.desalojadas += self.n - int(conservar.sum())
+        self._reconstruir(capacidad, conservar)
+
+    def _reconstruir(self, capacidad, conservar):
+        claves = self.claves[conservar]
+        valores = {campo: getattr(self, campo)[conservar] for campo in self.CAMPOS}
+        self._asignar(capacidad)
+        self.n = 0
+        posiciones = self.ubicar(claves)
+        for campo, valor in valores.items():
+            getattr(self, campo)[posiciones] = valor
+
+
+class MotorCaracteristicas:
+    """
+    Características por cuenta sobre un flujo de transacciones ordenado por `step` (por
+    ejemplo, Fraud.csv leído por bloques). Cada transacción ve el estado de sus cuentas antes
+    de ella, incluidas las transacciones anteriores del mismo bloque:
+
+    - envíos y monto enviado por el origen, recepciones y monto recibido por el destino,
+      con decaimiento exponencial de media vida `media_vida` pasos;
+    - pasos desde la última transacción de cada cuenta (-1 si no hay estado);
+    - diferencia entre el saldo inicial y el último saldo conocido de cada cuenta;
+    - descuadre de saldos dentro de la transacción (error_saldo_origen y error_saldo_destino).
+    """
+
+    def __init__(self, max_cuentas=MAX_CUENTAS, inactividad=INACTIVIDAD, media_vida=MEDIA_VIDA):
+        self.estado = EstadoCuentas(max_cuentas, inactividad)
+        self.media_vida = media_vida
+        self.transacciones = 0
+        self._ultimo_paso = -np.inf
+
+    def parametros(self):
+        return {'media_vida': self.media_vida, 'max_cuentas': self.estado.max_cuentas,
+                'inactividad': self.estado.inactividad}
+
+    def procesar(self, bloque):
+        """DataFrame con CARACTERISTICAS_FLUJO para cada fila del bloque; actualiza el estado de las cuentas"""
+        pasos = bloque['step'].to_numpy(dtype=np.int64)
+        if len(pasos) and (pasos[0] < self._ultimo_paso or (np.diff(pasos) < 0).any()):
+            raise ValueError("El flujo de transacciones debe estar ordenado por step")
+        if len(pasos) > 1 and (pasos[-1] - pasos[0]) / self.media_vida > _MAX_MEDIAS_VIDAS_BLOQUE:
+            mitad = len(pasos) // 2
+            return pd.concat([self.procesar(bloque.iloc[:mitad]), self.procesar(bloque.iloc[mitad:])])
+        n = len(pasos)
+        resultado = pd.DataFrame(0.0, index=bloque.index, columns=CARACTERISTICAS_FLUJO)
+        if n == 0:
+            return resultado
+        monto = bloque['amount'].to_numpy(dtype=np.float64)
+        inicial = {rol: bloque[columna].to_numpy(dtype=np.float64)
+                   for rol, columna in (('origen', 'oldbalanceOrg'), ('destino', 'oldbalanceDest'))}
+        final = {rol: bloque[columna].to_numpy(dtype=np.float64)
+                 for rol, columna in (('origen', 'newbalanceOrig'), ('destino', 'newbalanceDest'))}
+        resultado['error_saldo_origen'] = final['origen'] + monto - inicial['origen']
+        resultado['error_saldo_destino'] = inicial['destino'] + monto - final['destino']
+
+        # Un evento por cuenta y transacción (primero los orígenes, después los destinos),
+        # ordenados por cuenta y dentro de cada cuenta en el orden del flujo
+        claves, inversa = np.unique(np.concatenate([claves_cuentas(bloque['nameOrig']),
+                                                    claves_cuentas(bloque['nameDest'])]), return_inverse=True)
+        if len(claves) > self.estado.max_nuevas:
+            # Más cuentas de las que caben junto al estado: se parte el bloque como los muy largos
+            mitad = n // 2
+            return pd.concat([self.procesar(bloque.iloc[:mitad]), self.procesar(bloque.iloc[mitad:])])
+        cuentas = self.estado.ubicar(claves, pasos[0])[inversa]
+        filas = np.tile(np.arange(n), 2)
+        # Una sola clave (más rápido que np.lexsort): cuenta, fila y el origen antes que el destino
+        # cuando una transacción va de una cuenta a sí misma
+        orden = np.argsort((cuentas * n + filas) * 2 + (np.arange(2 * n) >= n))
+        cuenta, fila, es_origen = cuentas[orden], filas[orden], orden < n
+        paso = pasos[fila]
+        saldo_inicial = np.where(es_origen, inicial['origen'][fila], inicial['destino'][fila])
+        saldo_final = np.where(es_origen, final['origen'][fila], final['destino'][fila])
+        primero = np.ones(2 * n, dtype=bool)
+        primero[1:] = cuenta[1:] != cuenta[:-1]
+        grupo = np.cumsum(primero) - 1
+        inicios = np.flatnonzero(primero)
+        ultimos = np.append(inicios[1:] - 1, 2 * n - 1)
+
+        # Evento anterior de la misma cuenta: en el bloque o, para el primero, el estado guardado
+        estado = self.estado
+        paso_estado = estado.ultimo_paso[cuenta].astype(np.int64)
+        paso_anterior = np.where(primero, paso_estado, np.roll(paso, 1))
+        saldo_anterior = np.where(primero, estado.ultimo_saldo[cuenta], np.roll(saldo_final, 1))
+        conocida = paso_anterior >= 0
+        pasos_desde = np.where(conocida, paso - paso_anterior, -1)
+        diferencia = np.where(conocida, saldo_inicial - saldo_anterior, 0.0)
+
+        # Sumas con decaimiento: lo guardado decae desde su paso y lo del bloque se acumula
+        # escalado por 2 ** ((paso - paso inicial) / media_vida) y se desescala en cada evento
+        escala = np.exp2((paso - pasos[0]) / self.media_vida)
+        decaimiento = np.exp2((paso_estado - paso) / self.media_vida)
+        antes = {}
+        for campo, peso in (('envios', es_origen * 1.0), ('monto_enviado', es_origen * monto[fila]),
+                            ('recepciones', ~es_origen * 1.0), ('monto_recibido', ~es_origen * monto[fila])):
+            acumulado = np.cumsum(peso * escala) - peso * escala
+            acumulado -= acumulado[inicios][grupo]
+            antes[campo] = getattr(estado, campo)[cuenta] * decaimiento + acumulado / escala
+            getattr(estado, campo)[cuenta[ultimos]] = (antes[campo] + peso)[ultimos]
+        estado.ultimo_paso[cuenta[ultimos]] = paso[ultimos]
+        estado.ultimo_saldo[cuenta[ultimos]] = saldo_final[ultimos]
+
+        for rol, mascara in (('origen', es_origen), ('destino', ~es_origen)):
+            destino = fila[mascara]
+            resultado[f'pasos_desde_ultima_{rol}'] = _en_filas(n, destino, pasos_desde[mascara])
+            resultado[f'diferencia_saldo_{rol}'] = _en_filas(n, destino, diferencia[mascara])
+        resultado['envios_origen'] = _en_filas(n, fila[es_origen], antes['envios'][es_origen])
+        resultado['monto_enviado_origen'] = _en_filas(n, fila[es_origen], antes['monto_enviado'][es_origen])
+        resultado['recepciones_destino'] = _en_filas(n, fila[~es_origen], antes['recepciones'][~es_origen])
+        resultado['monto_recibido_destino'] = _en_filas(n, fila[~es_origen], antes['monto_recibido'][~es_origen])
+        self.transacciones += n
+        self._ultimo_paso = pasos[-1]
+        return resultado
+
+    def enriquecer(self, bloque):
+        """feature_names (con `type` codificado) seguidas de CARACTERISTICAS_FLUJO, para el modelo"""
+        return pd.concat([caracteristicas(bloque), self.procesar(bloque)], axis=1)
+
+
+def _en_filas(n, filas, valores):
+    salida = np.empty(n, dtype=np.float64)
+    salida[filas] = valores
+    return salida
@@ -0,0 +1,228 @@
+import argparse
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, precision_score, recall_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from preprocesamiento import TIPOS, caracteristicas, feature_names
+from puntuar_lotes import leer_por_bloques
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Filas por bloque al convertir el CSV y al recorrer el cache
+TAMANO_BLOQUE = int(os.getenv('ENTRENAMIENTO_TAMANO_BLOQUE', 500000))
+# Núcleos para construir los árboles (-1 = todos)
+N_JOBS = int(os.getenv('ENTRENAMIENTO_N_JOBS', -1))
+
+OBJETIVO = 'isFraud'
+COLUMNAS = feature_names + [OBJETIVO]
+# Versión del contenido del cache: cambiarla obliga a reconstruirlo
+FORMATO_CACHE = 1
+# Carpeta por defecto de los artefactos entrenados con --flujo
+SALIDA_FLUJO = 'modelo_flujo'
+
+
+def _esquema(motor=None):
+    campos = [('step', pa.int32()), ('type', pa.int8()), ('amount', pa.float64()),
+              ('oldbalanceOrg', pa.float64()), ('oldbalanceDest', pa.float64()), ('isFlaggedFraud', pa.int8())]
+    if motor is not None:
+        from caracteristicas_flujo import CARACTERISTICAS_FLUJO
+        campos += [(nombre, pa.float64()) for nombre in CARACTERISTICAS_FLUJO]
+    return pa.schema(campos + [(OBJETIVO, pa.int8())])
+
+
+def _origen(csv, motor=None):
+    """Identifica el CSV, el contrato de características y el motor de flujo con que se construyó el cache"""
+    estado = os.stat(csv)
+    return {'csv': os.path.abspath(csv), 'tamano': estado.st_size, 'mtime_ns': estado.st_mtime_ns,
+            'formato': FORMATO_CACHE, 'feature_names': feature_names, 'tipos': TIPOS,
+            'flujo': motor.parametros() if motor is not None else None}
+
+
+def cache_vigente(cache, csv, motor=None):
+    """True si el cache existe y se construyó con este mismo CSV, contrato de características y motor"""
+    if not os.path.exists(cache):
+        return False
+    metadatos = pq.read_schema(cache).metadata or {}
+    return json.loads(metadatos.get(b'origen', b'null')) == _origen(csv, motor)
+
+
+def construir_cache(csv, cache, tamano_bloque=TAMANO_BLOQUE, motor=None):
+    """
+    Convierte el CSV en un Parquet tipado con las feature_names (con `type` ya codificado) y
+    la etiqueta, bloque por bloque. Con `motor` (caracteristicas_flujo.MotorCaracteristicas)
+    el CSV se recorre como un flujo ordenado por `step` y se agregan las características por
+    cuenta. Si el cache ya corresponde al CSV no hace nada. Retorna True si lo construyó.
+    """
+    if pq is None:
+        raise ImportError("El cache de entrenamiento requiere pyarrow")
+    if cache_vigente(cache, csv, motor):
+        return False
+    esquema = _esquema(motor)
+    temporal = cache + '.tmp'
+    metadatos = {b'origen': json.dumps(_origen(csv, motor)).encode()}
+    columnas = COLUMNAS
+    if motor is not None:
+        from caracteristicas_flujo import COLUMNAS_FLUJO
+        columnas = COLUMNAS + COLUMNAS_FLUJO
+    with pq.ParquetWriter(temporal, esquema.with_metadata(metadatos)) as escritor:
+        for bloque in leer_por_bloques(csv, tamano_bloque, columnas=columnas):
+            datos = caracteristicas(bloque) if motor is None else motor.enriquecer(bloque)
+            datos[OBJETIVO] = bloque[OBJETIVO].to_numpy(dtype=np.int8)
+            escritor.write_table(pa.Table.from_pandas(datos, schema=esquema, preserve_index=False))
+    os.replace(temporal, cache)
+    return True
+
+
+def contar_clases(cache, tamano_bloque=TAMANO_BLOQUE):
+    """Filas por clase (índice = clase), leyendo solo la columna de la etiqueta"""
+    conteos = np.zeros(2, dtype=np.int64)
+    for lote in pq.ParquetFile(cache).iter_batches(batch_size=tamano_bloque, columns=[OBJETIVO]):
+        conteos += np.bincount(lote.column(0).to_numpy(), minlength=2)[:2]
+    return conteos
+
+
+def muestreo_estratificado(cache, normales_por_fraude=1.0, semilla=0, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Todas las transacciones fraudulentas y `normales_por_fraude` normales por cada una, elegidas
+    al azar sin reemplazo (como el notebook, que toma tantas normales como fraudes). Se recorre
+    el cache dos veces por bloques: la primera cuenta las clases y la segunda toma las filas
+    elegidas, así la memoria depende del tamaño de la muestra y no del histórico.
+    """
+    conteos = contar_clases(cache, tamano_bloque)
+    if conteos[1] == 0:
+        raise ValueError("El cache no tiene transacciones fraudulentas")
+    objetivos = [min(conteos[0], int(round(conteos[1] * normales_por_fraude))), conteos[1]]
+    generador = np.random.default_rng(semilla)
+    # Posición de las filas elegidas dentro de las filas de su clase, en orden
+    elegidas = [np.sort(generador.choice(conteos[clase], objetivos[clase], replace=False)) for clase in (0, 1)]
+    vistas = [0, 0]
+    partes = []
+    for lote in pq.ParquetFile(cache).iter_batches(batch_size=tamano_bloque):
+        bloque = lote.to_pandas()
+        etiquetas = bloque[OBJETIVO].to_numpy()
+        tomar = np.zeros(len(bloque), dtype=bool)
+        for clase in (0, 1):
+            filas = np.flatnonzero(etiquetas == clase)
+            desde, hasta = np.searchsorted(elegidas[clase], [vistas[clase], vistas[clase] + len(filas)])
+            tomar[filas[elegidas[clase][desde:hasta] - vistas[clase]]] = True
+            vistas[clase] += len(filas)
+        partes.append(bloque[tomar])
+    return pd.concat(partes, ignore_index=True)
+
+
+def entrenar(muestra, arboles=100, semilla=0, n_jobs=N_JOBS, proporcion_prueba=0.2):
+    """
+    Como el notebook: división estratificada entrenamiento/prueba, StandardScaler ajustado con
+    el entrenamiento y RandomForest con los árboles construidos en `n_jobs` núcleos.
+    Las características son todas las columnas de la muestra salvo la etiqueta.
+    Retorna (model, scaler, métricas sobre la prueba).
+    """
+    X, y = muestra.drop(columns=OBJETIVO), muestra[OBJETIVO]
+    x_train, x_test, y_train, y_test = train_test_split(X, y, test_size=proporcion_prueba, stratify=y,
+                                                        random_state=semilla)
+    scaler = StandardScaler().fit(x_train)
+    model = RandomForestClassifier(n_estimators=arboles, n_jobs=n_jobs, random_state=semilla)
+    model.fit(scaler.transform(x_train), y_train)
+    prediccion = model.predict(scaler.transform(x_test))
+    model.n_jobs = None  # quien cargue el modelo decide cuántos núcleos usar al predecir
+    metricas = {'exactitud': accuracy_score(y_test, prediccion),
+                'precision_fraude': precision_score(y_test, prediccion),
+                'recall_fraude': recall_score(y_test, prediccion)}
+    return model, scaler, metricas
+
+
+def guardar_artefactos(model, scaler, directorio='.'):
+    """Escribe model.sav y scaler.sav (los que carga app.py); retorna sus rutas"""
+    os.makedirs(directorio, exist_ok=True)
+    rutas = os.path.join(directorio, 'model.sav'), os.path.join(directorio, 'scaler.sav')
+    for ruta, objeto in zip(rutas, (model, scaler)):
+        with open(ruta, 'wb') as f:
+            pickle.dump(objeto, f)
+    return rutas
+
+
+def entrenar_desde_csv(csv, cache=None, salida=None, normales_por_fraude=1.0, arboles=100, semilla=0,
+                       n_jobs=N_JOBS, tamano_bloque=TAMANO_BLOQUE, flujo=False):
+    """
+    Cache Parquet (si hace falta), muestreo, entrenamiento y artefactos; retorna un resumen con
+    tiempos. Con `flujo` el modelo se entrena también con las características por cuenta.
+    Sin `salida`, los artefactos van a '.' (los de app.py) o, con `flujo`, a SALIDA_FLUJO:
+    un modelo con más características no debe reemplazar el de la aplicación.
+    """
+    salida = salida or (SALIDA_FLUJO if flujo else '.')
+    motor = None
+    if flujo:
+        from caracteristicas_flujo import MotorCaracteristicas
+        motor = MotorCaracteristicas()
+    cache = cache or os.path.splitext(csv)[0] + ('_flujo' if flujo else '') + '.parquet'
+    tiempos = {}
+    inicio = time.perf_counter()
+    construido = construir_cache(csv, cache, tamano_bloque, motor)
+    tiempos['cache'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    muestra = muestreo_estratificado(cache, normales_por_fraude, semilla, tamano_bloque)
+    tiempos['muestreo'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    model, scaler, metricas = entrenar(muestra, arboles, semilla, n_jobs)
+    tiempos['entrenamiento'] = time.perf_counter() - inicio
+
+    rutas = guardar_artefactos(model, scaler, salida)
+    return {'cache': cache, 'cache_construido': construido, 'muestra': len(muestra),
+            'fraudes': int(muestra[OBJETIVO].sum()), 'tiempos': tiempos, 'metricas': metricas,
+            'artefactos': rutas}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entrenamiento del modelo de fraude sin cargar Fraud.csv en memoria")
+    parser.add_argument('csv', help="Fraud.csv o un CSV con sus columnas")
+    parser.add_argument('--cache', help="Parquet tipado (por defecto junto al CSV)")
+    parser.add_argument('--salida', help=f"carpeta de model.sav y scaler.sav (por defecto '.' o, con --flujo, "
+                                         f"'{SALIDA_FLUJO}')")
+    parser.add_argument('--normales-por-fraude', type=float, default=1.0)
+    parser.add_argument('--arboles', type=int, default=100)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--n-jobs', type=int, default=N_JOBS)
+    parser.add_argument('--bloque', type=int, default=TAMANO_BLOQUE)
+    parser.add_argument('--flujo', action='store_true',
+                        help="agrega las características por cuenta de caracteristicas_flujo.py")
+    parser.add_argument('--publicar', action='store_true', help="publica la versión en el registro de modelos")
+    args = parser.parse_args()
+    if args.flujo and args.publicar:
+        parser.error("el registro de modelos solo admite modelos con las feature_names; "
+                     "un modelo --flujo se usa con puntuar_lotes.py --flujo")
+    if args.flujo and args.salida and os.path.abspath(args.salida) == os.path.abspath('.'):
+        parser.error("un modelo --flujo no puede reemplazar model.sav y scaler.sav de la aplicación; "
+                     "use otra --salida")
+
+    resumen = entrenar_desde_csv(args.csv, args.cache, args.salida, args.normales_por_fraude, args.arboles,
+                                 args.semilla, args.n_jobs, args.bloque, args.flujo)
+    tiempos, metricas = resumen['tiempos'], resumen['metricas']
+    print(f"Cache {resumen['cache']} ({'construido' if resumen['cache_construido'] else 'reutilizado'}) "
+          f"en {tiempos['cache']:.1f} s")
+    print(f"Muestra: {resumen['muestra']:,} filas ({resumen['fraudes']:,} fraudes) en {tiempos['muestreo']:.1f} s")
+    print(f"Entrenamiento: {tiempos['entrenamiento']:.1f} s; exactitud {metricas['exactitud']:.2%}, "
+          f"precisión {metricas['precision_fraude']:.2%}, recall {metricas['recall_fraude']:.2%} en prueba")
+    print(f"Artefactos: {', '.join(resumen['artefactos'])}")
+    if args.publicar:
+        from registro_modelos import publicar_version
+
+        print(f"Versión {publicar_version(*resumen['artefactos'])} publicada")
+
+
+if __name__ == '__main__':
+    main()
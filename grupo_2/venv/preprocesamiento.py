@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+# Contrato de características del modelo (mismo orden con el que se ajustó el scaler)
+feature_names = ['step', 'type', 'amount', 'oldbalanceOrg', 'oldbalanceDest', 'isFlaggedFraud']
+
+# Códigos de los tipos de transacción usados en el entrenamiento
+TIPOS = {'CASH_OUT': 5, 'PAYMENT': 4, 'CASH_IN': 3, 'TRANSFER': 2, 'DEBIT': 1}
+_CATEGORIAS = list(TIPOS)
+_CODIGOS = np.array([TIPOS[tipo] for tipo in _CATEGORIAS], dtype=np.int8)
+
+# Tipos de las columnas al leer archivos: enteros pequeños y `type` categórico; los montos
+# quedan en float64 para que el escalamiento dé exactamente lo mismo que una fila del formulario
+DTYPES = {
+    'step': 'int32',
+    'type': 'category',
+    'amount': 'float64',
+    'oldbalanceOrg': 'float64',
+    'oldbalanceDest': 'float64',
+    'isFlaggedFraud': 'int8',
+}
+
+
+def codificar_tipos(tipos):
+    """Convierte los tipos de transacción en sus códigos numéricos con una tabla (sin .map fila por fila)"""
+    posiciones = pd.Categorical(tipos, categories=_CATEGORIAS).codes
+    if (posiciones < 0).any():
+        desconocidos = sorted(set(pd.Series(tipos)[posiciones < 0].astype(str)))
+        raise ValueError(f"Tipos de transacción desconocidos: {desconocidos}")
+    return _CODIGOS[posiciones]
+
+
+def caracteristicas(data):
+    """Columnas feature_names del DataFrame con `type` codificado, sin escalar"""
+    data = data[feature_names].copy()
+    data['type'] = codificar_tipos(data['type'])
+    data['isFlaggedFraud'] = data['isFlaggedFraud'].astype(np.int8)
+    return data
+
+
+def preprocess_data(data, scaler):
+    """Matriz escalada de las feature_names del DataFrame, lista para el modelo"""
+    # Escalamiento de características
+    return scaler.transform(caracteristicas(data))
@@ -0,0 +1,152 @@
+import argparse
+import copy
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from preprocesamiento import DTYPES, feature_names, preprocess_data
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Filas por bloque: la memoria depende de este valor y no del tamaño del archivo
+TAMANO_BLOQUE = int(os.getenv('PUNTUACION_TAMANO_BLOQUE', 100000))
+# Núcleos para predict_proba (-1 = todos)
+N_JOBS = int(os.getenv('PUNTUACION_N_JOBS', -1))
+
+
+def _es_parquet(ruta):
+    return str(getattr(ruta, 'name', ruta)).lower().endswith('.parquet')
+
+
+def leer_por_bloques(archivo, tamano_bloque=TAMANO_BLOQUE, columnas=None):
+    """
+    Genera DataFrames de a `tamano_bloque` filas de un CSV o Parquet (ruta o archivo abierto).
+    Las columnas del modelo se leen con los tipos de DTYPES; el resto tal como vienen.
+    """
+    if _es_parquet(archivo):
+        if pq is None:
+            raise ImportError("Leer Parquet requiere pyarrow")
+        parquet = pq.ParquetFile(archivo)
+        for lote in parquet.iter_batches(batch_size=tamano_bloque, columns=columnas):
+            bloque = lote.to_pandas()
+            yield bloque.astype({c: t for c, t in DTYPES.items() if c in bloque.columns})
+    else:
+        yield from pd.read_csv(archivo, chunksize=tamano_bloque, usecols=columnas,
+                               dtype={c: t for c, t in DTYPES.items() if columnas is None or c in columnas})
+
+
+class EscritorResultados:
+    """Escribe los bloques puntuados a medida que llegan, en Parquet o CSV según la extensión"""
+
+    def __init__(self, salida):
+        self.salida = salida
+        self.parquet = _es_parquet(salida)
+        if self.parquet and pq is None:
+            raise ImportError("Escribir Parquet requiere pyarrow")
+        self._escritor = None
+        self._primero = True
+
+    def escribir(self, bloque):
+        if self.parquet:
+            tabla = pa.Table.from_pandas(bloque, preserve_index=False)
+            if self._escritor is None:
+                self._escritor = pq.ParquetWriter(self.salida, tabla.schema)
+            self._escritor.write_table(tabla)
+        else:
+            bloque.to_csv(self.salida, mode='w' if self._primero else 'a', header=self._primero, index=False)
+        self._primero = False
+
+    def cerrar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def puntuar_bloque(bloque, model, scaler, motor=None):
+    """
+    Agrega al bloque la probabilidad de fraude y la predicción (igual a model.predict).
+    Con un MotorCaracteristicas, el modelo recibe además las características por cuenta.
+    """
+    X = preprocess_data(bloque, scaler) if motor is None else scaler.transform(motor.enriquecer(bloque))
+    probabilidades = model.predict_proba(X)
+    bloque['prob_fraude'] = probabilidades[:, list(model.classes_).index(1)].astype(np.float32)
+    bloque['prediccion'] = model.classes_[np.argmax(probabilidades, axis=1)]
+    return bloque
+
+
+def puntuar_archivo(entrada, salida, model, scaler, tamano_bloque=TAMANO_BLOQUE, n_jobs=N_JOBS,
+                    al_avanzar=None, motor=None):
+    """
+    Puntúa un CSV o Parquet completo por bloques y escribe cada bloque en `salida` apenas
+    se puntúa. `al_avanzar(filas, segundos)` recibe el avance después de cada bloque.
+    Con `motor` (caracteristicas_flujo.MotorCaracteristicas) el archivo se trata como un
+    flujo ordenado por `step` y el modelo debe estar entrenado con NOMBRES_ENRIQUECIDOS.
+    Retorna un diccionario con filas, fraudes, segundos y filas por segundo.
+    """
+    # Copia superficial (comparte los árboles): el modelo del llamador, p. ej. el del registro
+    # compartido entre sesiones de app.py, conserva su n_jobs
+    model = copy.copy(model)
+    model.n_jobs = n_jobs  # los árboles del bosque se recorren en paralelo
+    filas = fraudes = 0
+    inicio = time.perf_counter()
+    with EscritorResultados(salida) as escritor:
+        for bloque in leer_por_bloques(entrada, tamano_bloque):
+            bloque = puntuar_bloque(bloque, model, scaler, motor)
+            escritor.escribir(bloque)
+            filas += len(bloque)
+            fraudes += int((bloque['prediccion'] == 1).sum())
+            if al_avanzar is not None:
+                al_avanzar(filas, time.perf_counter() - inicio)
+    segundos = time.perf_counter() - inicio
+    return {'filas': filas, 'fraudes': fraudes, 'segundos': segundos,
+            'filas_por_segundo': filas / segundos if segundos > 0 else 0.0}
+
+
+def cargar_artefacto(ruta):
+    with open(ruta, 'rb') as f:
+        return pickle.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Puntúa por bloques un CSV o Parquet de transacciones")
+    parser.add_argument('entrada', help="CSV o Parquet con las columnas " + ', '.join(feature_names))
+    parser.add_argument('salida', help="archivo de resultados (.parquet o .csv)")
+    parser.add_argument('--modelo', default='model.sav')
+    parser.add_argument('--scaler', default='scaler.sav')
+    parser.add_argument('--bloque', type=int, default=TAMANO_BLOQUE, help="filas por bloque")
+    parser.add_argument('--n-jobs', type=int, default=N_JOBS)
+    parser.add_argument('--flujo', action='store_true',
+                        help="agrega las características por cuenta (modelo entrenado con entrenamiento.py --flujo)")
+    args = parser.parse_args()
+
+    model = cargar_artefacto(args.modelo)
+    scaler = cargar_artefacto(args.scaler)
+    motor = None
+    if args.flujo:
+        from caracteristicas_flujo import MotorCaracteristicas
+        motor = MotorCaracteristicas()
+
+    def mostrar(filas, segundos):
+        print(f"\r{filas:,} filas  {filas / segundos:,.0f} filas/s", end='', flush=True)
+
+    resumen = puntuar_archivo(args.entrada, args.salida, model, scaler, args.bloque, args.n_jobs, mostrar, motor)
+    print(f"\n{resumen['filas']:,} filas puntuadas en {resumen['segundos']:.1f} s "
+          f"({resumen['filas_por_segundo']:,.0f} filas/s), {resumen['fraudes']:,} predichas como fraude")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+from bosque_compilado import ARREGLOS, BosqueCompilado, compilar_bosque
+from preprocesamiento import feature_names
+from puntuar_lotes import cargar_artefacto
+
+# Directorio con una carpeta por versión publicada del modelo
+DIRECTORIO_MODELOS = os.getenv('MODELOS_DIR', 'modelos')
+# Segundos entre revisiones del directorio en busca de una versión nueva
+INTERVALO_REVISION = float(os.getenv('MODELOS_INTERVALO_REVISION', 5))
+# Versión del formato de los arreglos del bosque compilado
+FORMATO_BOSQUE = 1
+
+MANIFIESTO = 'manifiesto.json'
+
+logger = logging.getLogger(__name__)
+
+
+def sha256_archivo(ruta, tamano_bloque=1 << 20):
+    digest = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(tamano_bloque), b''):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+
+def publicar_version(ruta_modelo, ruta_scaler, directorio=DIRECTORIO_MODELOS, version=None):
+    """
+    Publica un par model.sav/scaler.sav como una versión nueva: copia los pickles, exporta el
+    bosque compilado (un .npy por arreglo, mapeable en memoria) y escribe el manifiesto con el
+    hash de cada archivo. Se arma en una carpeta temporal y se renombra al final, así los
+    procesos que revisan el directorio nunca ven una versión a medias. Retorna el nombre.
+    """
+    import sklearn
+
+    version = version or time.strftime('%Y%m%d-%H%M%S')
+    destino = os.path.join(directorio, version)
+    if os.path.exists(destino):
+        raise ValueError(f"La versión {version} ya existe en {directorio}")
+    temporal = os.path.join(directorio, f'.{version}.{os.getpid()}.tmp')
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+    try:
+        shutil.copyfile(ruta_modelo, os.path.join(temporal, 'model.sav'))
+        shutil.copyfile(ruta_scaler, os.path.join(temporal, 'scaler.sav'))
+        model, scaler = cargar_artefacto(ruta_modelo), cargar_artefacto(ruta_scaler)
+        if list(getattr(scaler, 'feature_names_in_', feature_names)) != feature_names:
+            raise ValueError("El scaler no se ajustó con las columnas de feature_names")
+        if model.n_features_in_ != len(feature_names):
+            raise ValueError(f"El modelo espera {model.n_features_in_} características, no {len(feature_names)}")
+        compilar_bosque(model, scaler).guardar(os.path.join(temporal, 'bosque'))
+
+        archivos = ['model.sav', 'scaler.sav', 'bosque/bosque.json'] + [f'bosque/{a}.npy' for a in ARREGLOS]
+        manifiesto = {
+            'version': version,
+            'formato_bosque': FORMATO_BOSQUE,
+            'sklearn': sklearn.__version__,
+            'feature_names': feature_names,
+            'hashes': {archivo: sha256_archivo(os.path.join(temporal, archivo)) for archivo in archivos},
+        }
+        with open(os.path.join(temporal, MANIFIESTO), 'w') as f:
+            json.dump(manifiesto, f, indent=2)
+        os.replace(temporal, destino)
+    except Exception:
+        shutil.rmtree(temporal, ignore_errors=True)
+        raise
+    return version
+
+
+class VersionModelo:
+    """
+    Una versión publicada. El bosque compilado se abre mapeado en memoria (los procesos que
+    usan la misma versión comparten las páginas); el scaler y el modelo de sklearn se cargan
+    solo si se usan (la puntuación por lotes los necesita, el formulario no).
+    """
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        with open(os.path.join(directorio, MANIFIESTO)) as f:
+            self.manifiesto = json.load(f)
+        self.version = self.manifiesto['version']
+        self._verificar()
+        self.bosque = BosqueCompilado.cargar(os.path.join(directorio, 'bosque'), mmap_mode='r')
+        self._model = None
+        self._scaler = None
+        self._lock = threading.Lock()
+
+    def _verificar(self):
+        if os.path.basename(os.path.normpath(self.directorio)) != self.version:
+            raise ValueError(f"La carpeta {self.directorio} no corresponde a la versión {self.version}")
+        if self.manifiesto.get('formato_bosque') != FORMATO_BOSQUE:
+            raise ValueError(f"Versión {self.version}: formato de bosque {self.manifiesto.get('formato_bosque')}, "
+                             f"se esperaba {FORMATO_BOSQUE}")
+        if self.manifiesto.get('feature_names') != feature_names:
+            raise ValueError(f"Versión {self.version}: las características no coinciden con feature_names")
+        for archivo, esperado in self.manifiesto['hashes'].items():
+            if sha256_archivo(os.path.join(self.directorio, archivo)) != esperado:
+                raise ValueError(f"Versión {self.version}: {archivo} no coincide con el hash del manifiesto")
+
+    def _cargar(self, nombre):
+        with self._lock:
+            atributo = '_' + nombre
+            if getattr(self, atributo) is None:
+                setattr(self, atributo, cargar_artefacto(os.path.join(self.directorio, nombre + '.sav')))
+            return getattr(self, atributo)
+
+    @property
+    def model(self):
+        return self._cargar('model')
+
+    @property
+    def scaler(self):
+        return self._cargar('scaler')
+
+    def predict(self, X):
+        """Predicciones para características sin escalar (orden de feature_names)"""
+        return self.bosque.predict(np.asarray(X, dtype=np.float64))
+
+
+class RegistroModelos:
+    """
+    Versión vigente del modelo para el proceso. Revisa el directorio cada `intervalo`
+    segundos y cambia a la versión más reciente (por nombre) cuando aparece una nueva y
+    pasa la verificación de hashes; si la verificación falla sigue con la anterior.
+    Si el directorio no tiene versiones y existen model.sav y scaler.sav, los publica.
+    """
+
+    def __init__(self, directorio=DIRECTORIO_MODELOS, intervalo=INTERVALO_REVISION,
+                 modelo_inicial='model.sav', scaler_inicial='scaler.sav'):
+        self.directorio = directorio
+        self.intervalo = intervalo
+        self.modelo_inicial = modelo_inicial
+        self.scaler_inicial = scaler_inicial
+        self._actual = None
+        self._descartadas = set()
+        self._ultima_revision = 0.0
+        self._lock = threading.Lock()
+
+    def versiones(self):
+        """Nombres de las versiones publicadas, de la más antigua a la más reciente"""
+        if not os.path.isdir(self.directorio):
+            return []
+        return sorted(nombre for nombre in os.listdir(self.directorio)
+                      if not nombre.startswith('.') and os.path.exists(os.path.join(self.directorio, nombre, MANIFIESTO)))
+
+    def _revisar(self):
+        versiones = self.versiones()
+        if not versiones and os.path.exists(self.modelo_inicial) and os.path.exists(self.scaler_inicial):
+            try:
+                publicar_version(self.modelo_inicial, self.scaler_inicial, self.directorio)
+            except (OSError, ValueError) as e:
+                # Otro proceso pudo publicar la misma versión al mismo tiempo
+                logger.warning("No se pudo publicar %s: %s", self.modelo_inicial, e)
+            versiones = self.versiones()
+        for version in reversed(versiones):
+            if self._actual is not None and version == self._actual.version:
+                return
+            if version in self._descartadas:
+                continue
+            try:
+                self._actual = VersionModelo(os.path.join(self.directorio, version))
+                logger.info("Modelo en uso: versión %s", version)
+                return
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("Versión %s descartada: %s", version, e)
+                self._descartadas.add(version)
+
+    def actual(self):
+        """Versión vigente (revisa si hay una nueva a lo sumo cada `intervalo` segundos)"""
+        with self._lock:
+            if self._actual is None or time.monotonic() - self._ultima_revision >= self.intervalo:
+                self._ultima_revision = time.monotonic()
+                self._revisar()
+            if self._actual is None:
+                raise FileNotFoundError(f"No hay versiones válidas del modelo en {self.directorio}")
+            return self._actual
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registro de versiones del modelo de fraude")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    publicar = subcomandos.add_parser('publicar', help="publica model.sav + scaler.sav como versión nueva")
+    publicar.add_argument('--modelo', default='model.sav')
+    publicar.add_argument('--scaler', default='scaler.sav')
+    publicar.add_argument('--version')
+    subcomandos.add_parser('listar', help="lista las versiones publicadas")
+    parser.add_argument('--directorio', default=DIRECTORIO_MODELOS)
+    args = parser.parse_args()
+
+    if args.comando == 'publicar':
+        version = publicar_version(args.modelo, args.scaler, args.directorio, args.version)
+        print(f"Versión {version} publicada en {args.directorio}/")
+    else:
+        for version in RegistroModelos(args.directorio).versiones():
+            print(version)
+
+
+if __name__ == '__main__':
+    main()
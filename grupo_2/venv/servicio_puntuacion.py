@@ -0,0 +1,184 @@
+import argparse
+import copy
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from preprocesamiento import TIPOS, feature_names
+from puntuar_lotes import cargar_artefacto
+
+# Configuración del servicio
+PUERTO = int(os.getenv('SERVICIO_PUERTO', 8502))
+MAX_LOTE = int(os.getenv('SERVICIO_MAX_LOTE', 256))  # transacciones por micro-lote
+MAX_ESPERA_MS = float(os.getenv('SERVICIO_MAX_ESPERA_MS', 2))  # espera máxima para completar un micro-lote
+N_JOBS = int(os.getenv('SERVICIO_N_JOBS', 1))  # los micro-lotes son pequeños: un hilo evita el costo de joblib
+
+
+class MicroLotes:
+    """
+    Agrupa las transacciones que llegan de solicitudes concurrentes en micro-lotes y los
+    puntúa en un solo hilo. Un micro-lote se cierra al llegar a `max_lote` transacciones o
+    `max_espera_ms` después de la primera. Las características se escriben directamente en
+    un buffer de NumPy preasignado y se escalan en el mismo buffer (sin pandas).
+    """
+
+    def __init__(self, model, scaler, max_lote=MAX_LOTE, max_espera_ms=MAX_ESPERA_MS):
+        self.model = model
+        self.max_lote = max_lote
+        self.max_espera = max_espera_ms / 1000
+        self._media = np.asarray(scaler.mean_, dtype=np.float64)
+        self._escala = np.asarray(scaler.scale_, dtype=np.float64)
+        self._columna_fraude = list(model.classes_).index(1)
+        self._buffer = np.empty((max_lote, len(feature_names)), dtype=np.float64)
+        self._cola = queue.Queue()
+        self.lotes = 0
+        self.transacciones = 0
+        threading.Thread(target=self._puntuar, daemon=True).start()
+
+    @staticmethod
+    def codificar(transaccion):
+        """
+        Tupla de características en el orden de feature_names; ValueError si falta un campo,
+        el tipo no existe, un valor no es un número finito (un inf haría fallar todo el micro-lote)
+        o isFlaggedFraud no es 0 o 1 (true/false de JSON también valen)
+        """
+        try:
+            tipo = TIPOS[transaccion['type']]
+            fila = (float(transaccion['step']), tipo, float(transaccion['amount']),
+                    float(transaccion['oldbalanceOrg']), float(transaccion['oldbalanceDest']),
+                    float(transaccion['isFlaggedFraud']))
+        except KeyError as e:
+            raise ValueError(f"Falta el campo o el tipo no es válido: {e}") from None
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Valor no numérico: {e}") from None
+        finitos = np.isfinite(fila)
+        if not finitos.all():
+            campos = [nombre for nombre, finito in zip(feature_names, finitos) if not finito]
+            raise ValueError(f"Valor no finito en {', '.join(campos)}")
+        if fila[-1] not in (0.0, 1.0):
+            raise ValueError(f"isFlaggedFraud debe ser 0 o 1: {transaccion['isFlaggedFraud']!r}")
+        return fila
+
+    def enviar(self, transacciones):
+        """Encola las transacciones (ya validadas) y retorna un Future por cada una"""
+        filas = [self.codificar(t) for t in transacciones]
+        futuros = []
+        for fila in filas:
+            futuro = Future()
+            self._cola.put((fila, futuro))
+            futuros.append(futuro)
+        return futuros
+
+    def _siguiente_lote(self):
+        pendientes = [self._cola.get()]
+        limite = time.perf_counter() + self.max_espera
+        while len(pendientes) < self.max_lote:
+            restante = limite - time.perf_counter()
+            try:
+                pendientes.append(self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait())
+            except queue.Empty:
+                break
+        return pendientes
+
+    def _puntuar(self):
+        while True:
+            pendientes = self._siguiente_lote()
+            n = len(pendientes)
+            lote = self._buffer[:n]
+            for i, (fila, _) in enumerate(pendientes):
+                lote[i] = fila
+            # Mismas operaciones que StandardScaler.transform, sobre el buffer
+            np.subtract(lote, self._media, out=lote)
+            np.divide(lote, self._escala, out=lote)
+            try:
+                probabilidades = self.model.predict_proba(lote)
+            except Exception as e:
+                for _, futuro in pendientes:
+                    futuro.set_exception(e)
+                continue
+            predicciones = self.model.classes_[np.argmax(probabilidades, axis=1)]
+            for i, (_, futuro) in enumerate(pendientes):
+                futuro.set_result({'prob_fraude': float(probabilidades[i, self._columna_fraude]),
+                                   'prediccion': int(predicciones[i])})
+            self.lotes += 1
+            self.transacciones += n
+
+
+class ManejadorPuntuacion(BaseHTTPRequestHandler):
+    """POST /puntuar con una transacción (objeto JSON) o varias (lista); GET /salud"""
+
+    protocol_version = 'HTTP/1.1'  # conexiones persistentes
+    micro_lotes = None
+
+    def _responder(self, estado, cuerpo):
+        datos = json.dumps(cuerpo).encode()
+        self.send_response(estado)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        if self.path != '/salud':
+            return self._responder(404, {'error': 'ruta no encontrada'})
+        self._responder(200, {'lotes': self.micro_lotes.lotes, 'transacciones': self.micro_lotes.transacciones})
+
+    def do_POST(self):
+        if self.path != '/puntuar':
+            return self._responder(404, {'error': 'ruta no encontrada'})
+        try:
+            cuerpo = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            varias = isinstance(cuerpo, list)
+            futuros = self.micro_lotes.enviar(cuerpo if varias else [cuerpo])
+        except (ValueError, TypeError) as e:
+            return self._responder(400, {'error': str(e)})
+        try:
+            resultados = [futuro.result() for futuro in futuros]
+        except Exception as e:
+            # Solo esta solicitud recibe el error; la conexión sigue abierta
+            return self._responder(500, {'error': f"No se pudo puntuar: {e}"})
+        self._responder(200, resultados if varias else resultados[0])
+
+    def log_message(self, formato, *args):
+        pass
+
+
+class ServidorPuntuacion(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # muchos clientes conectándose a la vez
+
+
+def crear_servidor(model, scaler, puerto=PUERTO, max_lote=MAX_LOTE, max_espera_ms=MAX_ESPERA_MS, n_jobs=N_JOBS):
+    """Servidor HTTP (un hilo por conexión) con su MicroLotes; se inicia con serve_forever()"""
+    # Copia superficial (comparte los árboles): el modelo del llamador conserva su n_jobs
+    model = copy.copy(model)
+    model.n_jobs = n_jobs
+    manejador = type('Manejador', (ManejadorPuntuacion,),
+                     {'micro_lotes': MicroLotes(model, scaler, max_lote, max_espera_ms)})
+    return ServidorPuntuacion(('0.0.0.0', puerto), manejador)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP de puntuación de fraude con micro-lotes")
+    parser.add_argument('--modelo', default='model.sav')
+    parser.add_argument('--scaler', default='scaler.sav')
+    parser.add_argument('--puerto', type=int, default=PUERTO)
+    parser.add_argument('--max-lote', type=int, default=MAX_LOTE)
+    parser.add_argument('--max-espera-ms', type=float, default=MAX_ESPERA_MS)
+    parser.add_argument('--n-jobs', type=int, default=N_JOBS)
+    args = parser.parse_args()
+
+    servidor = crear_servidor(cargar_artefacto(args.modelo), cargar_artefacto(args.scaler), args.puerto,
+                              args.max_lote, args.max_espera_ms, args.n_jobs)
+    print(f"Servicio de puntuación en http://localhost:{servidor.server_address[1]}/puntuar")
+    servidor.serve_forever()
+
+
+if __name__ == '__main__':
+    main()